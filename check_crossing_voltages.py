@@ -1,7 +1,9 @@
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import glob
+from pmt_profiler.waveform import read_waveform
+from pmt_profiler.crossing import first_crossing_times, rms_jitter
+from pmt_profiler.filters import moving_average, preprocess
 
 
 files = glob.glob("PMT CSV Files/*.csv")
@@ -9,33 +11,29 @@ files = glob.glob("PMT CSV Files/*.csv")
 # Define thresholds (10% to 100% in 10 or 20 steps)
 n_points = 50
 thresholds = np.linspace(0.1, 1.0, n_points)
-jitter_rms_list = []
 
-# For each threshold, collect crossing times for all pulses
-all_crossing_times = {thr: [] for thr in thresholds}
+# Subtract the baseline and smooth before picking off crossings (changes the jitter)
+smooth = False
 
+pulses = []
+t0 = []
+sample_interval = []
 for file in files:
-    df = pd.read_csv(file, header=21)
-    time = pd.to_numeric(df.iloc[:, 0], errors='coerce')
-    amplitude = pd.to_numeric(df.iloc[:, 1], errors='coerce') * 1000
-    norm_amplitude = -amplitude / amplitude.min()
-    for thr in thresholds:
-        value = norm_amplitude.min() * thr  # since norm_amplitude.min() is negative
-        idxs = np.where(np.diff(np.sign(norm_amplitude - value)))[0]
-        if len(idxs) > 0:
-            crossing_idx = idxs[0]
-            crossing_time = time.iloc[crossing_idx]
-            all_crossing_times[thr].append(crossing_time)
+    header, time, amplitude = read_waveform(file)
+    pulses.append(amplitude)
+    t0.append(time[0])
+    sample_interval.append(header.sample_interval)
+
+# Optionally remove each pulse's baseline offset and light high-frequency noise
+cleaned = np.stack(pulses)
+if smooth:
+    cleaned = preprocess(cleaned, baseline_samples=100, kernel=moving_average(3))
+
+# Interpolated first-crossing time of every pulse at every threshold
+all_crossing_times = first_crossing_times(cleaned, thresholds, np.array(sample_interval), np.array(t0))
 
 # Calculate RMS jitter for each threshold
-for thr in thresholds:
-    times = np.array(all_crossing_times[thr])
-    if len(times) > 1:
-        mean_time = np.mean(times)
-        rms_jitter = np.std(times - mean_time) * 1e9  # ns
-        jitter_rms_list.append(rms_jitter)
-    else:
-        jitter_rms_list.append(np.nan)
+jitter_rms_list = rms_jitter(all_crossing_times) * 1e9  # ns
 
 # Plot jitter curve
 plt.figure()
@@ -1,63 +1,33 @@
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import glob
+from pmt_profiler.waveform import read_waveform
+from pmt_profiler.crossing import first_crossing_times
+from pmt_profiler.timewalk import binned_stats
 
 files = glob.glob("PMT CSV Files/*.csv")
 
 # 1. Collect peak amplitudes and 50% crossing times for each pulse
-peak_amplitudes = []
-fifty_percent_times = []
-
+pulses = []
+t0 = []
+sample_interval = []
 for file in files:
-    df = pd.read_csv(file, header=21)
-    time = pd.to_numeric(df.iloc[:, 0], errors='coerce')
-    amplitude = pd.to_numeric(df.iloc[:, 1], errors='coerce') * 1000
-    norm_amplitude = -amplitude / amplitude.min()
-    # Peak amplitude (use min because pulses are negative)
-    peak = amplitude.min()
-    peak_amplitudes.append(peak)
-    # 50% crossing
-    fifty_percent = norm_amplitude.min() / 2
-    idxs = np.where(np.diff(np.sign(norm_amplitude - fifty_percent)))[0]
-    if len(idxs) > 0:
-        crossing_time = time.iloc[idxs[0]]
-        fifty_percent_times.append(crossing_time)
-    else:
-        fifty_percent_times.append(np.nan)
+    header, time, amplitude = read_waveform(file)
+    pulses.append(amplitude * 1000)  # Convert V to mV
+    t0.append(time[0])
+    sample_interval.append(header.sample_interval)
 
-peak_amplitudes = np.array(peak_amplitudes)
-fifty_percent_times = np.array(fifty_percent_times)
+pulses = np.stack(pulses)
+# Peak amplitude (use min because pulses are negative)
+peak_amplitudes = pulses.min(axis=1)
+fifty_percent_times = first_crossing_times(pulses, [0.5], np.array(sample_interval), np.array(t0))[:, 0]
 
 # 2. Bin by peak amplitude
-n_bins = 10
-valid = ~np.isnan(fifty_percent_times)
-amps = peak_amplitudes[valid]
-times = fifty_percent_times[valid]
-mean_amp = np.mean(amps)
-
-# Define amplitude bins (e.g., 0-50, 50-100, ..., up to max amplitude)
 bin_width = 20  # mV
-min_amp = np.floor(amps.min() / bin_width) * bin_width
-max_amp = np.ceil(amps.max() / bin_width) * bin_width
-bin_edges = np.arange(min_amp, max_amp + bin_width, bin_width)
-
-# Bin the amplitudes
-bin_indices = np.digitize(amps, bin_edges) - 1
-
-bin_centers = []
-jitter_rms = []
-
-for i in range(len(bin_edges) - 1):
-    in_bin = bin_indices == i
-    if np.sum(in_bin) > 1:
-        bin_time = times[in_bin]
-        mean_time = np.mean(bin_time)
-        rms = np.std(bin_time - mean_time) * 1e9  # ns
-        # Center of the bin for plotting
-        center = (bin_edges[i] + bin_edges[i+1]) / 2
-        bin_centers.append(center)
-        jitter_rms.append(rms)
+stats = binned_stats(peak_amplitudes, fifty_percent_times, bin_width=bin_width)
+populated = stats.counts > 1
+bin_centers = stats.centers[populated]
+jitter_rms = stats.rms[populated] * 1e9  # ns
 
 # Plot as a bar plot (histogram)
 plt.figure()
@@ -4,9 +4,24 @@ PMT Profiler Analysis Package
 
 __version__ = "0.1.0"
 
-from .mdo32 import (
-    connect_to_oscilloscope,
-    load_settings,
-    capture_waveform,
-    export_waveform
-) 
\ No newline at end of file
+# Instrument backends are slow to import, so package-level names are
+# resolved from their modules on first access
+_LAZY_ATTRIBUTES = {
+    "connect_to_oscilloscope": ".mdo32",
+    "load_settings": ".mdo32",
+    "capture_waveform": ".mdo32",
+    "export_waveform": ".mdo32",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
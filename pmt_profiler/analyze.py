@@ -0,0 +1,311 @@
+"""Run several pulse analyses over one in-memory dataset.
+
+A dataset (a directory of CSV exports or a packed waveform store) is loaded
+and baseline subtracted once; the crossing, jitter, walk and overlay
+analyses then share the same arrays, and all results are written to one
+output directory.
+"""
+
+import glob
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from rich.console import Console
+from .cache import ResultCache
+from .crossing import first_crossing_times, rms_jitter
+from .filters import preprocess
+from .persistence import draw_lines, draw_persistence, persistence_histogram
+from .store import DATA_FILE, INDEX_FILE, WaveformStore
+from .timewalk import binned_stats
+from .waveform import read_waveform
+
+console = Console()
+
+ANALYSES = ("crossing", "jitter", "walk", "overlay")
+
+# Part of every cache key; bump when analysis results change for the same inputs
+RESULTS_VERSION = 2
+
+@dataclass
+class Dataset:
+    """Pulses of one measurement with their timebases."""
+
+    amplitude: np.ndarray
+    sample_interval: np.ndarray
+    t0: np.ndarray
+    sources: List[str]
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+def _is_store(path: str) -> bool:
+    return os.path.exists(os.path.join(path, INDEX_FILE))
+
+def dataset_files(path: str, pattern: str = "*.csv") -> List[str]:
+    """Files whose content defines a dataset.
+
+    Args:
+        path: CSV directory or store directory
+        pattern: Glob pattern for CSV files (default: *.csv)
+
+    Returns:
+        List of CSV files, or the data and index files of a store
+    """
+    if _is_store(path):
+        return [os.path.join(path, DATA_FILE), os.path.join(path, INDEX_FILE)]
+    files = sorted(glob.glob(os.path.join(path, pattern)))
+    if not files:
+        raise FileNotFoundError(f"No files matching '{pattern}' in {path}")
+    return files
+
+def load_dataset(path: str, pattern: str = "*.csv") -> Dataset:
+    """Load a directory of waveform CSVs or a packed waveform store.
+
+    CSV records whose length differs from the first file are skipped.
+
+    Args:
+        path: CSV directory or store directory
+        pattern: Glob pattern for CSV files (default: *.csv)
+
+    Returns:
+        Dataset: All pulses as an N x L array
+    """
+    if _is_store(path):
+        store = WaveformStore(path)
+        return Dataset(store.amplitude, store.sample_interval, store.t0, store.sources)
+
+    files = dataset_files(path, pattern)
+    pulses, intervals, starts, sources = [], [], [], []
+    for file in files:
+        header, time, amplitude = read_waveform(file)
+        if pulses and len(amplitude) != len(pulses[0]):
+            console.print(f"[yellow]Skipping {file}: {len(amplitude)} samples, expected {len(pulses[0])}")
+            continue
+        pulses.append(amplitude)
+        intervals.append(header.sample_interval)
+        starts.append(time[0])
+        sources.append(os.path.basename(file))
+    return Dataset(np.stack(pulses), np.array(intervals), np.array(starts), sources)
+
+def run_analyses(
+    dataset: Dataset,
+    analyses: Sequence[str] = ANALYSES,
+    thresholds: Optional[np.ndarray] = None,
+    walk_fraction: float = 0.5,
+    bin_width: float = 0.02,
+    baseline_samples: int = 100,
+    max_traces: int = 500
+) -> Dict[str, Dict[str, Any]]:
+    """Run the requested analyses on a dataset.
+
+    Args:
+        dataset: Loaded pulses
+        analyses: Any of "crossing", "jitter", "walk", "overlay"
+        thresholds: Relative thresholds for crossing and jitter
+            (default: 50 steps from 10% to 100% of the peak)
+        walk_fraction: Relative threshold of the walk analysis
+        bin_width: Peak-amplitude bin width of the walk analysis, in volts
+        baseline_samples: Leading samples used for baseline subtraction
+        max_traces: Most pulses drawn as lines in the overlay; larger sets
+            are drawn as persistence (density) images
+
+    Returns:
+        Dict mapping each analysis to its named result arrays
+    """
+    unknown = set(analyses) - set(ANALYSES)
+    if unknown:
+        raise ValueError(f"Unknown analyses {sorted(unknown)}, expected any of {ANALYSES}")
+    if thresholds is None:
+        thresholds = np.linspace(0.1, 1.0, 50)
+    cleaned = preprocess(dataset.amplitude, baseline_samples=baseline_samples)
+    results: Dict[str, Dict[str, Any]] = {}
+
+    if "crossing" in analyses or "jitter" in analyses:
+        times = first_crossing_times(cleaned, thresholds, dataset.sample_interval, dataset.t0)
+        if "crossing" in analyses:
+            results["crossing"] = {"thresholds": thresholds, "times": times}
+        if "jitter" in analyses:
+            results["jitter"] = {
+                "thresholds": thresholds,
+                "jitter": rms_jitter(times),
+                "crossed": np.sum(~np.isnan(times), axis=0),
+            }
+
+    if "walk" in analyses:
+        peaks = cleaned.min(axis=1)
+        times = first_crossing_times(cleaned, [walk_fraction], dataset.sample_interval, dataset.t0)[:, 0]
+        stats = binned_stats(peaks, times, bin_width=bin_width)
+        results["walk"] = {
+            "fraction": walk_fraction,
+            "centers": stats.centers,
+            "counts": stats.counts,
+            "mean": stats.mean,
+            "rms": stats.rms,
+        }
+
+    if "overlay" in analyses:
+        samples = np.arange(cleaned.shape[1])
+        if np.ptp(dataset.t0) == 0 and np.ptp(dataset.sample_interval) == 0:
+            times = dataset.t0[0] + samples * dataset.sample_interval[0]
+        else:
+            times = dataset.t0[:, None] + samples * dataset.sample_interval[:, None]
+        amplitude = cleaned * 1e3
+        normalized = cleaned / np.abs(cleaned.min(axis=1, keepdims=True))
+        if len(dataset) <= max_traces:
+            results["overlay"] = {"time": times, "amplitude_mV": amplitude, "normalized": normalized}
+        else:
+            results["overlay"] = {
+                "amplitude_mV": persistence_histogram(times, amplitude),
+                "normalized": persistence_histogram(times, normalized),
+            }
+    return results
+
+def _save_figure(fig, filename: str) -> None:
+    fig.tight_layout()
+    fig.savefig(filename, dpi=120)
+
+def write_results(results: Dict[str, Dict[str, Any]], sources: Sequence[str], output_dir: str) -> List[str]:
+    """Write the tables and plots of every analysis to a directory.
+
+    Figures are drawn with matplotlib's object API, so no display is needed.
+
+    Args:
+        results: Output of run_analyses
+        sources: Source name of each analyzed pulse
+        output_dir: Directory for the results, created if needed
+
+    Returns:
+        List of the written file paths
+    """
+    from matplotlib.figure import Figure
+
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    summary: Dict[str, Any] = {"pulses": len(sources), "analyses": list(results)}
+
+    def path(name: str) -> str:
+        written.append(os.path.join(output_dir, name))
+        return written[-1]
+
+    if "crossing" in results:
+        crossing = results["crossing"]
+        header = "source," + ",".join(f"t_{t:.3f}" for t in crossing["thresholds"])
+        with open(path("crossing_times.csv"), "w") as f:
+            f.write(header + "\n")
+            for source, row in zip(sources, crossing["times"]):
+                f.write(source + "," + ",".join(repr(float(t)) for t in row) + "\n")
+
+    if "jitter" in results:
+        jitter = results["jitter"]
+        np.savetxt(
+            path("jitter.csv"),
+            np.column_stack([jitter["thresholds"], jitter["jitter"] * 1e9, jitter["crossed"]]),
+            delimiter=",", header="threshold,jitter_ns,crossed", comments="",
+        )
+        fig = Figure()
+        ax = fig.subplots()
+        ax.plot(jitter["thresholds"] * 100, jitter["jitter"] * 1e9, marker="o")
+        ax.set_xlabel("Threshold (% of peak)")
+        ax.set_ylabel("RMS Jitter (ns)")
+        ax.set_title("Jitter Curve vs. Amplitude Threshold")
+        ax.set_yscale("log")
+        ax.grid()
+        _save_figure(fig, path("jitter.png"))
+        # Jitter is NaN where fewer than two pulses crossed the threshold
+        if np.isfinite(jitter["jitter"]).any():
+            best = int(np.nanargmin(jitter["jitter"]))
+            summary["best_threshold"] = float(jitter["thresholds"][best])
+            summary["best_jitter_ns"] = float(jitter["jitter"][best] * 1e9)
+        else:
+            summary["best_threshold"] = summary["best_jitter_ns"] = None
+
+    if "walk" in results:
+        walk = results["walk"]
+        np.savetxt(
+            path("walk.csv"),
+            np.column_stack([walk["centers"] * 1e3, walk["counts"], walk["mean"] * 1e9, walk["rms"] * 1e9]),
+            delimiter=",", header="peak_mV,count,mean_ns,rms_ns", comments="",
+        )
+        populated = walk["counts"] > 1
+        fig = Figure()
+        ax = fig.subplots()
+        width = np.diff(walk["centers"][:2]) * 1e3 * 0.9 if len(walk["centers"]) > 1 else 1.0
+        ax.bar(walk["centers"][populated] * 1e3, walk["rms"][populated] * 1e9, width=width, edgecolor="k")
+        ax.set_xlabel("Peak Amplitude (mV)")
+        ax.set_ylabel(f"RMS Jitter at {walk['fraction']:.0%} (ns)")
+        ax.set_title("Jitter vs. Peak Amplitude")
+        ax.set_yscale("log")
+        ax.grid(axis="y")
+        _save_figure(fig, path("walk.png"))
+
+    if "overlay" in results:
+        overlay = results["overlay"]
+        fig = Figure(figsize=(15, 5))
+        ax1, ax2 = fig.subplots(1, 2)
+        if "time" in overlay:
+            draw_lines(ax1, overlay["time"], overlay["amplitude_mV"])
+            draw_lines(ax2, overlay["time"], overlay["normalized"])
+        else:
+            draw_persistence(ax1, overlay["amplitude_mV"])
+            draw_persistence(ax2, overlay["normalized"])
+        ax1.set_xlabel("Time (s)")
+        ax1.set_ylabel("Amplitude (mV)")
+        ax1.set_title("Original PMT Pulses")
+        ax1.grid()
+        ax2.set_xlabel("Time (s)")
+        ax2.set_ylabel("Normalized Amplitude")
+        ax2.set_title("Normalized PMT Pulses")
+        ax2.grid()
+        _save_figure(fig, path("overlay.png"))
+
+    with open(path("summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return written
+
+def analyze(
+    path: str,
+    output_dir: str,
+    analyses: Sequence[str] = ANALYSES,
+    pattern: str = "*.csv",
+    cache: Optional[ResultCache] = None,
+    **options
+) -> List[str]:
+    """Load a dataset once, run the analyses and write all results.
+
+    With a cache, results are looked up by the content of the input files
+    and the analysis options; on a hit the dataset is not parsed at all and
+    only the tables and plots are rewritten.
+
+    Args:
+        path: CSV directory or store directory
+        output_dir: Directory for the results
+        analyses: Any of "crossing", "jitter", "walk", "overlay"
+        pattern: Glob pattern for CSV files
+        cache: Optional result cache
+        **options: Passed to run_analyses
+
+    Returns:
+        List of the written file paths
+    """
+    def compute() -> Dict[str, Any]:
+        dataset = load_dataset(path, pattern)
+        console.print(f"[green]Loaded {len(dataset)} pulses from {path}")
+        return {"sources": dataset.sources, "results": run_analyses(dataset, analyses, **options)}
+
+    if cache is None:
+        computed = compute()
+    else:
+        files = dataset_files(path, pattern)
+        params = {"version": RESULTS_VERSION, "analyses": sorted(analyses), **options}
+        key = cache.key(files, params, namespace="analyze")
+        computed = cache.get(key)
+        if computed is None:
+            computed = compute()
+            cache.put(key, computed)
+        else:
+            console.print(f"[green]Using cached results for {path}")
+    written = write_results(computed["results"], computed["sources"], output_dir)
+    console.print(f"[green]Wrote {len(written)} files to {output_dir}")
+    return written
@@ -0,0 +1,164 @@
+"""Bootstrap confidence intervals for RMS jitter.
+
+Resamples are drawn as index matrices and reduced with array operations,
+in batches so memory stays bounded. Batches can be spread over a process
+pool; each batch gets its own child seed, so results depend only on the
+seed and not on the number of workers.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import numpy as np
+from rich.console import Console
+from .crossing import rms_jitter
+from .timewalk import binned_stats
+
+console = Console()
+
+@dataclass
+class JitterInterval:
+    """RMS jitter estimates with bootstrap confidence intervals."""
+
+    jitter: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    confidence: float
+    n_resamples: int
+
+def _resample_batch(args: Tuple[np.ndarray, int, np.random.SeedSequence]) -> np.ndarray:
+    values, n_resamples, seed = args
+    rng = np.random.default_rng(seed)
+    index = rng.integers(0, len(values), size=(n_resamples, len(values)))
+    return values[index].std(axis=1)
+
+def _percentile_interval(
+    columns: List[np.ndarray],
+    n_resamples: int,
+    confidence: float,
+    seed: Optional[int],
+    workers: int,
+    batch_size: Optional[int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    n_columns = len(columns)
+    if batch_size is None:
+        longest = max([len(values) for values in columns] + [1])
+        batch_size = max(1, min(n_resamples, (8 << 20) // longest))
+    sizes = [min(batch_size, n_resamples - lo) for lo in range(0, n_resamples, batch_size)]
+
+    # Every (column, batch) job has its own child seed, so the result does
+    # not depend on how jobs are spread over workers
+    jobs = []
+    owners = []
+    for c, column_seed in enumerate(np.random.SeedSequence(seed).spawn(n_columns)):
+        if len(columns[c]) < 2:
+            continue
+        for size, child in zip(sizes, column_seed.spawn(len(sizes))):
+            jobs.append((columns[c], size, child))
+            owners.append(c)
+
+    batches: Optional[List[np.ndarray]] = None
+    if workers > 1 and len(jobs) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                batches = list(pool.map(_resample_batch, jobs))
+        except (OSError, NotImplementedError, BrokenProcessPool) as e:
+            console.print(f"[yellow]Process pool unavailable ({e}), resampling serially")
+    if batches is None:
+        batches = [_resample_batch(job) for job in jobs]
+
+    resampled = np.full((n_resamples, n_columns), np.nan)
+    filled = np.zeros(n_columns, dtype=int)
+    for c, batch in zip(owners, batches):
+        resampled[filled[c]:filled[c] + len(batch), c] = batch
+        filled[c] += len(batch)
+
+    tail = (1.0 - confidence) / 2 * 100
+    lower, upper = np.full(n_columns, np.nan), np.full(n_columns, np.nan)
+    done = filled > 0
+    if done.any():
+        lower[done], upper[done] = np.percentile(resampled[:, done], [tail, 100 - tail], axis=0)
+    return lower, upper
+
+def bootstrap_jitter(
+    times: np.ndarray,
+    n_resamples: int = 2000,
+    confidence: float = 0.95,
+    seed: Optional[int] = None,
+    workers: int = 1,
+    batch_size: Optional[int] = None
+) -> JitterInterval:
+    """Percentile bootstrap confidence intervals for RMS jitter.
+
+    Each column is resampled over the pulses that crossed it; columns with
+    fewer than two crossings get NaN bounds.
+
+    Args:
+        times: N x T crossing times (e.g. one column per threshold), NaN
+            for pulses that did not cross; a 1-D array is one column
+        n_resamples: Number of bootstrap resamples
+        confidence: Two-sided confidence level (default: 0.95)
+        seed: Seed of the random generator, for reproducible intervals
+        workers: Worker processes; 1 runs in this process
+        batch_size: Resamples per batch (default: ~64 MB of indices)
+
+    Returns:
+        JitterInterval: Jitter per column with lower/upper bounds in seconds
+    """
+    times = np.asarray(times, dtype=np.float64)
+    if times.ndim == 1:
+        times = times[:, None]
+    columns = [column[~np.isnan(column)] for column in times.T]
+    lower, upper = _percentile_interval(columns, n_resamples, confidence, seed, workers, batch_size)
+    return JitterInterval(
+        jitter=rms_jitter(times),
+        lower=lower,
+        upper=upper,
+        confidence=confidence,
+        n_resamples=n_resamples,
+    )
+
+def bootstrap_binned_jitter(
+    amplitudes: np.ndarray,
+    times: np.ndarray,
+    bin_width: float,
+    n_resamples: int = 2000,
+    confidence: float = 0.95,
+    seed: Optional[int] = None,
+    workers: int = 1,
+    batch_size: Optional[int] = None
+) -> Tuple[np.ndarray, JitterInterval]:
+    """Bootstrap jitter intervals per amplitude bin.
+
+    Args:
+        amplitudes: Length-N pulse amplitudes
+        times: Length-N crossing times in seconds
+        bin_width: Amplitude bin width
+        n_resamples: Number of bootstrap resamples
+        confidence: Two-sided confidence level (default: 0.95)
+        seed: Seed of the random generator, for reproducible intervals
+        workers: Worker processes; 1 runs in this process
+        batch_size: Resamples per batch (default: ~64 MB of indices)
+
+    Returns:
+        Tuple of (bin centers, JitterInterval with one entry per bin)
+    """
+    amplitudes = np.asarray(amplitudes, dtype=np.float64)
+    times = np.asarray(times, dtype=np.float64)
+    stats = binned_stats(amplitudes, times, bin_width=bin_width)
+    valid = ~(np.isnan(amplitudes) | np.isnan(times))
+    index = np.digitize(amplitudes[valid], stats.edges) - 1
+    order = np.argsort(index, kind="stable")
+    bounds = np.searchsorted(index[order], np.arange(len(stats.counts) + 1))
+    sorted_times = times[valid][order]
+    columns = [sorted_times[bounds[b]:bounds[b + 1]] for b in range(len(stats.counts))]
+
+    lower, upper = _percentile_interval(columns, n_resamples, confidence, seed, workers, batch_size)
+    return stats.centers, JitterInterval(
+        jitter=stats.rms,
+        lower=lower,
+        upper=upper,
+        confidence=confidence,
+        n_resamples=n_resamples,
+    )
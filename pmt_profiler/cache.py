@@ -0,0 +1,235 @@
+"""Content-addressed on-disk cache for analysis results.
+
+Entries are keyed by the SHA-256 of every input file's content plus the
+analysis parameters, so editing or replacing a source CSV changes the key
+and stale results are never returned. File hashes are remembered by path,
+size and modification time, so unchanged inputs are not re-read on every
+lookup. The cache is capped in size; the least recently used entries are
+evicted first.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from typing import Any, Callable, Dict, Optional, Sequence
+import numpy as np
+
+ENTRY_SUFFIX = ".pkl"
+HASH_INDEX = "file_hashes.json"
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
+
+def hash_file(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's content.
+
+    Args:
+        path: File to hash
+        block_size: Bytes read at a time
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ResultCache:
+    """Size-capped LRU cache of pickled results in a directory."""
+
+    def __init__(self, cache_dir: str, max_bytes: int = 1 << 30):
+        """Open or create a cache.
+
+        Args:
+            cache_dir: Directory holding the cache entries
+            max_bytes: Total size of entries kept (default: 1 GiB)
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._hashes: Optional[Dict[str, Any]] = None
+        self._hashes_changed = False
+
+    def _file_hashes(self) -> Dict[str, Any]:
+        if self._hashes is None:
+            try:
+                with open(os.path.join(self.cache_dir, HASH_INDEX), "r") as f:
+                    self._hashes = json.load(f)
+            except (OSError, ValueError):
+                self._hashes = {}
+        return self._hashes
+
+    def file_hash(self, path: str) -> str:
+        """Content hash of a file, reused while its size and mtime are unchanged.
+
+        Args:
+            path: File to hash
+
+        Returns:
+            str: Hex digest of the content
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        known = self._file_hashes().get(path)
+        if known is not None and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            return known["sha256"]
+        digest = hash_file(path)
+        self._hashes[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+        self._hashes_changed = True
+        return digest
+
+    def _save_hashes(self) -> None:
+        if self._hashes_changed:
+            self._write_atomic(HASH_INDEX, json.dumps(self._hashes).encode())
+            self._hashes_changed = False
+
+    def key(self, files: Sequence[str], params: Dict[str, Any], namespace: str = "") -> str:
+        """Cache key of an analysis over some input files.
+
+        Args:
+            files: Input files; their order matters
+            params: Analysis parameters (arrays are allowed)
+            namespace: Name of the analysis, to keep different analyses apart
+
+        Returns:
+            str: Hex digest identifying the result
+        """
+        payload = json.dumps(
+            {
+                "namespace": namespace,
+                "files": [self.file_hash(path) for path in files],
+                "params": _jsonable(params),
+            },
+            sort_keys=True,
+        )
+        self._save_hashes()
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ENTRY_SUFFIX)
+
+    def _write_atomic(self, name: str, data: bytes) -> None:
+        # Write to a temporary file first so readers never see partial entries
+        fd, temporary = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temporary, os.path.join(self.cache_dir, name))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached result, or None on a miss.
+
+        Args:
+            key: Key from key()
+
+        Returns:
+            The stored result, or None
+        """
+        path = self._entry(key)
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Truncated, corrupt or written by code that no longer exists
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        # Mark the entry as recently used
+        os.utime(path)
+        return result
+
+    def put(self, key: str, result: Any) -> None:
+        """Store a result and evict old entries beyond the size cap.
+
+        Args:
+            key: Key from key()
+            result: Picklable result
+        """
+        self._write_atomic(key + ENTRY_SUFFIX, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+        self.evict()
+
+    def get_or_compute(
+        self,
+        files: Sequence[str],
+        params: Dict[str, Any],
+        compute: Callable[[], Any],
+        namespace: str = ""
+    ) -> Any:
+        """Return the cached result for these inputs, computing it on a miss.
+
+        Args:
+            files: Input files of the analysis
+            params: Analysis parameters
+            compute: Called without arguments to produce the result
+            namespace: Name of the analysis
+
+        Returns:
+            The cached or freshly computed result
+        """
+        key = self.key(files, params, namespace)
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            self.put(key, result)
+        return result
+
+    def entries(self) -> Dict[str, os.stat_result]:
+        """Stat of every cache entry by key."""
+        stats = {}
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(ENTRY_SUFFIX):
+                stats[name[:-len(ENTRY_SUFFIX)]] = os.stat(os.path.join(self.cache_dir, name))
+        return stats
+
+    def size(self) -> int:
+        """Total bytes of all cache entries."""
+        return sum(stat.st_size for stat in self.entries().values())
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits its cap.
+
+        Returns:
+            int: Number of entries deleted
+        """
+        entries = sorted(self.entries().items(), key=lambda item: item[1].st_mtime_ns)
+        total = sum(stat.st_size for _, stat in entries)
+        removed = 0
+        for key, stat in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._entry(key))
+            except FileNotFoundError:
+                pass
+            total -= stat.st_size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        """Delete all entries and remembered file hashes."""
+        for key in self.entries():
+            os.remove(self._entry(key))
+        self._hashes = {}
+        self._hashes_changed = False
+        index = os.path.join(self.cache_dir, HASH_INDEX)
+        if os.path.exists(index):
+            os.remove(index)
@@ -0,0 +1,151 @@
+"""Batched digital constant-fraction discrimination (CFD).
+
+The CFD signal of a pulse x is ``x(t - delay) - fraction * x(t)``. Its zero
+crossing after the negative lobe on the leading edge marks the time at
+which the pulse reaches a fixed fraction of its own shape, independent of
+amplitude. All pulses of an N x L array, and all fraction settings of a
+sweep, are processed together; the zero crossing is interpolated with
+crossing_indices.
+"""
+
+from typing import Sequence
+import numpy as np
+from .crossing import ArrayLike, crossing_indices
+
+def _uniform_interval(sample_interval: ArrayLike) -> float:
+    intervals = np.atleast_1d(np.asarray(sample_interval, dtype=np.float64))
+    if not np.allclose(intervals, intervals[0], rtol=1e-6, atol=0):
+        raise ValueError("CFD requires the same sample interval for all pulses")
+    return float(intervals[0])
+
+def delay_signal(signal: np.ndarray, delay_samples: float) -> np.ndarray:
+    """Delay each row by a possibly fractional number of samples.
+
+    Samples shifted in at the start repeat the first sample (the baseline);
+    fractional delays are linearly interpolated.
+
+    Args:
+        signal: N x L array
+        delay_samples: Delay in samples, at least 0
+
+    Returns:
+        np.ndarray: Delayed N x L array
+    """
+    if delay_samples < 0:
+        raise ValueError("delay must not be negative")
+    length = signal.shape[1]
+    whole = int(np.floor(delay_samples))
+    fraction = delay_samples - whole
+
+    def shift(k: int) -> np.ndarray:
+        k = min(k, length)
+        return np.concatenate([np.repeat(signal[:, :1], k, axis=1), signal[:, :length - k]], axis=1)
+
+    delayed = shift(whole)
+    if fraction > 0:
+        delayed = (1.0 - fraction) * delayed + fraction * shift(whole + 1)
+    return delayed
+
+def _zero_crossing_after_minimum(cfd: np.ndarray, peak: np.ndarray) -> np.ndarray:
+    # The negative lobe is searched only up to the pulse peak, so noise
+    # after the pulse cannot be mistaken for it
+    length = cfd.shape[1]
+    samples = np.arange(length)[None, :]
+    lobe = np.argmin(np.where(samples <= peak[:, None], cfd, np.inf), axis=1)
+    floor = cfd[np.arange(len(cfd)), lobe][:, None]
+    masked = np.where(samples < lobe[:, None], floor, cfd)
+    return crossing_indices(masked, np.zeros((len(cfd), 1)))[:, 0]
+
+def cfd_times(
+    amplitude: np.ndarray,
+    fraction: float,
+    delay: float,
+    sample_interval: ArrayLike,
+    t0: ArrayLike = 0.0,
+    polarity: int = -1,
+    arm_fraction: float = 0.1,
+    block_size: int = 4096
+) -> np.ndarray:
+    """Compute CFD pickoff times for a batch of pulses.
+
+    Args:
+        amplitude: N x L array of pulses
+        fraction: Attenuation of the undelayed pulse, between 0 and 1
+        delay: CFD delay in seconds
+        sample_interval: Sample interval in seconds, the same for all pulses
+        t0: Time of the first sample in seconds, scalar or per pulse
+        polarity: -1 for negative-going pulses (PMT anode), +1 for positive
+        arm_fraction: Fraction of the peak at which the CFD is armed
+        block_size: Pulses processed per block to bound memory
+
+    Returns:
+        np.ndarray: Length-N CFD times in seconds, NaN where no zero crossing
+        follows the negative lobe
+    """
+    return cfd_sweep(
+        amplitude, [fraction], [delay], sample_interval, t0, polarity, arm_fraction, block_size
+    )[:, 0, 0]
+
+def cfd_sweep(
+    amplitude: np.ndarray,
+    fractions: Sequence[float],
+    delays: Sequence[float],
+    sample_interval: ArrayLike,
+    t0: ArrayLike = 0.0,
+    polarity: int = -1,
+    arm_fraction: float = 0.1,
+    block_size: int = 4096
+) -> np.ndarray:
+    """Compute CFD times over a grid of fraction and delay settings.
+
+    Each delay is applied once per block of pulses; all fractions for that
+    delay are evaluated in a single array operation over a window around
+    each pulse's leading edge. The jitter of every
+    setting is ``rms_jitter(times)``, an F x D grid.
+
+    Args:
+        amplitude: N x L array of pulses
+        fractions: Length-F sequence of CFD fractions
+        delays: Length-D sequence of CFD delays in seconds
+        sample_interval: Sample interval in seconds, the same for all pulses
+        t0: Time of the first sample in seconds, scalar or per pulse
+        polarity: -1 for negative-going pulses (PMT anode), +1 for positive
+        arm_fraction: Fraction of the peak at which the CFD is armed
+        block_size: Pulses processed per block
+
+    Returns:
+        np.ndarray: N x F x D CFD times in seconds
+    """
+    amplitude = np.atleast_2d(amplitude)
+    fractions = np.asarray(fractions, dtype=np.float64)
+    delays = np.asarray(delays, dtype=np.float64)
+    n_pulses, length = amplitude.shape
+    dt = _uniform_interval(sample_interval)
+    start = np.broadcast_to(np.asarray(t0, dtype=np.float64), (n_pulses,))
+
+    times = np.empty((n_pulses, len(fractions), len(delays)))
+    for lo in range(0, n_pulses, block_size):
+        hi = min(lo + block_size, n_pulses)
+        signal = polarity * np.asarray(amplitude[lo:hi], dtype=np.float64)
+        rows = np.arange(hi - lo)
+        peak = np.argmax(signal, axis=1)
+        level = signal[rows, peak] * arm_fraction
+
+        # Arm just after the last sample below the arming level ahead of the
+        # peak, i.e. at the foot of the leading edge
+        below = (signal < level[:, None]) & (np.arange(length)[None, :] < peak[:, None])
+        arm = np.where(below.any(axis=1), length - np.argmax(below[:, ::-1], axis=1), 0)
+
+        # The zero crossing lies between the arming sample and one delay
+        # after the peak, so only that window of each pulse is processed
+        width = int((peak - arm).max()) + int(np.ceil(delays.max() / dt)) + 2
+        window = np.minimum(arm[:, None] + np.arange(width)[None, :], length - 1)
+        edge = np.take_along_axis(signal, window, axis=1)
+        edge_peak = np.repeat(peak - arm, len(fractions))
+        for d, delay in enumerate(delays):
+            delayed = np.take_along_axis(delay_signal(signal, delay / dt), window, axis=1)
+            cfd = delayed[:, None, :] - fractions[None, :, None] * edge[:, None, :]
+            index = _zero_crossing_after_minimum(cfd.reshape(-1, width), edge_peak)
+            index = arm[:, None] + index.reshape(hi - lo, -1)
+            times[lo:hi, :, d] = start[lo:hi, None] + index * dt
+    return times
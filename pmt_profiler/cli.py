@@ -1,12 +1,11 @@
 """Command-line interface for PMT Profiler analysis."""
 
 import argparse
+import sys
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.text import Text
-from .core import MockMicroManager, MicroManager
-from .pmt import start_PMT, stop_PMT
 
 console = Console()
 
@@ -96,6 +95,28 @@ def get_DCC_DCU_properties(mmc, detailed=False):
         console.print(hub_table)
         console.print()
 
+def run_analyze(args):
+    """Run the analyze subcommand."""
+    import numpy as np
+    from .analyze import analyze
+    from .cache import ResultCache
+    try:
+        cache = ResultCache(args.cache_dir, args.cache_size << 20) if args.cache_dir else None
+        analyze(
+            args.path,
+            args.output,
+            analyses=args.analyses,
+            pattern=args.pattern,
+            cache=cache,
+            thresholds=np.linspace(0.1, 1.0, args.n_thresholds),
+            walk_fraction=args.walk_fraction,
+            bin_width=args.bin_width * 1e-3,
+            baseline_samples=args.baseline_samples,
+        )
+    except Exception as e:
+        console.print(f"[red]Error: {e}")
+        sys.exit(1)
+
 def main():
     parser = argparse.ArgumentParser(
         description="PMT Profiler Tool using BH-DCC and Swabian-TTU",
@@ -110,6 +131,9 @@ Examples:
   
   Run in mock mode (no hardware required):
     python -m pmt_profiler.cli --mock --pmt start --gain 65
+
+  Analyze a pulse directory (jitter, walk and overlay in one pass):
+    python -m pmt_profiler.cli analyze "PMT CSV Files" --output analysis
         """
     )
     
@@ -157,9 +181,78 @@ Examples:
         help='Show detailed device information including adapters and DCCHub'
     )
     
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    analyze_parser = subparsers.add_parser(
+        'analyze',
+        help='Run pulse analyses on a CSV directory or waveform store'
+    )
+    analyze_parser.add_argument(
+        'path',
+        nargs='?',
+        default='PMT CSV Files',
+        help='Directory of waveform CSVs or a packed waveform store (default: "PMT CSV Files")'
+    )
+    analyze_parser.add_argument(
+        '--analyses',
+        nargs='+',
+        choices=['crossing', 'jitter', 'walk', 'overlay'],
+        default=['crossing', 'jitter', 'walk', 'overlay'],
+        help='Analyses to run (default: all)'
+    )
+    analyze_parser.add_argument('--output', default='analysis', help='Output directory (default: analysis)')
+    analyze_parser.add_argument('--pattern', default='*.csv', help='CSV file glob (default: *.csv)')
+    analyze_parser.add_argument(
+        '--n-thresholds',
+        type=int,
+        default=50,
+        help='Number of thresholds from 10%% to 100%% of the peak (default: 50)'
+    )
+    analyze_parser.add_argument(
+        '--walk-fraction',
+        type=float,
+        default=0.5,
+        help='Relative threshold of the walk analysis (default: 0.5)'
+    )
+    analyze_parser.add_argument(
+        '--bin-width',
+        type=float,
+        default=20.0,
+        help='Peak amplitude bin width of the walk analysis in mV (default: 20)'
+    )
+    analyze_parser.add_argument(
+        '--baseline-samples',
+        type=int,
+        default=100,
+        help='Leading samples used for baseline subtraction (default: 100)'
+    )
+    analyze_parser.add_argument(
+        '--cache-dir',
+        help='Reuse results for unchanged inputs and options from this cache directory'
+    )
+    analyze_parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=1024,
+        help='Cache size limit in MB; least recently used results are evicted (default: 1024)'
+    )
+
     # Parse arguments
     args = parser.parse_args()
+
+    # Analyses work on recorded data and need no hardware
+    if args.command == 'analyze':
+        run_analyze(args)
+        return
     
+    if not args.info and args.pmt is None:
+        # Nothing to do, so don't load the hardware stack just to show help
+        parser.print_help()
+        return
+
+    # Hardware backends are imported only when a hardware action is requested
+    from .core import MockMicroManager, MicroManager
+    from .pmt import start_PMT, stop_PMT
+
     # Initialize Micro-Manager - always use mock if --mock flag is provided
     try:
         mmc = MockMicroManager() if args.mock else MicroManager()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+"""Parallel batch ingestion of MDO32 waveform CSV exports."""
+
+import csv
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from rich.console import Console
+from .waveform import WaveformHeader, read_waveform
+
+console = Console()
+
+Extractor = Callable[[WaveformHeader, np.ndarray, np.ndarray], Dict[str, Any]]
+
+def basic_features(header: WaveformHeader, time: np.ndarray, amplitude: np.ndarray) -> Dict[str, Any]:
+    """Extract peak amplitude and peak time of a negative-going pulse.
+
+    Args:
+        header: Waveform metadata
+        time: Sample times in seconds
+        amplitude: Samples in volts
+
+    Returns:
+        Dict with peak_amplitude (V) and peak_time (s)
+    """
+    peak = int(np.argmin(amplitude))
+    return {
+        "peak_amplitude": float(amplitude[peak]),
+        "peak_time": float(time[peak]),
+    }
+
+@dataclass
+class IngestResult:
+    """Per-file results of a batch ingest, in input file order."""
+
+    files: List[str]
+    records: List[Optional[Dict[str, Any]]]
+    elapsed: float
+    workers: int
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def files_per_second(self) -> float:
+        """Ingest throughput in files per second."""
+        return len(self.files) / self.elapsed if self.elapsed > 0 else float("inf")
+
+def _ingest_one(args: Tuple[str, Extractor]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    path, extract = args
+    try:
+        header, t, amplitude = read_waveform(path)
+        return extract(header, t, amplitude), None
+    except Exception as e:
+        return None, str(e)
+
+def _default_workers() -> int:
+    return os.cpu_count() or 1
+
+def ingest_files(
+    files: Sequence[str],
+    extract: Extractor = basic_features,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None
+) -> IngestResult:
+    """Parse waveform files and extract per-pulse features on a process pool.
+
+    Results are returned in the order of ``files``. Files that fail to parse
+    get a ``None`` record and an entry in ``errors``. With ``workers`` set to
+    0 or 1, or if the pool cannot be started, files are processed serially.
+
+    Args:
+        files: Paths of the waveform CSVs
+        extract: Picklable (module-level) function mapping
+            (header, time, amplitude) to a dict of features
+        workers: Number of worker processes (default: all cores)
+        chunksize: Files handed to a worker at a time (default: automatic)
+
+    Returns:
+        IngestResult: Records, errors and throughput
+    """
+    files = list(files)
+    workers = _default_workers() if workers is None else workers
+    workers = max(1, min(workers, len(files)))
+    jobs = [(path, extract) for path in files]
+
+    start = time.perf_counter()
+    outputs = None
+    if workers > 1:
+        if chunksize is None:
+            chunksize = max(1, len(files) // (workers * 16))
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                outputs = list(pool.map(_ingest_one, jobs, chunksize=chunksize))
+        except (OSError, NotImplementedError, BrokenProcessPool) as e:
+            console.print(f"[yellow]Process pool unavailable ({e}), ingesting serially")
+            workers = 1
+    if outputs is None:
+        workers = 1
+        outputs = [_ingest_one(job) for job in jobs]
+    elapsed = time.perf_counter() - start
+
+    records = [record for record, _ in outputs]
+    errors = [(path, error) for path, (_, error) in zip(files, outputs) if error is not None]
+    return IngestResult(files=files, records=records, elapsed=elapsed, workers=workers, errors=errors)
+
+def ingest_directory(directory: str, pattern: str = "*.csv", **kwargs) -> IngestResult:
+    """Ingest all waveform CSVs in a directory, sorted by file name.
+
+    Args:
+        directory: Directory containing the CSV exports
+        pattern: Glob pattern for the CSV files (default: *.csv)
+        **kwargs: Passed on to ingest_files
+
+    Returns:
+        IngestResult: Records, errors and throughput
+    """
+    files = sorted(glob.glob(os.path.join(directory, pattern)))
+    return ingest_files(files, **kwargs)
+
+def write_records(result: IngestResult, filename: str) -> None:
+    """Write ingest records to a CSV file, one row per source file.
+
+    Args:
+        result: Result of ingest_files
+        filename: Output CSV path
+    """
+    columns = []
+    for record in result.records:
+        for key in record or {}:
+            if key not in columns:
+                columns.append(key)
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["source"] + columns)
+        for path, record in zip(result.files, result.records):
+            record = record or {}
+            writer.writerow([os.path.basename(path)] + [record.get(c, "") for c in columns])
+
+def main():
+    """Main function to run a batch ingest."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Ingest a directory of waveform CSVs in parallel")
+    parser.add_argument("directory", help="Directory containing the waveform CSV files")
+    parser.add_argument("--pattern", default="*.csv", help="File glob (default: *.csv)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes, 1 for serial (default: all cores)")
+    parser.add_argument("--output", help="CSV file for the per-pulse features")
+    args = parser.parse_args()
+
+    try:
+        result = ingest_directory(args.directory, args.pattern, workers=args.workers)
+        for path, error in result.errors:
+            console.print(f"[yellow]Failed to ingest {path}: {error}")
+        console.print(
+            f"[green]Ingested {len(result.files)} files in {result.elapsed:.2f} s "
+            f"({result.files_per_second:.1f} files/s, {result.workers} workers)"
+        )
+        if args.output:
+            write_records(result, args.output)
+            console.print(f"[green]Features saved to {args.output}")
+    except Exception as e:
+        console.print(f"[red]Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,32 @@
 #!/usr/bin/env python
 """Module to control Tektronix MDO32 oscilloscope using tm_devices."""
 
+from __future__ import annotations
+
+import atexit
 import os
+import re
 import sys
 import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
 from datetime import datetime
-from tm_devices import DeviceManager
-from tm_devices.drivers.pi.mdo.mdo3k import MDO3K
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 from rich.console import Console
 from rich.progress import Progress
+from rich.table import Table
+
+if TYPE_CHECKING:
+    import numpy as np
+    from tm_devices.drivers import MDO3K
 
 console = Console()
 
+def _device_manager():
+    # tm_devices takes seconds to import, so it is loaded on first use
+    from tm_devices import DeviceManager
+    return DeviceManager()
+
 def connect_to_oscilloscope(ip_address: str = None) -> MDO3K:
     """Connect to the MDO32 oscilloscope.
     
@@ -22,7 +37,7 @@ def connect_to_oscilloscope(ip_address: str = None) -> MDO3K:
         MDO3K: Connected oscilloscope instance
     """
     # Create device manager
-    dm = DeviceManager()
+    dm = _device_manager()
     
     # Connect to the oscilloscope
     if ip_address:
@@ -51,28 +66,328 @@ def load_settings(scope: MDO3K, settings_file: str) -> None:
     scope.commands.recall.setup.write(f'"{settings_file}"')
     console.print("[green]Settings loaded successfully")
 
-def capture_waveform(scope: MDO3K, channel: int = 1) -> None:
+# Queries whose answers only change when settings change
+CACHED_QUERIES = ("*IDN?", "WFMOutpre?", "HORizontal:RECOrdlength?")
+
+# Commands that trigger actions rather than set a value; never skipped.
+# Starting an acquisition leaves the settings as they are; the others
+# (*RST, RECall:SETUp, ...) may change any of them.
+ACQUISITION_COMMAND = re.compile(r"^ACQ(UIRE)?:STATE$")
+ACTION_COMMANDS = re.compile(r"^(\*|ACQ(UIRE)?:STATE$|RECA(LL)?:|.*:EXP(ORT)?$)")
+
+# Arguments that trigger an action (e.g. MEASUrement:STATIstics RESET)
+ACTION_ARGUMENTS = ("RESET", "RESE", "CLEAR", "CLEA", "EXECUTE", "EXEC")
+
+def _header_key(header: str) -> str:
+    # SCPI accepts each node in long or short form; the short form is the
+    # upper-case part of a mixed-case mnemonic (DATa -> DAT). All-caps
+    # spellings are ambiguous and kept as sent.
+    nodes = []
+    for node in header.strip().lstrip(":").split(":"):
+        if node.isupper() or node.islower():
+            nodes.append(node.upper())
+        else:
+            nodes.append("".join(c for c in node if not c.islower()))
+    return ":".join(nodes)
+
+def _same_node(a: str, b: str) -> bool:
+    # Whether two header keys may name the same node: every mnemonic of one
+    # starts with the other's, and numeric suffixes (CH1, MEAS2) agree
+    nodes_a, nodes_b = a.split(":"), b.split(":")
+    if len(nodes_a) != len(nodes_b):
+        return False
+    for node_a, node_b in zip(nodes_a, nodes_b):
+        name_a, suffix_a = re.match(r"^(.*?)(\d*\??)$", node_a).groups()
+        name_b, suffix_b = re.match(r"^(.*?)(\d*\??)$", node_b).groups()
+        if suffix_a != suffix_b or not (name_a.startswith(name_b) or name_b.startswith(name_a)):
+            return False
+    return True
+
+def _is_action(key: str, argument: str) -> bool:
+    # Commands without a value, or with an action argument, must always be sent
+    return not argument or bool(ACTION_COMMANDS.match(key)) or argument.upper() in ACTION_ARGUMENTS
+
+class ScopeSession:
+    """Long-lived scope connection that avoids redundant round trips.
+
+    A session can be passed wherever a scope is expected. It keeps one
+    connection open, skips setup recalls of a file whose content was just
+    recalled, skips writes that set a value it has already set, and answers
+    repeated static queries (identity, record length, preamble) from a cache
+    that is cleared whenever a setting actually changes.
+
+    Settings changed outside the session (e.g. on the front panel) are not
+    seen; call invalidate() after such changes.
+    """
+
+    def __init__(self, ip_address: Optional[str] = None, scope: Optional[MDO3K] = None):
+        """Initialize a session.
+
+        Args:
+            ip_address: IP address of the oscilloscope (default: first found)
+            scope: Already connected scope to wrap instead of connecting
+        """
+        self.ip_address = ip_address
+        self._scope = scope
+        self.settings_hash: Optional[str] = None
+        self._values: Dict[str, str] = {}
+        self._cache: Dict[str, str] = {}
+        self._commands: Any = None
+        self.skipped_writes = 0
+        self.cache_hits = 0
+
+    @property
+    def scope(self) -> MDO3K:
+        """Connected scope, connecting on first use."""
+        if self._scope is None:
+            self._scope = connect_to_oscilloscope(self.ip_address)
+        return self._scope
+
+    @property
+    def connected(self) -> bool:
+        """Whether the session holds an open connection."""
+        return self._scope is not None
+
+    @property
+    def commands(self) -> Any:
+        """Command tree of the scope that sends through the session.
+
+        Writes and queries made through the tree go through write() and
+        query(), so they are skipped, cached and invalidate like SCPI strings.
+        """
+        if self._commands is None:
+            # tm_devices command trees are built around the device they send to
+            self._commands = type(self.scope.commands)(self)
+        return self._commands
+
+    def __getattr__(self, name: str):
+        # Anything not handled here (commands, model, visa_resource, ...) goes to the scope
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.scope, name)
+
+    def _forget(self) -> None:
+        # The scope may no longer match the last recalled setup either
+        self.settings_hash = None
+        self._values.clear()
+        self._cache.clear()
+
+    def invalidate(self) -> None:
+        """Forget remembered settings, cached answers and the recalled setup."""
+        self._forget()
+
+    def write(self, command: str, *args, **kwargs) -> None:
+        """Send a command unless it sets a value that is already set."""
+        header, _, argument = command.strip().partition(" ")
+        key = _header_key(header)
+        argument = argument.strip()
+        if ";" in command or _is_action(key, argument):
+            self.scope.write(command, *args, **kwargs)
+            if not ACQUISITION_COMMAND.match(key):
+                self._forget()
+            return
+        # Another spelling of the same setting may hold an outdated value
+        for other in [k for k in self._values if k != key and _same_node(k, key)]:
+            del self._values[other]
+        if self._values.get(key) == argument:
+            self.skipped_writes += 1
+            return
+        self.scope.write(command, *args, **kwargs)
+        self.settings_hash = None
+        self._values[key] = argument
+        self._cache.clear()
+
+    def query(self, query: str, *args, **kwargs) -> str:
+        """Send a query, answering static queries from the cache."""
+        header, _, argument = query.strip().partition(" ")
+        key = _header_key(header)
+        cached = [q for q in CACHED_QUERIES if _same_node(key, _header_key(q))]
+        if argument or not cached:
+            return self.scope.query(query, *args, **kwargs)
+        # All spellings of a cached query share one entry
+        key = cached[0]
+        if key in self._cache:
+            self.cache_hits += 1
+            return self._cache[key]
+        self._cache[key] = self.scope.query(query, *args, **kwargs)
+        return self._cache[key]
+
+    def query_raw_binary(self, query: str, *args, **kwargs) -> bytes:
+        """Send a query and return the raw response bytes."""
+        return self.scope.query_raw_binary(query, *args, **kwargs)
+
+    @property
+    def identity(self) -> str:
+        """Cached *IDN? response (maker, model, serial, firmware)."""
+        return self.query("*IDN?")
+
+    def load_settings(self, settings_file: str, force: bool = False) -> bool:
+        """Recall a setup file unless it is still the last one recalled.
+
+        A recall is skipped only if no setting has been written, and no reset
+        or other recall sent, since the same file content was last recalled.
+
+        Args:
+            settings_file: Path to the settings file
+            force: Recall even if the file is unchanged
+
+        Returns:
+            bool: True if the setup was recalled, False if skipped
+        """
+        if not os.path.exists(settings_file):
+            raise FileNotFoundError(f"Settings file not found: {settings_file}")
+        from .cache import hash_file
+        digest = hash_file(settings_file)
+        if not force and digest == self.settings_hash:
+            console.print(f"[green]Settings from {settings_file} already loaded")
+            return False
+        self.invalidate()
+        load_settings(self.scope, settings_file)
+        self.settings_hash = digest
+        return True
+
+    def close(self) -> None:
+        """Close the connection; the next use reconnects."""
+        if self._scope is not None:
+            self._scope.close()
+            self._scope = None
+            self._commands = None
+        self.invalidate()
+        if _SESSIONS.get(self.ip_address) is self:
+            del _SESSIONS[self.ip_address]
+
+_SESSIONS: Dict[Optional[str], ScopeSession] = {}
+
+def open_session(ip_address: Optional[str] = None) -> ScopeSession:
+    """Return the open session for a scope, creating it on first use.
+
+    Scripts that call capture functions or CLI entry points repeatedly in
+    one process share the connection, remembered settings and caches.
+
+    Args:
+        ip_address: IP address of the oscilloscope (default: first found)
+
+    Returns:
+        ScopeSession: Shared session for this address
+    """
+    if ip_address not in _SESSIONS:
+        _SESSIONS[ip_address] = ScopeSession(ip_address)
+    return _SESSIONS[ip_address]
+
+def close_sessions() -> None:
+    """Close all sessions opened with open_session."""
+    for session in list(_SESSIONS.values()):
+        if session.connected:
+            session.close()
+            console.print("[green]Oscilloscope connection closed")
+        else:
+            session.close()
+
+atexit.register(close_sessions)
+
+COMPLETION_METHODS = ("opc", "poll")
+
+# VISA status code of an I/O timeout (pyvisa's VI_ERROR_TMO)
+VI_ERROR_TMO = -1073807339
+
+@dataclass
+class Completion:
+    """How long waiting for an acquisition took, as seen by the host."""
+
+    method: str
+    elapsed: float
+    queries: int
+
+@contextmanager
+def _visa_timeout(scope: MDO3K, seconds: float):
+    # Set the VISA I/O timeout so a blocking query can outlast the acquisition
+    resource = getattr(scope, "visa_resource", None)
+    previous = getattr(resource, "timeout", None)
+    if not isinstance(previous, (int, float)):
+        yield
+        return
+    resource.timeout = seconds * 1000.0
+    try:
+        yield
+    finally:
+        resource.timeout = previous
+
+def wait_for_acquisition(
+    scope: MDO3K,
+    timeout: float = 10.0,
+    method: str = "opc",
+    min_interval: float = 1e-3,
+    max_interval: float = 0.05
+) -> Completion:
+    """Block until a single-sequence acquisition has completed.
+
+    With "opc" a single *OPC? query blocks until the scope finishes the
+    acquisition, so completion is seen one round trip after it happens and
+    the scope is not flooded with queries. "poll" queries ACQuire:STATE? with
+    a delay that starts at min_interval and doubles up to max_interval, for
+    connections where long blocking queries are not possible.
+
+    Args:
+        scope: MDO3K oscilloscope instance
+        timeout: Seconds to wait before raising TimeoutError
+        method: "opc" or "poll"
+        min_interval: First polling delay in seconds
+        max_interval: Longest polling delay in seconds
+
+    Returns:
+        Completion: Time until completion was observed and queries sent
+    """
+    if method not in COMPLETION_METHODS:
+        raise ValueError(f"Unknown completion method '{method}', expected one of {COMPLETION_METHODS}")
+    start = time.perf_counter()
+    if method == "opc":
+        try:
+            with _visa_timeout(scope, timeout):
+                response = scope.query("*OPC?")
+        except Exception as e:
+            if getattr(e, "error_code", None) == VI_ERROR_TMO:
+                raise TimeoutError(f"Acquisition did not complete within {timeout} s") from e
+            raise
+        if response.strip() != "1":
+            raise RuntimeError(f"Unexpected *OPC? response: {response!r}")
+        return Completion(method, time.perf_counter() - start, 1)
+
+    deadline = start + timeout
+    interval, queries = min_interval, 0
+    while True:
+        queries += 1
+        if scope.query("ACQuire:STATE?").strip() in ("0", "STOP"):
+            return Completion(method, time.perf_counter() - start, queries)
+        if time.perf_counter() + interval > deadline:
+            raise TimeoutError(f"Acquisition did not complete within {timeout} s")
+        time.sleep(interval)
+        interval = min(interval * 2, max_interval)
+
+def capture_waveform(scope: MDO3K, channel: int = 1, timeout: float = 10.0, method: str = "opc") -> Completion:
     """Capture a waveform from the specified channel.
     
     Args:
         scope: MDO3K oscilloscope instance
         channel: Channel number to capture
+        timeout: Seconds to wait for the acquisition
+        method: Completion method, "opc" or "poll" (see wait_for_acquisition)
+        
+    Returns:
+        Completion: Time until the acquisition was seen to complete
     """
     console.print(f"[cyan]Capturing waveform from channel {channel}...")
     
-    # Set up acquisition
-    scope.commands.acquire.state.write("RUN")
-    scope.commands.acquire.stopafter.write("SEQUENCE")
-    scope.commands.acquire.numacq.write(1)
+    # Set up a single acquisition of one record, then start it
+    scope.write("HORizontal:FASTframe:STATE OFF")
+    scope.write("ACQuire:STOPAfter SEQuence")
+    scope.write("ACQuire:STATE RUN")
     
     # Wait for acquisition to complete
-    with Progress() as progress:
-        task = progress.add_task("[cyan]Waiting for acquisition...", total=100)
-        while scope.commands.acquire.state.query() == "RUN":
-            time.sleep(0.1)
-            progress.update(task, advance=1)
+    with console.status("[cyan]Waiting for acquisition..."):
+        completion = wait_for_acquisition(scope, timeout, method)
     
-    console.print("[green]Waveform captured successfully")
+    console.print(f"[green]Waveform captured in {completion.elapsed * 1e3:.1f} ms")
+    return completion
 
 def export_waveform(scope: MDO3K, channel: int = 1, filename: str = None) -> str:
     """Export the captured waveform to a file.
@@ -91,19 +406,812 @@ def export_waveform(scope: MDO3K, channel: int = 1, filename: str = None) -> str
     
     console.print(f"[cyan]Exporting waveform to {filename}...")
     
-    # Set up data export
-    scope.commands.data.source.write(f"CH{channel}")
-    scope.commands.data.start.write(1)
-    scope.commands.data.stop.write(1000)  # Adjust based on your needs
-    scope.commands.data.encdg.write("ASCII")
-    scope.commands.data.filename.write(f'"{filename}"')
+    # Set up data export of the full record
+    record_length = int(float(scope.query("HORizontal:RECOrdlength?")))
+    scope.write(f"DATa:SOUrce CH{channel}")
+    scope.write("DATa:STARt 1")
+    scope.write(f"DATa:STOP {record_length}")
+    scope.write("DATa:ENCdg ASCIi")
+    scope.write(f'DATa:FILEName "{filename}"')
     
     # Export the data
-    scope.commands.data.export.write()
+    scope.write("DATa:EXPort")
     
     console.print("[green]Waveform exported successfully")
     return filename
 
+# Fields of a WFMOutpre? response, in the order the scope sends them
+PREAMBLE_FIELDS = (
+    "BYT_NR", "BIT_NR", "ENCDG", "BN_FMT", "BYT_OR", "WFID", "NR_PT", "PT_FMT",
+    "XUNIT", "XINCR", "XZERO", "PT_OFF", "YUNIT", "YMULT", "YOFF", "YZERO",
+)
+
+def _split_response(response: str) -> List[str]:
+    # Split on ';' outside of quoted strings
+    fields, current, quoted = [], [], False
+    for char in response.strip():
+        if char == '"':
+            quoted = not quoted
+        if char == ";" and not quoted:
+            fields.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    fields.append("".join(current).strip())
+    return fields
+
+@dataclass
+class WaveformPreamble:
+    """Waveform preamble (WFMOutpre?) describing a binary CURVe? transfer."""
+
+    byte_width: int
+    bit_width: int
+    encoding: str
+    binary_format: str
+    byte_order: str
+    waveform_id: str
+    n_points: int
+    point_format: str
+    x_unit: str
+    x_increment: float
+    x_zero: float
+    point_offset: int
+    y_unit: str
+    y_multiplier: float
+    y_offset: float
+    y_zero: float
+
+    @classmethod
+    def from_response(cls, response: str) -> "WaveformPreamble":
+        """Parse a WFMOutpre? response, with or without command headers.
+
+        Args:
+            response: Text returned by the scope
+
+        Returns:
+            WaveformPreamble: Parsed preamble
+        """
+        values: Dict[str, str] = {}
+        for position, field in enumerate(_split_response(response)):
+            key, _, value = field.partition(" ")
+            key = key.split(":")[-1].upper()
+            if key in PREAMBLE_FIELDS and value:
+                values[key] = value.strip()
+            elif position < len(PREAMBLE_FIELDS):
+                values[PREAMBLE_FIELDS[position]] = field
+        missing = [key for key in ("BYT_NR", "XINCR", "XZERO", "YMULT", "YOFF", "YZERO") if key not in values]
+        if missing:
+            raise ValueError(f"Incomplete waveform preamble, missing {missing}: {response!r}")
+
+        def text(key: str, default: str = "") -> str:
+            return values.get(key, default).strip('"')
+
+        return cls(
+            byte_width=int(values["BYT_NR"]),
+            bit_width=int(values.get("BIT_NR", 8 * int(values["BYT_NR"]))),
+            encoding=text("ENCDG", "BIN").upper(),
+            binary_format=text("BN_FMT", "RI").upper(),
+            byte_order=text("BYT_OR", "MSB").upper(),
+            waveform_id=text("WFID"),
+            n_points=int(values.get("NR_PT", 0)),
+            point_format=text("PT_FMT", "Y").upper(),
+            x_unit=text("XUNIT", "s"),
+            x_increment=float(values["XINCR"]),
+            x_zero=float(values["XZERO"]),
+            point_offset=int(float(values.get("PT_OFF", 0))),
+            y_unit=text("YUNIT", "V"),
+            y_multiplier=float(values["YMULT"]),
+            y_offset=float(values["YOFF"]),
+            y_zero=float(values["YZERO"]),
+        )
+
+    @property
+    def dtype(self) -> np.dtype:
+        """NumPy dtype of the raw sample codes."""
+        import numpy as np
+        kind = "u" if self.binary_format == "RP" else "i"
+        order = "<" if self.byte_order == "LSB" else ">"
+        return np.dtype(f"{order}{kind}{self.byte_width}")
+
+    def scale(self, codes: np.ndarray, dtype: Any = None) -> np.ndarray:
+        """Convert raw sample codes to vertical units.
+
+        Args:
+            codes: Raw codes as read from CURVe?
+            dtype: Output dtype (default: float32, as in read_waveform)
+
+        Returns:
+            np.ndarray: (codes - YOFF) * YMULT + YZERO
+        """
+        import numpy as np
+        values = codes.astype(dtype or np.float32)
+        values -= values.dtype.type(self.y_offset)
+        values *= values.dtype.type(self.y_multiplier)
+        values += values.dtype.type(self.y_zero)
+        return values
+
+    def time_axis(self, n_points: Optional[int] = None) -> np.ndarray:
+        """Sample times of the transferred points.
+
+        Args:
+            n_points: Number of points (default: NR_PT)
+
+        Returns:
+            np.ndarray: XZERO + (i - PT_OFF) * XINCR
+        """
+        import numpy as np
+        n = self.n_points if n_points is None else n_points
+        return self.x_zero + (np.arange(n) - self.point_offset) * self.x_increment
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Preamble as a plain dictionary."""
+        return asdict(self)
+
+def parse_block(data: bytes, dtype: Any) -> np.ndarray:
+    """Decode an IEEE 488.2 definite-length binary block without copying.
+
+    Args:
+        data: Raw response bytes, starting with '#<n><length>'
+        dtype: NumPy dtype of the samples
+
+    Returns:
+        np.ndarray: Read-only view of the block's samples
+    """
+    import numpy as np
+    if data[:1] != b"#" or not data[1:2].isdigit() or data[1:2] == b"0":
+        raise ValueError(f"Not a definite-length binary block: {data[:16]!r}")
+    digits = int(data[1:2])
+    length = int(data[2:2 + digits])
+    start = 2 + digits
+    if len(data) < start + length:
+        raise ValueError(f"Truncated binary block: expected {length} bytes, got {len(data) - start}")
+    dtype = np.dtype(dtype)
+    return np.frombuffer(data, dtype=dtype, count=length // dtype.itemsize, offset=start)
+
+def configure_binary_transfer(
+    scope: MDO3K,
+    channel: int = 1,
+    width: int = 1,
+    start: int = 1,
+    stop: Optional[int] = None
+) -> None:
+    """Select a channel and signed binary encoding for CURVe? transfers.
+
+    Args:
+        scope: MDO3K oscilloscope instance
+        channel: Channel number to transfer
+        width: Bytes per sample, 1 (8-bit) or 2 (16-bit)
+        start: First record point to transfer (1-based)
+        stop: Last record point to transfer (default: the full record)
+    """
+    if width not in (1, 2):
+        raise ValueError(f"Sample width must be 1 or 2 bytes, got {width}")
+    if stop is None:
+        stop = int(float(scope.query("HORizontal:RECOrdlength?")))
+    scope.write(f"DATa:SOUrce CH{channel}")
+    scope.write("DATa:ENCdg RIBinary")
+    scope.write(f"WFMOutpre:BYT_Nr {width}")
+    scope.write(f"DATa:STARt {start}")
+    scope.write(f"DATa:STOP {stop}")
+
+def read_curve(scope: MDO3K, dtype: Any = None) -> Tuple[WaveformPreamble, np.ndarray, np.ndarray]:
+    """Read the configured waveform as a binary block and scale it.
+
+    Args:
+        scope: MDO3K oscilloscope instance, set up by configure_binary_transfer
+        dtype: Output dtype of the amplitude (default: float32)
+
+    Returns:
+        Tuple of (preamble, time, amplitude) arrays
+    """
+    preamble = WaveformPreamble.from_response(scope.query("WFMOutpre?"))
+    if preamble.encoding.startswith("ASC"):
+        raise ValueError("Data encoding is ASCII; call configure_binary_transfer first")
+    codes = parse_block(scope.query_raw_binary("CURVe?"), preamble.dtype)
+    return preamble, preamble.time_axis(len(codes)), preamble.scale(codes, dtype)
+
+def transfer_waveform(
+    scope: MDO3K,
+    channel: int = 1,
+    width: int = 1,
+    dtype: Any = None
+) -> Tuple[WaveformPreamble, np.ndarray, np.ndarray]:
+    """Transfer the full record of a channel as binary data.
+
+    Signed 8- or 16-bit codes are several times smaller on the wire than
+    ASCII and are scaled to volts in one vectorized step.
+
+    Args:
+        scope: MDO3K oscilloscope instance
+        channel: Channel number to transfer
+        width: Bytes per sample, 1 (8-bit) or 2 (16-bit)
+        dtype: Output dtype of the amplitude (default: float32)
+
+    Returns:
+        Tuple of (preamble, time, amplitude) arrays
+    """
+    configure_binary_transfer(scope, channel, width)
+    return read_curve(scope, dtype)
+
+# Whole seconds of a FastFrame timestamp; the fraction is parsed separately
+TIMESTAMP_FORMAT = "%d %b %Y %H:%M:%S"
+
+def parse_timestamps(response: str) -> Tuple[datetime, np.ndarray]:
+    """Parse FastFrame trigger timestamps.
+
+    Args:
+        response: Quoted timestamps such as "17 Oct 2026 12:00:00.000012500000"
+
+    Returns:
+        Tuple of (absolute time of the first frame, seconds of every frame
+        relative to the first)
+    """
+    import numpy as np
+    stamps = re.findall(r'"([^"]+)"', response) or [v for v in response.split(",") if v.strip()]
+    if not stamps:
+        raise ValueError(f"No timestamps in response: {response!r}")
+    whole, fraction = [], []
+    for stamp in stamps:
+        # Fractional seconds go down to picoseconds, beyond strptime's %f
+        clock, _, digits = stamp.strip().partition(".")
+        whole.append(datetime.strptime(clock, TIMESTAMP_FORMAT))
+        fraction.append(float(f"0.{digits or 0}"))
+    # Whole seconds and fractions are subtracted separately to keep sub-ns resolution
+    relative = np.array([(w - whole[0]).total_seconds() for w in whole]) + (np.array(fraction) - fraction[0])
+    start = whole[0].replace(microsecond=int(fraction[0] * 1e6))
+    return start, relative
+
+@dataclass
+class Frames:
+    """Triggered frames of one segmented (FastFrame) acquisition."""
+
+    preamble: WaveformPreamble
+    time: np.ndarray
+    amplitude: np.ndarray
+    timestamps: np.ndarray
+    start: datetime
+    completion: Optional[Completion] = None
+
+    def __len__(self) -> int:
+        return len(self.amplitude)
+
+def configure_fastframe(scope: MDO3K, n_frames: int) -> None:
+    """Enable FastFrame so one acquisition records several triggers.
+
+    Args:
+        scope: MDO3K oscilloscope instance
+        n_frames: Triggered frames per acquisition
+    """
+    if n_frames < 1:
+        raise ValueError(f"Frame count must be positive, got {n_frames}")
+    scope.write("HORizontal:FASTframe:STATE ON")
+    scope.write(f"HORizontal:FASTframe:COUNt {n_frames}")
+    scope.write("ACQuire:STOPAfter SEQuence")
+
+class RawFrames(NamedTuple):
+    """Undecoded responses of a FastFrame transfer."""
+
+    preamble: str
+    block: bytes
+    timestamps: str
+
+def read_raw_frames(scope: MDO3K, n_frames: int, channel: int = 1, width: int = 1) -> RawFrames:
+    """Transfer the frames of a FastFrame acquisition without decoding them.
+
+    Args:
+        scope: MDO3K oscilloscope instance
+        n_frames: Number of frames to transfer, starting at the first
+        channel: Channel number to transfer
+        width: Bytes per sample, 1 (8-bit) or 2 (16-bit)
+
+    Returns:
+        RawFrames: Preamble, binary block and timestamp responses
+    """
+    configure_binary_transfer(scope, channel, width)
+    scope.write("DATa:FRAMESTARt 1")
+    scope.write(f"DATa:FRAMESTOP {n_frames}")
+    return RawFrames(
+        scope.query("WFMOutpre?"),
+        scope.query_raw_binary("CURVe?"),
+        scope.query(f"HORizontal:FASTframe:TIMEStamp:ALL:CH{channel}? 1,{n_frames}"),
+    )
+
+def _split_frames(codes: np.ndarray, preamble: WaveformPreamble) -> np.ndarray:
+    if preamble.n_points <= 0 or len(codes) % preamble.n_points:
+        raise ValueError(f"{len(codes)} samples do not split into frames of {preamble.n_points} points")
+    return codes.reshape(-1, preamble.n_points)
+
+def _check_frame_count(timestamps: np.ndarray, codes: np.ndarray) -> None:
+    if len(timestamps) != len(codes):
+        raise ValueError(f"Got {len(timestamps)} timestamps for {len(codes)} frames")
+
+def decode_frames(raw: RawFrames, dtype: Any = None) -> Frames:
+    """Decode and scale the responses of a FastFrame transfer.
+
+    Args:
+        raw: Responses from read_raw_frames
+        dtype: Output dtype of the amplitude (default: float32)
+
+    Returns:
+        Frames: N x L amplitude with per-frame trigger timestamps
+    """
+    preamble = WaveformPreamble.from_response(raw.preamble)
+    codes = _split_frames(parse_block(raw.block, preamble.dtype), preamble)
+    start, timestamps = parse_timestamps(raw.timestamps)
+    _check_frame_count(timestamps, codes)
+    return Frames(preamble, preamble.time_axis(), preamble.scale(codes, dtype), timestamps, start)
+
+def read_frames(scope: MDO3K, n_frames: int, channel: int = 1, width: int = 1, dtype: Any = None) -> Frames:
+    """Transfer all frames of a FastFrame acquisition as one binary block.
+
+    Args:
+        scope: MDO3K oscilloscope instance
+        n_frames: Number of frames to transfer, starting at the first
+        channel: Channel number to transfer
+        width: Bytes per sample, 1 (8-bit) or 2 (16-bit)
+        dtype: Output dtype of the amplitude (default: float32)
+
+    Returns:
+        Frames: N x L amplitude with per-frame trigger timestamps
+    """
+    return decode_frames(read_raw_frames(scope, n_frames, channel, width), dtype)
+
+def capture_frames(
+    scope: MDO3K,
+    n_frames: int,
+    channel: int = 1,
+    width: int = 1,
+    timeout: float = 60.0,
+    dtype: Any = None,
+    method: str = "opc"
+) -> Frames:
+    """Record N triggered pulses in one FastFrame acquisition and transfer them.
+
+    One acquire/transfer round trip returns every pulse, instead of one
+    round trip per pulse.
+
+    Args:
+        scope: MDO3K oscilloscope instance
+        n_frames: Triggered frames to record
+        channel: Channel number to transfer
+        width: Bytes per sample, 1 (8-bit) or 2 (16-bit)
+        timeout: Seconds to wait for all triggers
+        dtype: Output dtype of the amplitude (default: float32)
+        method: Completion method, "opc" or "poll" (see wait_for_acquisition)
+
+    Returns:
+        Frames: N x L amplitude with per-frame trigger timestamps
+    """
+    console.print(f"[cyan]Capturing {n_frames} frames from channel {channel}...")
+    configure_fastframe(scope, n_frames)
+    scope.write("ACQuire:STATE RUN")
+    completion = wait_for_acquisition(scope, timeout, method)
+    frames = read_frames(scope, n_frames, channel, width, dtype)
+    frames.completion = completion
+    console.print(f"[green]Captured {len(frames)} frames")
+    return frames
+
+@dataclass
+class ChannelCapture:
+    """Several channels from one acquisition on a shared timebase."""
+
+    channels: List[int]
+    preambles: Dict[int, WaveformPreamble]
+    time: np.ndarray
+    amplitude: np.ndarray
+    timestamps: Optional[np.ndarray] = None
+    completion: Optional[Completion] = None
+
+    def channel(self, channel: int) -> np.ndarray:
+        """Samples of one channel: L, or N x L with FastFrame."""
+        return self.amplitude[self.channels.index(channel)]
+
+def _check_timebase(preambles: Dict[int, WaveformPreamble]) -> None:
+    reference = next(iter(preambles.values()))
+    for channel, preamble in preambles.items():
+        if (preamble.n_points, preamble.x_increment, preamble.x_zero, preamble.point_offset) != (
+            reference.n_points, reference.x_increment, reference.x_zero, reference.point_offset
+        ):
+            raise ValueError(f"CH{channel} does not share the timebase of the other channels")
+
+def capture_channels(
+    scope: MDO3K,
+    channels: List[int],
+    n_frames: Optional[int] = None,
+    width: int = 1,
+    timeout: float = 60.0,
+    method: str = "opc",
+    dtype: Any = None
+) -> ChannelCapture:
+    """Capture several channels in one acquisition and transfer them all.
+
+    Every channel comes from the same trigger(s), so the PMT and laser sync
+    are time-aligned. Encoding and window are set once; each channel then
+    needs one source switch, one preamble and one CURVe? query.
+
+    Args:
+        scope: MDO3K oscilloscope instance
+        channels: Channel numbers, in the order of the output rows
+        n_frames: Record this many triggers with FastFrame (default: one
+            single-sequence acquisition)
+        width: Bytes per sample, 1 (8-bit) or 2 (16-bit)
+        timeout: Seconds to wait for the acquisition
+        method: Completion method, "opc" or "poll"
+        dtype: Output dtype of the amplitude (default: float32)
+
+    Returns:
+        ChannelCapture: C x L amplitude (C x N x L with FastFrame)
+    """
+    import numpy as np
+    channels = list(channels)
+    if not channels or len(set(channels)) != len(channels):
+        raise ValueError(f"Channels must be distinct and non-empty, got {channels}")
+    console.print(f"[cyan]Capturing channels {', '.join(f'CH{c}' for c in channels)}...")
+    if n_frames:
+        configure_fastframe(scope, n_frames)
+    else:
+        scope.write("HORizontal:FASTframe:STATE OFF")
+        scope.write("ACQuire:STOPAfter SEQuence")
+    scope.write("ACQuire:STATE RUN")
+    completion = wait_for_acquisition(scope, timeout, method)
+
+    configure_binary_transfer(scope, channels[0], width)
+    if n_frames:
+        scope.write("DATa:FRAMESTARt 1")
+        scope.write(f"DATa:FRAMESTOP {n_frames}")
+    preambles: Dict[int, WaveformPreamble] = {}
+    rows = []
+    for channel in channels:
+        scope.write(f"DATa:SOUrce CH{channel}")
+        preamble = WaveformPreamble.from_response(scope.query("WFMOutpre?"))
+        codes = parse_block(scope.query_raw_binary("CURVe?"), preamble.dtype)
+        if n_frames:
+            codes = _split_frames(codes, preamble)
+        preambles[channel] = preamble
+        rows.append(preamble.scale(codes, dtype))
+    _check_timebase(preambles)
+
+    timestamps = None
+    if n_frames:
+        _, timestamps = parse_timestamps(
+            scope.query(f"HORizontal:FASTframe:TIMEStamp:ALL:CH{channels[0]}? 1,{n_frames}")
+        )
+        for row in rows:
+            _check_frame_count(timestamps, row)
+    reference = preambles[channels[0]]
+    console.print(f"[green]Captured {len(channels)} channels in {completion.elapsed * 1e3:.1f} ms")
+    return ChannelCapture(channels, preambles, reference.time_axis(), np.stack(rows), timestamps, completion)
+
+def start_stop_intervals(
+    capture: ChannelCapture,
+    start_channel: int,
+    stop_channel: int,
+    start_fraction: float = 0.5,
+    stop_fraction: float = 0.5,
+    start_polarity: int = 1,
+    stop_polarity: int = -1
+) -> np.ndarray:
+    """Delay from a start edge (e.g. laser sync) to a stop pulse (e.g. PMT).
+
+    Both edges come from the same trigger, so the delay is free of the
+    trigger jitter between separate acquisitions.
+
+    Args:
+        capture: Multi-channel capture
+        start_channel: Channel with the start signal
+        stop_channel: Channel with the stop pulses
+        start_fraction: Start threshold as a fraction of its peak
+        stop_fraction: Stop threshold as a fraction of its peak
+        start_polarity: +1 for a rising start edge, -1 for falling
+        stop_polarity: -1 for negative PMT pulses, +1 for positive
+
+    Returns:
+        np.ndarray: Delay per frame in seconds (NaN where an edge is missing)
+    """
+    import numpy as np
+    from .crossing import first_crossing_times
+    dt = capture.time[1] - capture.time[0]
+    t0 = capture.time[0]
+    start = np.atleast_2d(capture.channel(start_channel))
+    stop = np.atleast_2d(capture.channel(stop_channel))
+    start_times = first_crossing_times(start, [start_fraction], dt, t0, polarity=start_polarity)[:, 0]
+    stop_times = first_crossing_times(stop, [stop_fraction], dt, t0, polarity=stop_polarity)[:, 0]
+    return stop_times - start_times
+
+MEASUREMENT_TYPES = ("AMPlitude", "MINImum", "MAXimum", "RISe", "FALL", "DELay")
+
+# Measurement slots of the MDO32
+MAX_MEASUREMENTS = 4
+
+# The scope returns 9.91E37 for values it could not measure
+NOT_A_NUMBER = 9.91e37
+
+@dataclass
+class Measurement:
+    """A scope measurement; DELay runs from source to reference."""
+
+    type: str
+    source: int = 1
+    reference: Optional[int] = None
+    edges: Tuple[str, str] = ("RISe", "FALL")
+
+    @classmethod
+    def parse(cls, text: str) -> "Measurement":
+        """Parse 'TYPE[:SOURCE[:REFERENCE]]', e.g. 'FALL:1' or 'DELay:2:1'.
+
+        Args:
+            text: Measurement specification
+
+        Returns:
+            Measurement: Parsed measurement
+        """
+        kind, *channels = text.split(":")
+        names = {name.upper(): name for name in MEASUREMENT_TYPES}
+        if kind.upper() not in names:
+            raise ValueError(f"Unknown measurement '{kind}', expected one of {MEASUREMENT_TYPES}")
+        channels = [int(c) for c in channels]
+        return cls(names[kind.upper()], *channels[:2])
+
+@dataclass
+class MeasurementStats:
+    """Statistics the scope accumulated for one measurement."""
+
+    measurement: Measurement
+    mean: float
+    std: float
+    minimum: float
+    maximum: float
+    population: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Statistics as a plain dictionary."""
+        return asdict(self)
+
+def _value(response: str) -> float:
+    value = float(response)
+    return float("nan") if abs(value) >= NOT_A_NUMBER else value
+
+def configure_measurements(scope: MDO3K, measurements: List[Measurement]) -> None:
+    """Set up the scope's measurement slots and enable statistics.
+
+    Args:
+        scope: MDO3K oscilloscope instance
+        measurements: Up to four measurements, assigned to MEAS1, MEAS2, ...
+    """
+    if not 1 <= len(measurements) <= MAX_MEASUREMENTS:
+        raise ValueError(f"Between 1 and {MAX_MEASUREMENTS} measurements are supported, got {len(measurements)}")
+    for slot, measurement in enumerate(measurements, start=1):
+        prefix = f"MEASUrement:MEAS{slot}"
+        scope.write(f"{prefix}:TYPe {measurement.type}")
+        scope.write(f"{prefix}:SOUrce1 CH{measurement.source}")
+        if measurement.type == "DELay":
+            if measurement.reference is None:
+                raise ValueError("DELay measurements need a reference channel")
+            scope.write(f"{prefix}:SOUrce2 CH{measurement.reference}")
+            scope.write(f"{prefix}:DELay:EDGE1 {measurement.edges[0]}")
+            scope.write(f"{prefix}:DELay:EDGE2 {measurement.edges[1]}")
+        scope.write(f"{prefix}:STATE ON")
+    scope.write("MEASUrement:STATIstics:MODe ALL")
+
+def read_measurement_stats(scope: MDO3K, measurements: List[Measurement]) -> List[MeasurementStats]:
+    """Read the accumulated statistics of configured measurements.
+
+    Args:
+        scope: MDO3K oscilloscope instance
+        measurements: Measurements in slot order, as configured
+
+    Returns:
+        List of MeasurementStats, one per measurement
+    """
+    results = []
+    for slot, measurement in enumerate(measurements, start=1):
+        prefix = f"MEASUrement:MEAS{slot}"
+        results.append(MeasurementStats(
+            measurement,
+            mean=_value(scope.query(f"{prefix}:MEAN?")),
+            std=_value(scope.query(f"{prefix}:STDdev?")),
+            minimum=_value(scope.query(f"{prefix}:MINImum?")),
+            maximum=_value(scope.query(f"{prefix}:MAXimum?")),
+            population=int(float(scope.query(f"{prefix}:COUNt?"))),
+        ))
+    return results
+
+def measure_statistics(
+    scope: MDO3K,
+    measurements: List[Measurement],
+    n_acquisitions: int,
+    timeout: float = 10.0,
+    method: str = "opc",
+    on_acquisition: Optional[Callable[[int], None]] = None
+) -> List[MeasurementStats]:
+    """Accumulate measurement statistics over N acquisitions on the scope.
+
+    No waveforms are transferred: each acquisition costs a start command
+    and a completion query, and the statistics are read once at the end.
+
+    Args:
+        scope: MDO3K oscilloscope instance
+        measurements: Up to four measurements
+        n_acquisitions: Number of single-sequence acquisitions
+        timeout: Seconds to wait for each acquisition
+        method: Completion method, "opc" or "poll"
+        on_acquisition: Called with the acquisition index after each one,
+            e.g. to transfer spot-check waveforms
+
+    Returns:
+        List of MeasurementStats, one per measurement
+    """
+    configure_measurements(scope, measurements)
+    scope.write("HORizontal:FASTframe:STATE OFF")
+    scope.write("ACQuire:STOPAfter SEQuence")
+    scope.write("MEASUrement:STATIstics RESET")
+    with Progress(console=console) as progress:
+        task = progress.add_task("[cyan]Accumulating measurements...", total=n_acquisitions)
+        for index in range(n_acquisitions):
+            scope.write("ACQuire:STATE RUN")
+            wait_for_acquisition(scope, timeout, method)
+            if on_acquisition is not None:
+                on_acquisition(index)
+            progress.update(task, advance=1)
+    return read_measurement_stats(scope, measurements)
+
+def stats_table(stats: List[MeasurementStats]) -> Table:
+    """Table of accumulated measurement statistics."""
+    table = Table(title="Measurement Statistics")
+    for column in ("Measurement", "Mean", "Std", "Min", "Max", "Population"):
+        table.add_column(column)
+    for s in stats:
+        m = s.measurement
+        name = f"{m.type} CH{m.source}" + (f"-CH{m.reference}" if m.type == "DELay" else "")
+        table.add_row(name, f"{s.mean:.4g}", f"{s.std:.4g}", f"{s.minimum:.4g}", f"{s.maximum:.4g}", str(s.population))
+    return table
+
+@dataclass
+class StreamResult:
+    """Outcome of streaming a record to disk."""
+
+    filename: str
+    points: int
+    bytes: int
+    elapsed: float
+
+    @property
+    def bytes_per_second(self) -> float:
+        """Average transfer rate including disk writes."""
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+def _metadata_path(filename: str) -> str:
+    return filename + ".json"
+
+def stream_record(
+    scope: MDO3K,
+    filename: str,
+    channel: int = 1,
+    width: int = 2,
+    chunk_points: int = 1_000_000,
+    progress: bool = True
+) -> StreamResult:
+    """Stream the full record of a channel to a raw binary file in windows.
+
+    The record is fetched in DATa:STARt/STOP windows of chunk_points, and the
+    codes of each window are appended to the file as soon as they arrive,
+    so neither side holds the whole record. The preamble and sample dtype are
+    written to '<filename>.json'; load_record maps the file back.
+
+    Args:
+        scope: MDO3K oscilloscope instance
+        filename: Output path of the raw sample codes
+        channel: Channel number to transfer
+        width: Bytes per sample, 1 (8-bit) or 2 (16-bit)
+        chunk_points: Record points per transfer window
+        progress: Show a progress bar with the transfer rate
+
+    Returns:
+        StreamResult: Points and bytes written and the elapsed time
+    """
+    import json
+    from rich.progress import (
+        BarColumn, DownloadColumn, Progress, TextColumn, TimeRemainingColumn, TransferSpeedColumn
+    )
+    if chunk_points < 1:
+        raise ValueError(f"Chunk size must be positive, got {chunk_points}")
+    record_length = int(float(scope.query("HORizontal:RECOrdlength?")))
+    if record_length < 1:
+        raise ValueError(f"Scope reports an empty record (record length {record_length})")
+    # Transfer one record, not the frames of an earlier FastFrame capture
+    scope.write("HORizontal:FASTframe:STATE OFF")
+    configure_binary_transfer(scope, channel, width, 1, min(chunk_points, record_length))
+    first: Optional[WaveformPreamble] = None
+    written = 0
+    start = time.perf_counter()
+    columns = (
+        TextColumn("[cyan]Streaming record"), BarColumn(), DownloadColumn(),
+        TransferSpeedColumn(), TimeRemainingColumn(),
+    )
+    with open(filename, "wb") as f, Progress(*columns, console=console, disable=not progress) as bar:
+        task = bar.add_task("stream", total=record_length * width)
+        for lo in range(1, record_length + 1, chunk_points):
+            hi = min(lo + chunk_points - 1, record_length)
+            scope.write(f"DATa:STARt {lo}")
+            scope.write(f"DATa:STOP {hi}")
+            if first is None:
+                first = WaveformPreamble.from_response(scope.query("WFMOutpre?"))
+            codes = parse_block(scope.query_raw_binary("CURVe?"), first.dtype)
+            if len(codes) != hi - lo + 1:
+                raise ValueError(f"Window {lo}-{hi} returned {len(codes)} points")
+            f.write(codes)
+            written += codes.nbytes
+            bar.update(task, advance=codes.nbytes)
+    elapsed = time.perf_counter() - start
+
+    first.n_points = written // first.byte_width
+    with open(_metadata_path(filename), "w") as f:
+        json.dump({"dtype": first.dtype.str, "preamble": first.to_dict()}, f, indent=2)
+    result = StreamResult(filename, first.n_points, written, elapsed)
+    console.print(
+        f"[green]Streamed {result.points} points ({result.bytes / 1e6:.1f} MB) "
+        f"at {result.bytes_per_second / 1e6:.1f} MB/s"
+    )
+    return result
+
+def load_record(filename: str) -> Tuple[WaveformPreamble, np.ndarray]:
+    """Map a streamed record without reading it into memory.
+
+    Args:
+        filename: Raw file written by stream_record
+
+    Returns:
+        Tuple of (preamble, memory-mapped raw codes); scale windows of the
+        codes with preamble.scale
+    """
+    import json
+    import numpy as np
+    with open(_metadata_path(filename), "r") as f:
+        metadata = json.load(f)
+    preamble = WaveformPreamble(**metadata["preamble"])
+    codes = np.memmap(filename, dtype=np.dtype(metadata["dtype"]), mode="r", shape=(preamble.n_points,))
+    return preamble, codes
+
+def save_curve(filename: str, preamble: WaveformPreamble, time: np.ndarray, amplitude: np.ndarray, **arrays) -> str:
+    """Save a transferred waveform and its preamble to a .npz file.
+
+    Args:
+        filename: Output path
+        preamble: Preamble returned with the waveform
+        time: Sample times
+        amplitude: Scaled samples, one row per frame for FastFrame captures
+        **arrays: Further arrays to store, such as frame timestamps
+
+    Returns:
+        str: Path to the written file
+    """
+    import json
+    import numpy as np
+    with open(filename, "wb") as f:
+        np.savez(f, time=time, amplitude=amplitude, preamble=json.dumps(preamble.to_dict()), **arrays)
+    return filename
+
+def save_channels(filename: str, capture: ChannelCapture) -> str:
+    """Save a multi-channel capture and its preambles to a .npz file.
+
+    Args:
+        filename: Output path
+        capture: Capture from capture_channels
+
+    Returns:
+        str: Path to the written file
+    """
+    import json
+    import numpy as np
+    arrays = {} if capture.timestamps is None else {"timestamps": capture.timestamps}
+    preambles = {str(channel): preamble.to_dict() for channel, preamble in capture.preambles.items()}
+    with open(filename, "wb") as f:
+        np.savez(
+            f, channels=np.array(capture.channels), time=capture.time, amplitude=capture.amplitude,
+            preambles=json.dumps(preambles), **arrays,
+        )
+    return filename
+
 def main():
     """Main function to run the script."""
     try:
@@ -113,28 +1221,79 @@ def main():
         parser.add_argument("--ip", help="IP address of the oscilloscope")
         parser.add_argument("--settings", help="Path to settings file")
         parser.add_argument("--channel", type=int, default=1, help="Channel number (default: 1)")
+        parser.add_argument("--channels", type=int, nargs="+",
+                           help="Capture these channels from one acquisition into one .npz file")
         parser.add_argument("--output", help="Output filename for waveform data")
+        parser.add_argument("--binary", action="store_true",
+                           help="Transfer the full record as binary data into a local .npz file")
+        parser.add_argument("--width", type=int, choices=[1, 2], default=2,
+                           help="Bytes per sample of binary transfers (default: 2)")
+        parser.add_argument("--frames", type=int,
+                           help="Record this many triggered pulses in one FastFrame acquisition (implies --binary)")
+        parser.add_argument("--stream", action="store_true",
+                           help="Stream the full record in windows to a raw binary file")
+        parser.add_argument("--chunk-points", type=int, default=1_000_000,
+                           help="Record points per streamed window (default: 1000000)")
+        parser.add_argument("--stats", nargs="+", metavar="TYPE[:CH[:REF]]",
+                           help="Accumulate scope measurements instead of transferring waveforms, "
+                                "e.g. AMPlitude:1 FALL:1 DELay:2:1")
+        parser.add_argument("--acquisitions", type=int, default=1000,
+                           help="Acquisitions accumulated in --stats mode (default: 1000)")
+        parser.add_argument("--completion", choices=COMPLETION_METHODS, default="opc",
+                           help="Wait for acquisitions with a blocking *OPC? or adaptive polling (default: opc)")
+        parser.add_argument("--timeout", type=float, default=60.0,
+                           help="Seconds to wait for an acquisition (default: 60)")
         args = parser.parse_args()
         
-        # Connect to the oscilloscope
-        scope = connect_to_oscilloscope(args.ip)
+        # Reuse the open connection when called repeatedly in one process
+        scope = open_session(args.ip)
         
-        # Load settings if provided
+        # Load settings if provided and not loaded already
         if args.settings:
-            load_settings(scope, args.settings)
+            scope.load_settings(args.settings)
         
         # Capture and export waveform
-        capture_waveform(scope, args.channel)
-        export_waveform(scope, args.channel, args.output)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if args.stats:
+            measurements = [Measurement.parse(text) for text in args.stats]
+            stats = measure_statistics(scope, measurements, args.acquisitions, args.timeout, args.completion)
+            console.print(stats_table(stats))
+            if args.output:
+                import json
+                with open(args.output, "w") as f:
+                    json.dump([s.to_dict() for s in stats], f, indent=2)
+        elif args.channels:
+            capture = capture_channels(scope, args.channels, args.frames, args.width, args.timeout, args.completion)
+            filename = save_channels(
+                args.output or f"waveform_ch{''.join(map(str, args.channels))}_{timestamp}.npz", capture
+            )
+            console.print(f"[green]Saved {len(capture.channels)} channels to {filename}")
+        elif args.frames:
+            frames = capture_frames(scope, args.frames, args.channel, args.width, args.timeout, method=args.completion)
+            filename = save_curve(
+                args.output or f"frames_ch{args.channel}_{timestamp}.npz",
+                frames.preamble, frames.time, frames.amplitude,
+                timestamps=frames.timestamps, start=frames.start.isoformat(),
+            )
+            console.print(f"[green]Saved {len(frames)} frames to {filename}")
+        elif args.stream:
+            capture_waveform(scope, args.channel, args.timeout, args.completion)
+            stream_record(
+                scope, args.output or f"waveform_ch{args.channel}_{timestamp}.bin",
+                args.channel, args.width, args.chunk_points,
+            )
+        elif args.binary:
+            capture_waveform(scope, args.channel, args.timeout, args.completion)
+            preamble, times, amplitude = transfer_waveform(scope, args.channel, args.width)
+            filename = save_curve(args.output or f"waveform_ch{args.channel}_{timestamp}.npz", preamble, times, amplitude)
+            console.print(f"[green]Transferred {len(amplitude)} points to {filename}")
+        else:
+            capture_waveform(scope, args.channel, args.timeout, args.completion)
+            export_waveform(scope, args.channel, args.output)
         
     except Exception as e:
         console.print(f"[red]Error: {e}")
         sys.exit(1)
-    finally:
-        # Clean up
-        if 'scope' in locals():
-            scope.close()
-            console.print("[green]Oscilloscope connection closed")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
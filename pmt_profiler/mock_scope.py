@@ -0,0 +1,441 @@
+"""Simulated MDO32 oscilloscope speaking a subset of its SCPI commands.
+
+MockMDO32 implements the ``write``/``query``/``query_raw_binary`` methods of a
+tm_devices scope, so acquisition and transfer code in mdo32 can be exercised
+without hardware. Every trigger produces a fresh PMT-like pulse on CH1
+(random amplitude, timing jitter and noise) and a laser-sync edge on CH2,
+digitized to signed 8- or 16-bit codes the way the instrument does. In
+FastFrame mode one acquisition records several triggers, each with its own
+timestamp. Enabled measurements (MEAS1-MEAS4) are evaluated on every
+acquisition and accumulated into statistics on the instrument.
+"""
+
+import re
+import time as _time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+CODES_PER_DIV = {1: 25, 2: 6400}
+
+# VISA status code of an I/O timeout
+VI_ERROR_TMO = -1073807339
+
+# Returned by the scope for values it cannot measure
+NOT_A_NUMBER = 9.91e37
+
+N_MEASUREMENTS = 4
+STATISTICS = ("MEAN", "STDdev", "MINImum", "MAXimum", "COUNt", "VALue")
+
+class VisaTimeout(Exception):
+    """Raised like pyvisa's VisaIOError when a query outlasts the VISA timeout."""
+
+    error_code = VI_ERROR_TMO
+
+def pmt_pulse(rng: np.random.Generator, time: np.ndarray) -> np.ndarray:
+    """Negative PMT pulse at t = 0 with random amplitude, jitter and noise."""
+    amplitude = rng.exponential(0.08) + 0.02
+    t = time - rng.normal(0.0, 100e-12)
+    rise, fall = 0.8e-9, 2.5e-9
+    shape = np.where(t < 0, np.exp(-0.5 * (np.minimum(t, 0) / rise) ** 2), np.exp(-np.maximum(t, 0) / fall))
+    return -amplitude * shape + rng.normal(0.0, 0.002, len(time))
+
+def sync_edge(rng: np.random.Generator, time: np.ndarray) -> np.ndarray:
+    """Laser sync: a 1 V step 5 ns before the trigger, with small noise."""
+    return 0.5 * (1.0 + np.tanh((time + 5e-9) / 0.4e-9)) + rng.normal(0.0, 0.005, len(time))
+
+def _last_crossing(record: np.ndarray, level: float, stop: int) -> float:
+    # Fractional index where the record last passes level before stop
+    segment = record[:stop + 1]
+    above = segment >= level
+    changes = np.nonzero(above[:-1] != above[1:])[0]
+    if len(changes) == 0:
+        return np.nan
+    i = changes[-1]
+    return i + (level - segment[i]) / (segment[i + 1] - segment[i])
+
+def _first_crossing(record: np.ndarray, level: float, rising: bool) -> float:
+    # Fractional index where the record first passes level in one direction
+    above = record >= level if rising else record <= level
+    hits = np.nonzero(above[1:] & ~above[:-1])[0]
+    if len(hits) == 0:
+        return np.nan
+    i = hits[0]
+    return i + (level - record[i]) / (record[i + 1] - record[i])
+
+def measure(kind: str, record: np.ndarray, sample_interval: float, reference: Optional[np.ndarray] = None,
+            edges: Tuple[str, str] = ("RISe", "FALL")) -> float:
+    """Evaluate one scope measurement on a record.
+
+    Levels follow the instrument: the base is the most common level
+    (median), the top the extreme sample, and edge times run between 10%
+    and 90% of the base-to-top amplitude, next to the extreme.
+
+    Args:
+        kind: AMPlitude, MINImum, MAXimum, RISe, FALL or DELay
+        record: Samples of SOUrce1
+        sample_interval: Time between samples
+        reference: Samples of SOUrce2 for DELay
+        edges: DELay edge slopes of SOUrce1 and SOUrce2
+
+    Returns:
+        float: Measured value, NaN if it cannot be measured
+    """
+    if _matches("MINImum", kind):
+        return float(record.min())
+    if _matches("MAXimum", kind):
+        return float(record.max())
+    base, top, peak = _levels(record)
+    if _matches("AMPlitude", kind):
+        return abs(top - base)
+    if _matches("RISe", kind) or _matches("FALL", kind):
+        near = _last_crossing(record, base + 0.1 * (top - base), peak)
+        far = _last_crossing(record, base + 0.9 * (top - base), peak)
+        return (far - near) * sample_interval
+    if _matches("DELay", kind):
+        def mid_crossing(samples: np.ndarray, slope: str) -> float:
+            base, top, _ = _levels(samples)
+            return _first_crossing(samples, base + 0.5 * (top - base), rising=_matches("RISe", slope))
+        return (mid_crossing(reference, edges[1]) - mid_crossing(record, edges[0])) * sample_interval
+    raise ValueError(f"Unsupported measurement type: {kind}")
+
+def _levels(record: np.ndarray) -> Tuple[float, float, int]:
+    # Base, top and index of the top; pulses go towards whichever extreme
+    # is farther from the base
+    base = float(np.median(record))
+    negative = base - record.min() > record.max() - base
+    peak = int(np.argmin(record) if negative else np.argmax(record))
+    return base, float(record[peak]), peak
+
+def _matches(pattern: str, header: str) -> bool:
+    # SCPI nodes match in long or short form, case-insensitively; the
+    # short form is the upper-case part of the documented mnemonic
+    nodes, received = pattern.split(":"), header.strip(":").split(":")
+    if len(nodes) != len(received):
+        return False
+    for node, got in zip(nodes, received):
+        short = "".join(c for c in node if not c.islower())
+        if got.upper() not in (node.upper(), short.upper()):
+            return False
+    return True
+
+class MockMDO32:
+    """In-memory stand-in for a Tektronix MDO32 on a VISA connection."""
+
+    def __init__(self, seed: Optional[int] = None, record_length: int = 1000, sample_interval: float = 4e-10):
+        """Initialize the simulated instrument.
+
+        Args:
+            seed: Seed of the pulse generator, for reproducible waveforms
+            record_length: Initial horizontal record length
+            sample_interval: Time between samples in seconds
+        """
+        self.model = "MDO32"
+        self.resource_name = "SIM::MDO32::INSTR"
+        self.rng = np.random.default_rng(seed)
+        self.signals: Dict[int, Callable[[np.random.Generator, np.ndarray], np.ndarray]] = {
+            1: pmt_pulse,
+            2: sync_edge,
+        }
+        self.settings: Dict[str, str] = {
+            "HORizontal:RECOrdlength": str(record_length),
+            "HORizontal:POSition": "20",
+            "DATa:SOUrce": "CH1",
+            "DATa:STARt": "1",
+            "DATa:STOP": str(record_length),
+            "DATa:ENCdg": "RIBINARY",
+            "WFMOutpre:BYT_Nr": "1",
+            "ACQuire:STATE": "0",
+            "ACQuire:STOPAfter": "RUNSTOP",
+            "HEADer": "0",
+            "HORizontal:FASTframe:STATE": "0",
+            "HORizontal:FASTframe:COUNt": "1",
+            "DATa:FRAMESTARt": "1",
+            "DATa:FRAMESTOP": "1",
+        }
+        for channel in (1, 2, 3, 4):
+            self.settings[f"CH{channel}:SCAle"] = "0.05" if channel == 1 else "0.2"
+            self.settings[f"CH{channel}:POSition"] = "0"
+        self.settings["MEASUrement:STATIstics:MODe"] = "OFF"
+        for slot in range(1, N_MEASUREMENTS + 1):
+            self.settings[f"MEASUrement:MEAS{slot}:TYPe"] = "AMPlitude"
+            self.settings[f"MEASUrement:MEAS{slot}:SOUrce1"] = "CH1"
+            self.settings[f"MEASUrement:MEAS{slot}:SOUrce2"] = "CH2"
+            self.settings[f"MEASUrement:MEAS{slot}:STATE"] = "0"
+            self.settings[f"MEASUrement:MEAS{slot}:DELay:EDGE1"] = "RISe"
+            self.settings[f"MEASUrement:MEAS{slot}:DELay:EDGE2"] = "FALL"
+        # Per slot: last value and running count, mean, M2, min, max
+        self.measurements: Dict[int, List[float]] = {}
+        self._reset_statistics()
+        self.sample_interval = sample_interval
+        self.trigger_rate = 50e3
+        # Seconds from ACQuire:STATE RUN until the scope is armed
+        self.arm_time = 0.0
+        self.visa_resource = SimpleNamespace(timeout=5000)
+        self.busy_until = 0.0
+        # Frames x record length, per channel
+        self.records: Dict[int, np.ndarray] = {}
+        self.trigger_start = datetime.now()
+        self.trigger_times = np.zeros(1)
+        self.acquisitions = 0
+        self.log: List[str] = []
+        self.bytes_sent = 0
+        self.closed = False
+
+    # -- transport -------------------------------------------------------
+
+    def write(self, command: str, opc: bool = False, verbose: bool = True) -> None:
+        """Send one or more ';'-separated commands."""
+        for part in command.split(";"):
+            part = part.strip()
+            if part:
+                self._command(part)
+
+    def query(self, query: str, **kwargs) -> str:
+        """Send a query and return its text response."""
+        response = self._query(query.strip())
+        if isinstance(response, bytes):
+            response = response.decode().rstrip("\n")
+        self.bytes_sent += len(response) + 1
+        return response
+
+    def query_raw_binary(self, query: str, verbose: bool = True) -> bytes:
+        """Send a query and return the raw response bytes."""
+        response = self._query(query.strip())
+        if isinstance(response, str):
+            response = (response + "\n").encode()
+        self.bytes_sent += len(response)
+        return response
+
+    def close(self) -> None:
+        """Close the simulated connection."""
+        self.closed = True
+
+    # -- command handling -------------------------------------------------
+
+    def _setting(self, header: str) -> Optional[str]:
+        for key in self.settings:
+            if _matches(key, header):
+                return key
+        return None
+
+    def _command(self, command: str) -> None:
+        self.log.append(command)
+        header, _, argument = command.partition(" ")
+        argument = argument.strip()
+        if header.startswith("*"):
+            return
+        if _matches("MEASUrement:STATIstics", header) and _matches("RESET", argument):
+            self._reset_statistics()
+            return
+        key = self._setting(header)
+        if key is None:
+            raise ValueError(f"Unsupported command: {command}")
+        if key.endswith(":STATE"):
+            argument = "1" if argument.upper() in ("RUN", "ON", "1") else "0"
+        self.settings[key] = argument.strip('"').upper() if key == "DATa:ENCdg" else argument
+        if key == "ACQuire:STATE" and argument == "1":
+            self._acquire()
+
+    def _query(self, query: str):
+        self.log.append(query)
+        header, _, argument = query.partition("?")
+        header = header.strip()
+        if header.upper() == "*IDN":
+            return "TEKTRONIX,MDO32,SIM0001,CF:91.1CT FV:v1.30"
+        if header.upper() == "*OPC":
+            # Blocks until pending acquisitions complete, like the instrument
+            remaining = self.busy_until - _time.monotonic()
+            timeout = self.visa_resource.timeout / 1000.0
+            if remaining > timeout:
+                _time.sleep(timeout)
+                raise VisaTimeout(f"VI_ERROR_TMO: *OPC? timed out after {timeout} s")
+            if remaining > 0:
+                _time.sleep(remaining)
+            return "1"
+        if _matches("ACQuire:STATE", header):
+            return "1" if _time.monotonic() < self.busy_until else self.settings["ACQuire:STATE"]
+        if _matches("WFMOutpre", header):
+            return self._preamble()
+        if _matches("CURVe", header):
+            return self._curve()
+        for slot in range(1, N_MEASUREMENTS + 1):
+            for statistic in STATISTICS:
+                if _matches(f"MEASUrement:MEAS{slot}:{statistic}", header):
+                    return self._statistic(slot, statistic)
+        match = re.fullmatch(r"(.*):CH(\d)", header)
+        if match and _matches("HORizontal:FASTframe:TIMEStamp:ALL", match.group(1)):
+            return self._timestamps(argument)
+        key = self._setting(header)
+        if key is None:
+            raise ValueError(f"Unsupported query: {query}")
+        return self.settings[key]
+
+    # -- acquisition -------------------------------------------------------
+
+    @property
+    def record_length(self) -> int:
+        """Current horizontal record length."""
+        return int(float(self.settings["HORizontal:RECOrdlength"]))
+
+    def _time_axis(self) -> np.ndarray:
+        trigger = self.record_length * float(self.settings["HORizontal:POSition"]) / 100.0
+        return (np.arange(self.record_length) - trigger) * self.sample_interval
+
+    @property
+    def n_frames(self) -> int:
+        """Frames recorded per acquisition."""
+        if self.settings["HORizontal:FASTframe:STATE"] != "1":
+            return 1
+        return int(self.settings["HORizontal:FASTframe:COUNt"])
+
+    def _acquire(self) -> None:
+        time = self._time_axis()
+        n_frames = self.n_frames
+        self.records = {
+            channel: np.stack([signal(self.rng, time) for _ in range(n_frames)])
+            for channel, signal in self.signals.items()
+        }
+        # Triggers arrive at random with the configured mean rate
+        intervals = self.rng.exponential(1.0 / self.trigger_rate, n_frames - 1)
+        self.trigger_times = np.concatenate([[0.0], np.cumsum(intervals)])
+        self.trigger_start = datetime.now()
+        self.acquisitions += 1
+        self._measure()
+        # The acquisition lasts until the last trigger arrives
+        self.busy_until = _time.monotonic() + self.arm_time + self.trigger_times[-1] + 1.0 / self.trigger_rate
+        if self.settings["ACQuire:STOPAfter"].upper().startswith("SEQ"):
+            self.settings["ACQuire:STATE"] = "0"
+
+    def _window(self) -> Tuple[int, int]:
+        start = max(int(self.settings["DATa:STARt"]), 1)
+        stop = min(int(self.settings["DATa:STOP"]), self.record_length)
+        return start, max(stop, start)
+
+    def _source(self) -> int:
+        match = re.fullmatch(r"CH(\d)", self.settings["DATa:SOUrce"].upper())
+        if match is None:
+            raise ValueError(f"Unsupported data source: {self.settings['DATa:SOUrce']}")
+        return int(match.group(1))
+
+    def _scaling(self, channel: int) -> Tuple[int, float, float]:
+        width = int(self.settings["WFMOutpre:BYT_Nr"])
+        codes_per_div = CODES_PER_DIV[width]
+        y_mult = float(self.settings[f"CH{channel}:SCAle"]) / codes_per_div
+        y_off = float(self.settings[f"CH{channel}:POSition"]) * codes_per_div
+        return width, y_mult, y_off
+
+    def _frames(self) -> Tuple[int, int]:
+        if self.settings["HORizontal:FASTframe:STATE"] != "1":
+            return 1, 1
+        count = len(self.trigger_times)
+        first = min(max(int(self.settings["DATa:FRAMESTARt"]), 1), count)
+        last = min(max(int(self.settings["DATa:FRAMESTOP"]), first), count)
+        return first, last
+
+    def _codes(self, channel: int) -> np.ndarray:
+        if channel not in self.records:
+            self.records[channel] = np.zeros((len(self.trigger_times), self.record_length))
+        width, y_mult, y_off = self._scaling(channel)
+        start, stop = self._window()
+        first, last = self._frames()
+        volts = self.records[channel][first - 1:last, start - 1:stop].ravel()
+        limit = 2 ** (8 * width - 1)
+        codes = np.clip(np.round(volts / y_mult + y_off), -limit, limit - 1)
+        return codes.astype(np.int8 if width == 1 else np.int16)
+
+    def _preamble(self) -> str:
+        channel = self._source()
+        width, y_mult, y_off = self._scaling(channel)
+        start, stop = self._window()
+        encoding = self.settings["DATa:ENCdg"]
+        ascii_encoding = encoding.startswith("ASC")
+        byte_order = "LSB" if encoding.startswith("SRI") else "MSB"
+        x_zero = self._time_axis()[start - 1]
+        fields = [
+            str(width), str(8 * width), "ASC" if ascii_encoding else "BIN", "RI", byte_order,
+            f'"Ch{channel}, DC coupling, {self.settings[f"CH{channel}:SCAle"]}V/div, {stop - start + 1} points, Sample mode"',
+            str(stop - start + 1), "Y", '"s"', f"{self.sample_interval:.6E}", f"{x_zero:.6E}", "0",
+            '"V"', f"{y_mult:.6E}", f"{y_off:.6E}", "0.0E+0",
+        ]
+        return ";".join(fields)
+
+    def _curve(self):
+        codes = self._codes(self._source())
+        encoding = self.settings["DATa:ENCdg"]
+        if encoding.startswith("ASC"):
+            return ",".join(str(int(c)) for c in codes)
+        order = "<" if encoding.startswith("SRI") else ">"
+        payload = codes.astype(codes.dtype.newbyteorder(order)).tobytes()
+        length = str(len(payload))
+        return f"#{len(length)}{length}".encode() + payload + b"\n"
+
+    def _timestamps(self, argument: str) -> str:
+        # Arguments are the first frame and the number of frames
+        values = [int(v) for v in argument.split(",") if v.strip()] or [1, len(self.trigger_times)]
+        first = max(values[0], 1)
+        count = values[1] if len(values) > 1 else 1
+        stamps = []
+        for seconds in self.trigger_times[first - 1:first - 1 + count]:
+            whole, fraction = divmod(self.trigger_start.microsecond * 1e-6 + seconds, 1.0)
+            picoseconds = min(int(round(fraction * 1e12)), 10 ** 12 - 1)
+            stamp = self.trigger_start.replace(microsecond=0) + timedelta(seconds=whole)
+            stamps.append(f'"{stamp:%d %b %Y %H:%M:%S}.{picoseconds:012d}"')
+        return ",".join(stamps)
+
+    # -- measurements ------------------------------------------------------
+
+    def _reset_statistics(self) -> None:
+        self.measurements = {
+            slot: [np.nan, 0, 0.0, 0.0, np.inf, -np.inf] for slot in range(1, N_MEASUREMENTS + 1)
+        }
+
+    def _channel(self, source: str) -> int:
+        match = re.fullmatch(r"CH(\d)", source.upper())
+        if match is None:
+            raise ValueError(f"Unsupported measurement source: {source}")
+        return int(match.group(1))
+
+    def _measure(self) -> None:
+        # The instrument measures the (first) acquired frame of each source
+        for slot, state in self.measurements.items():
+            prefix = f"MEASUrement:MEAS{slot}"
+            if self.settings[f"{prefix}:STATE"] != "1":
+                continue
+            record = self.records[self._channel(self.settings[f"{prefix}:SOUrce1"])][0]
+            reference = self.records.get(self._channel(self.settings[f"{prefix}:SOUrce2"]))
+            value = measure(
+                self.settings[f"{prefix}:TYPe"], record, self.sample_interval,
+                None if reference is None else reference[0],
+                (self.settings[f"{prefix}:DELay:EDGE1"], self.settings[f"{prefix}:DELay:EDGE2"]),
+            )
+            state[0] = value
+            if np.isnan(value):
+                continue
+            # Welford update of the running statistics
+            count = state[1] + 1
+            delta = value - state[2]
+            state[2] += delta / count
+            state[3] += delta * (value - state[2])
+            state[1] = count
+            state[4] = min(state[4], value)
+            state[5] = max(state[5], value)
+
+    def _statistic(self, slot: int, statistic: str) -> str:
+        value, count, mean, m2, low, high = self.measurements[slot]
+        if _matches("COUNt", statistic):
+            return str(count)
+        if _matches("VALue", statistic):
+            result = value
+        elif count == 0:
+            result = np.nan
+        elif _matches("MEAN", statistic):
+            result = mean
+        elif _matches("STDdev", statistic):
+            result = np.sqrt(m2 / count)
+        elif _matches("MINImum", statistic):
+            result = low
+        else:
+            result = high
+        return f"{NOT_A_NUMBER if np.isnan(result) else result:.9E}"
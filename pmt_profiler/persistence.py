@@ -0,0 +1,211 @@
+"""Persistence-style density plots of large pulse overlays.
+
+Instead of one matplotlib line per pulse, traces are accumulated into a
+fixed 2D time x amplitude histogram and drawn as a single image, like a
+scope's persistence display. Samples can be linearly interpolated between
+neighbours so fast edges are filled in. Small sets can still be drawn as
+lines, batched into one LineCollection.
+"""
+
+from typing import Optional, Tuple
+import numpy as np
+
+class PersistenceHistogram:
+    """Time x amplitude hit counts over fixed ranges, filled incrementally."""
+
+    def __init__(
+        self,
+        time_range: Tuple[float, float],
+        amplitude_range: Tuple[float, float],
+        bins: Tuple[int, int] = (500, 256),
+        oversample: int = 1
+    ):
+        """Initialize an empty histogram.
+
+        Args:
+            time_range: (start, stop) of the time axis in seconds
+            amplitude_range: (low, high) of the amplitude axis
+            bins: Number of (time, amplitude) bins
+            oversample: Points per sample interval, linearly interpolated
+                between samples to fill in fast edges; 1 bins only the
+                samples themselves and is fastest
+        """
+        self.time_range = (float(time_range[0]), float(time_range[1]))
+        self.amplitude_range = (float(amplitude_range[0]), float(amplitude_range[1]))
+        self.bins = (int(bins[0]), int(bins[1]))
+        self.oversample = max(1, int(oversample))
+        self.counts = np.zeros(self.bins, dtype=np.int64)
+        self.traces = 0
+
+    @property
+    def extent(self) -> Tuple[float, float, float, float]:
+        """Image extent (left, right, bottom, top) for imshow."""
+        return self.time_range + self.amplitude_range
+
+    def _interpolate(self, values: np.ndarray) -> np.ndarray:
+        # Points between consecutive samples, plus the final sample
+        if self.oversample == 1 or values.shape[-1] < 2:
+            return values
+        step = (np.arange(self.oversample) / self.oversample).astype(values.dtype)
+        between = values[..., :-1, None] + np.diff(values, axis=-1)[..., None] * step
+        return np.concatenate([between.reshape(values.shape[:-1] + (-1,)), values[..., -1:]], axis=-1)
+
+    def _column_offsets(self, time: np.ndarray) -> np.ndarray:
+        # Offset of each point's time column in the padded count array;
+        # points outside the time range go to a spare column that is dropped
+        n_time, n_amplitude = self.bins
+        t_lo, t_hi = self.time_range
+        column = np.floor((time - t_lo) * (n_time / (t_hi - t_lo)))
+        # The end of the range belongs to the last column
+        column[time == t_hi] = n_time - 1
+        column = np.where((column >= 0) & (column < n_time), column, n_time).astype(np.intp)
+        return column * (n_amplitude + 2) + 1
+
+    def add(self, time: np.ndarray, amplitude: np.ndarray, block_size: int = 1024) -> None:
+        """Accumulate a batch of traces.
+
+        Args:
+            time: Length-L time axis shared by all traces, or N x L times
+            amplitude: N x L traces
+            block_size: Traces binned at a time to bound memory
+        """
+        amplitude = np.atleast_2d(amplitude)
+        time = np.asarray(time, dtype=np.float64)
+        n_traces = len(amplitude)
+        n_time, n_amplitude = self.bins
+        a_lo, a_hi = self.amplitude_range
+        # float32 traces (as read from CSV or a store) are binned in float32
+        dtype = np.float32 if amplitude.dtype == np.float32 else np.float64
+        offset, scale = dtype(a_lo), dtype(n_amplitude / (a_hi - a_lo))
+
+        # Each time column has an underflow and an overflow amplitude bin, so
+        # every point lands in the padded array without masking
+        padded = np.zeros((n_time + 1) * (n_amplitude + 2), dtype=np.int64)
+        if time.ndim == 1:
+            shared = self._column_offsets(self._interpolate(time))
+        for lo in range(0, n_traces, block_size):
+            hi = min(lo + block_size, n_traces)
+            row = self._interpolate(np.asarray(amplitude[lo:hi], dtype=dtype)) - offset
+            row *= scale
+            np.floor(row, out=row)
+            # fmax/fmin also send NaN samples to the dropped underflow bin
+            np.fmax(row, -1, out=row)
+            np.fmin(row, n_amplitude, out=row)
+            index = row.astype(np.intp)
+            index += shared if time.ndim == 1 else self._column_offsets(self._interpolate(time[lo:hi]))
+            padded += np.bincount(index.ravel(), minlength=len(padded))
+        self.counts += padded.reshape(n_time + 1, n_amplitude + 2)[:n_time, 1:-1]
+        self.traces += n_traces
+
+    def merge(self, other: "PersistenceHistogram") -> None:
+        """Add the counts of a histogram with the same ranges and bins.
+
+        Args:
+            other: Histogram to add
+        """
+        if (other.time_range, other.amplitude_range, other.bins) != (self.time_range, self.amplitude_range, self.bins):
+            raise ValueError("Histograms must have the same ranges and bins to be merged")
+        self.counts += other.counts
+        self.traces += other.traces
+
+def persistence_histogram(
+    time: np.ndarray,
+    amplitude: np.ndarray,
+    bins: Tuple[int, int] = (500, 256),
+    oversample: int = 1,
+    margin: float = 0.05
+) -> PersistenceHistogram:
+    """Histogram of a pulse array with ranges taken from the data.
+
+    Args:
+        time: Length-L shared time axis, or N x L times
+        amplitude: N x L traces
+        bins: Number of (time, amplitude) bins
+        oversample: Interpolated points per sample interval
+        margin: Fraction of the amplitude span added above and below
+
+    Returns:
+        PersistenceHistogram: Filled histogram
+    """
+    time = np.asarray(time)
+    a_lo, a_hi = float(np.nanmin(amplitude)), float(np.nanmax(amplitude))
+    pad = (a_hi - a_lo) * margin or 1.0
+    histogram = PersistenceHistogram(
+        (float(np.nanmin(time)), float(np.nanmax(time))), (a_lo - pad, a_hi + pad), bins, oversample
+    )
+    histogram.add(time, amplitude)
+    return histogram
+
+def draw_persistence(ax, histogram: PersistenceHistogram, log: bool = True, cmap: str = "inferno", **kwargs):
+    """Draw a persistence histogram as one image.
+
+    Args:
+        ax: Matplotlib axes
+        histogram: Filled histogram
+        log: Use a logarithmic color scale, so rare traces stay visible
+        cmap: Colormap name
+        **kwargs: Passed to imshow
+
+    Returns:
+        The AxesImage
+    """
+    from matplotlib.colors import LogNorm
+    counts = np.ma.masked_equal(histogram.counts.T, 0)
+    norm = LogNorm(vmin=1, vmax=max(int(histogram.counts.max()), 1)) if log else None
+    return ax.imshow(
+        counts, origin="lower", aspect="auto", extent=histogram.extent,
+        cmap=cmap, norm=norm, interpolation="nearest", **kwargs
+    )
+
+def draw_lines(ax, time: np.ndarray, amplitude: np.ndarray, alpha: float = 0.7, linewidth: float = 0.5, **kwargs):
+    """Draw traces as a single LineCollection.
+
+    Args:
+        ax: Matplotlib axes
+        time: Length-L shared time axis, or N x L times
+        amplitude: N x L traces
+        alpha: Line transparency
+        linewidth: Line width
+        **kwargs: Passed to LineCollection
+
+    Returns:
+        The LineCollection
+    """
+    import matplotlib
+    from matplotlib.collections import LineCollection
+    amplitude = np.atleast_2d(amplitude)
+    time = np.broadcast_to(np.asarray(time, dtype=np.float64), amplitude.shape)
+    if "color" not in kwargs and "colors" not in kwargs:
+        # Cycle through the default line colors, like repeated ax.plot calls
+        kwargs["colors"] = matplotlib.rcParams["axes.prop_cycle"].by_key()["color"]
+    lines = LineCollection(np.stack([time, amplitude], axis=2), alpha=alpha, linewidth=linewidth, **kwargs)
+    ax.add_collection(lines)
+    ax.autoscale_view()
+    return lines
+
+def plot_pulses(
+    ax,
+    time: np.ndarray,
+    amplitude: np.ndarray,
+    line_limit: int = 1000,
+    bins: Tuple[int, int] = (500, 256),
+    histogram: Optional[PersistenceHistogram] = None
+):
+    """Overlay pulses as lines for small sets and as a density image otherwise.
+
+    Args:
+        ax: Matplotlib axes
+        time: Length-L shared time axis, or N x L times
+        amplitude: N x L traces
+        line_limit: Most traces drawn as individual lines
+        bins: Histogram bins used above line_limit
+        histogram: Prefilled histogram to draw instead of binning amplitude
+
+    Returns:
+        The LineCollection or AxesImage
+    """
+    if histogram is None and len(np.atleast_2d(amplitude)) <= line_limit:
+        return draw_lines(ax, time, amplitude)
+    if histogram is None:
+        histogram = persistence_histogram(time, amplitude, bins)
+    return draw_persistence(ax, histogram)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+"""Pipelined MDO32 acquisition: decode and save while the scope acquires.
+
+The scope holds one acquisition and talks over one connection, so arming,
+waiting and the CURVe? transfer stay in sequence on the acquisition thread.
+Everything after the transfer (decoding the binary block, scaling to volts
+and writing to disk) runs on a background worker, so frame set k is saved
+while the scope is already acquiring k+1. A bounded queue between the two
+applies backpressure when saving falls behind.
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
+from rich.console import Console
+from .mdo32 import (
+    COMPLETION_METHODS,
+    Frames,
+    configure_fastframe,
+    decode_frames,
+    read_raw_frames,
+    save_curve,
+    wait_for_acquisition,
+)
+
+console = Console()
+
+@dataclass
+class PipelineStats:
+    """Throughput of a pipelined acquisition run."""
+
+    acquisitions: int = 0
+    pulses: int = 0
+    elapsed: float = 0.0
+    acquire_time: float = 0.0
+    transfer_time: float = 0.0
+    persist_time: float = 0.0
+    queue_depths: List[int] = field(default_factory=list)
+
+    @property
+    def pulses_per_second(self) -> float:
+        """Sustained rate of saved pulses."""
+        return self.pulses / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def max_queue_depth(self) -> int:
+        """Most transfers waiting to be saved at once."""
+        return max(self.queue_depths, default=0)
+
+    @property
+    def mean_queue_depth(self) -> float:
+        """Average number of transfers waiting to be saved."""
+        return sum(self.queue_depths) / len(self.queue_depths) if self.queue_depths else 0.0
+
+class NpzSink:
+    """Save each frame set to its own .npz file in a directory."""
+
+    def __init__(self, directory: str, prefix: str = "frames"):
+        """Initialize the sink.
+
+        Args:
+            directory: Output directory, created if needed
+            prefix: File name prefix
+        """
+        self.directory = directory
+        self.prefix = prefix
+        self.written: List[str] = []
+        os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, index: int, frames: Frames) -> None:
+        filename = os.path.join(self.directory, f"{self.prefix}_{index:05d}.npz")
+        save_curve(
+            filename, frames.preamble, frames.time, frames.amplitude,
+            timestamps=frames.timestamps, start=frames.start.isoformat(),
+        )
+        self.written.append(filename)
+
+def run_pipeline(
+    scope,
+    n_acquisitions: int,
+    n_frames: int,
+    sink: Callable[[int, Frames], None],
+    channel: int = 1,
+    width: int = 1,
+    queue_size: int = 2,
+    timeout: float = 60.0,
+    method: str = "opc",
+    dtype: Any = None,
+    on_update: Optional[Callable[[PipelineStats], None]] = None
+) -> PipelineStats:
+    """Acquire FastFrame sets back to back while a worker saves earlier sets.
+
+    Args:
+        scope: MDO3K oscilloscope instance
+        n_acquisitions: Number of FastFrame acquisitions
+        n_frames: Triggered frames per acquisition
+        sink: Called on the worker thread with (index, frames) for each set
+        channel: Channel number to transfer
+        width: Bytes per sample, 1 (8-bit) or 2 (16-bit)
+        queue_size: Transfers that may wait to be saved before acquisition
+            blocks (backpressure)
+        timeout: Seconds to wait for each acquisition
+        method: Completion method, "opc" or "poll"
+        dtype: Output dtype of the amplitude (default: float32)
+        on_update: Called on the acquisition thread after every transfer
+
+    Returns:
+        PipelineStats: Counts, stage times and queue depths of the run
+    """
+    if queue_size < 1:
+        raise ValueError(f"Queue size must be positive, got {queue_size}")
+    pending: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    stats = PipelineStats()
+    errors: List[BaseException] = []
+
+    def worker() -> None:
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            index, raw = item
+            try:
+                started = time.perf_counter()
+                frames = decode_frames(raw, dtype)
+                sink(index, frames)
+                stats.persist_time += time.perf_counter() - started
+                stats.pulses += len(frames)
+            except BaseException as e:
+                errors.append(e)
+                return
+
+    def put(item) -> None:
+        # Block while the queue is full, but not on a worker that has died
+        while thread.is_alive():
+            try:
+                pending.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    thread = threading.Thread(target=worker, name="mdo32-pipeline", daemon=True)
+    configure_fastframe(scope, n_frames)
+    start = time.perf_counter()
+    thread.start()
+    try:
+        for index in range(n_acquisitions):
+            if errors:
+                break
+            started = time.perf_counter()
+            scope.write("ACQuire:STATE RUN")
+            wait_for_acquisition(scope, timeout, method)
+            transferred = time.perf_counter()
+            raw = read_raw_frames(scope, n_frames, channel, width)
+            stats.acquire_time += transferred - started
+            stats.transfer_time += time.perf_counter() - transferred
+            put((index, raw))
+            stats.queue_depths.append(pending.qsize())
+            stats.acquisitions += 1
+            stats.elapsed = time.perf_counter() - start
+            if on_update is not None:
+                on_update(stats)
+    finally:
+        put(None)
+        thread.join()
+        stats.elapsed = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+    return stats
+
+def main():
+    """Main function to run a pipelined acquisition."""
+    import argparse
+    from .mdo32 import open_session
+    parser = argparse.ArgumentParser(description="Acquire FastFrame pulse sets while saving earlier ones")
+    parser.add_argument("output", help="Directory for the saved frame sets")
+    parser.add_argument("--ip", help="IP address of the oscilloscope")
+    parser.add_argument("--acquisitions", type=int, default=10, help="Number of acquisitions (default: 10)")
+    parser.add_argument("--frames", type=int, default=1000, help="Frames per acquisition (default: 1000)")
+    parser.add_argument("--channel", type=int, default=1, help="Channel number (default: 1)")
+    parser.add_argument("--width", type=int, choices=[1, 2], default=2, help="Bytes per sample (default: 2)")
+    parser.add_argument("--queue-size", type=int, default=2, help="Transfers buffered before blocking (default: 2)")
+    parser.add_argument("--completion", choices=COMPLETION_METHODS, default="opc",
+                       help="Completion method (default: opc)")
+    args = parser.parse_args()
+
+    def report(stats: PipelineStats) -> None:
+        console.print(
+            f"[cyan]{stats.acquisitions}/{args.acquisitions} acquisitions, "
+            f"{stats.pulses_per_second:.0f} pulses/s, queue depth {stats.queue_depths[-1]}"
+        )
+
+    try:
+        scope = open_session(args.ip)
+        stats = run_pipeline(
+            scope, args.acquisitions, args.frames, NpzSink(args.output),
+            channel=args.channel, width=args.width, queue_size=args.queue_size,
+            method=args.completion, on_update=report,
+        )
+        console.print(
+            f"[green]Saved {stats.pulses} pulses in {stats.elapsed:.1f} s "
+            f"({stats.pulses_per_second:.0f} pulses/s, max queue depth {stats.max_queue_depth})"
+        )
+    except Exception as e:
+        console.print(f"[red]Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python
+"""Single-photoelectron (SPE) charge spectra and PMT gain calibration.
+
+Pulse charges are streamed into a ChargeHistogram with fixed-width bins that
+grows as new charges arrive, so millions of pulses per gain setting never
+have to be held in memory. fit_spe then fits a pedestal plus 1, 2 and 3
+photoelectron peaks to the histogram to get the gain and SPE resolution.
+"""
+
+import sys
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from .features import extract_features
+
+console = Console()
+
+ELEMENTARY_CHARGE = 1.602176634e-19
+
+# Most bins a histogram may grow to (80 MB of counts)
+MAX_BINS = 10_000_000
+
+class ChargeHistogram:
+    """Fixed-bin charge histogram that extends its range as it is filled.
+
+    Bin k covers ``[k * bin_width, (k + 1) * bin_width)``, so histograms with
+    the same bin width can be merged regardless of the order or range of the
+    charges they saw.
+    """
+
+    def __init__(self, bin_width: float, limits: Optional[Tuple[float, float]] = None):
+        """Initialize an empty histogram.
+
+        Args:
+            bin_width: Bin width in coulombs
+            limits: Optional (low, high) charge range; charges outside it are
+                only counted as underflow/overflow, so outliers cannot grow
+                the histogram without bound
+        """
+        if bin_width <= 0:
+            raise ValueError("bin_width must be positive")
+        self.bin_width = float(bin_width)
+        self.limits = limits
+        self.first_bin = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    @property
+    def entries(self) -> int:
+        """Number of charges inside the histogram range."""
+        return int(self.counts.sum())
+
+    @property
+    def edges(self) -> np.ndarray:
+        """Bin edges in coulombs."""
+        return (self.first_bin + np.arange(len(self.counts) + 1)) * self.bin_width
+
+    @property
+    def centers(self) -> np.ndarray:
+        """Bin centers in coulombs."""
+        return (self.first_bin + np.arange(len(self.counts)) + 0.5) * self.bin_width
+
+    def _extend(self, lo: int, hi: int) -> None:
+        if len(self.counts):
+            lo, hi = min(lo, self.first_bin), max(hi, self.first_bin + len(self.counts) - 1)
+        if hi - lo + 1 > MAX_BINS:
+            raise ValueError(
+                f"Histogram would need {hi - lo + 1} bins (more than {MAX_BINS}); "
+                "set limits to exclude outlying charges"
+            )
+        if lo == self.first_bin and hi - lo + 1 == len(self.counts):
+            return
+        counts = np.zeros(hi - lo + 1, dtype=np.int64)
+        counts[self.first_bin - lo:self.first_bin - lo + len(self.counts)] = self.counts
+        self.first_bin, self.counts = lo, counts
+
+    def fill(self, charges: np.ndarray) -> None:
+        """Add a batch of charges.
+
+        Args:
+            charges: Pulse charges in coulombs; NaNs are ignored
+        """
+        charges = np.asarray(charges, dtype=np.float64).ravel()
+        charges = charges[np.isfinite(charges)]
+        if self.limits is not None:
+            low, high = self.limits
+            self.underflow += int(np.count_nonzero(charges < low))
+            self.overflow += int(np.count_nonzero(charges >= high))
+            charges = charges[(charges >= low) & (charges < high)]
+        if len(charges) == 0:
+            return
+        index = np.floor(charges / self.bin_width).astype(np.int64)
+        self._extend(int(index.min()), int(index.max()))
+        self.counts += np.bincount(index - self.first_bin, minlength=len(self.counts))
+
+    def merge(self, other: "ChargeHistogram") -> None:
+        """Add the counts of another histogram with the same bin width.
+
+        Args:
+            other: Histogram to add
+        """
+        if not np.isclose(other.bin_width, self.bin_width, rtol=1e-9, atol=0):
+            raise ValueError("Histograms must have the same bin width to be merged")
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        if len(other.counts) == 0:
+            return
+        self._extend(other.first_bin, other.first_bin + len(other.counts) - 1)
+        start = other.first_bin - self.first_bin
+        self.counts[start:start + len(other.counts)] += other.counts
+
+    def save(self, filename: str) -> None:
+        """Save the histogram as a compressed .npz file.
+
+        Args:
+            filename: Output path
+        """
+        limits = np.array(self.limits if self.limits is not None else [np.nan, np.nan])
+        np.savez_compressed(
+            filename,
+            bin_width=self.bin_width,
+            first_bin=self.first_bin,
+            counts=self.counts,
+            underflow=self.underflow,
+            overflow=self.overflow,
+            limits=limits,
+        )
+
+    @classmethod
+    def load(cls, filename: str) -> "ChargeHistogram":
+        """Load a histogram saved with save.
+
+        Args:
+            filename: Path of the .npz file
+
+        Returns:
+            ChargeHistogram: The stored histogram
+        """
+        with np.load(filename) as data:
+            limits = data["limits"]
+            histogram = cls(
+                float(data["bin_width"]),
+                None if np.isnan(limits).any() else (float(limits[0]), float(limits[1])),
+            )
+            histogram.first_bin = int(data["first_bin"])
+            histogram.counts = data["counts"].astype(np.int64)
+            histogram.underflow = int(data["underflow"])
+            histogram.overflow = int(data["overflow"])
+        return histogram
+
+@dataclass
+class SPEFit:
+    """Result of a pedestal + multi-photoelectron fit. Charges in C."""
+
+    pedestal: float
+    pedestal_sigma: float
+    spe_charge: float
+    spe_sigma: float
+    mean_pe: float
+    entries: int
+    chi2_ndf: float
+
+    @property
+    def gain(self) -> float:
+        """PMT gain in electrons per photoelectron."""
+        return self.spe_charge / ELEMENTARY_CHARGE
+
+    @property
+    def resolution(self) -> float:
+        """Relative width of the SPE peak (sigma / mean)."""
+        return self.spe_sigma / self.spe_charge
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the fit, with gain and resolution, as a dictionary."""
+        result = asdict(self)
+        result.update(gain=self.gain, resolution=self.resolution)
+        return result
+
+def spe_model(
+    x: np.ndarray,
+    norm: float,
+    mean_pe: float,
+    pedestal: float,
+    pedestal_sigma: float,
+    spe_charge: float,
+    spe_sigma: float,
+    n_pe: int = 3
+) -> np.ndarray:
+    """Expected counts of a Poisson-weighted sum of Gaussian PE peaks.
+
+    The n-photoelectron peak sits at ``pedestal + n * spe_charge`` with width
+    ``sqrt(pedestal_sigma**2 + n * spe_sigma**2)``.
+
+    Args:
+        x: Charges at which to evaluate the model
+        norm: Total counts times the bin width
+        mean_pe: Mean number of photoelectrons per pulse
+        pedestal: Pedestal position
+        pedestal_sigma: Pedestal width
+        spe_charge: Mean single-photoelectron charge
+        spe_sigma: Width of the single-photoelectron peak
+        n_pe: Highest photoelectron peak included
+
+    Returns:
+        np.ndarray: Expected counts per bin
+    """
+    n = np.arange(n_pe + 1)[:, None]
+    weight = np.exp(-mean_pe) * mean_pe ** n / np.cumprod(np.maximum(n, 1), axis=0)
+    sigma = np.sqrt(pedestal_sigma ** 2 + n * spe_sigma ** 2)
+    peaks = np.exp(-0.5 * ((x[None, :] - pedestal - n * spe_charge) / sigma) ** 2) / (np.sqrt(2 * np.pi) * sigma)
+    return norm * np.sum(weight * peaks, axis=0)
+
+def _initial_guess(
+    x: np.ndarray,
+    counts: np.ndarray,
+    spe_guess: Optional[float]
+) -> Tuple[float, float, float, float, float, float]:
+    # Pedestal from the most populated bin and its half-maximum width
+    top = int(np.argmax(counts))
+    half = counts >= counts[top] / 2
+    left = top - np.argmin(half[top::-1]) if not half[:top + 1].all() else 0
+    right = top + np.argmin(half[top:]) if not half[top:].all() else len(counts)
+    pedestal = x[top]
+    pedestal_sigma = max((right - left) / 2.355, 0.5)
+
+    if spe_guess is None:
+        above = x > pedestal + 5 * pedestal_sigma
+        if counts[above].sum() == 0:
+            raise ValueError("No counts above the pedestal; cannot locate the SPE peak")
+        smoothed = np.convolve(counts, np.ones(5) / 5, mode="same")
+        spe_guess = x[above][np.argmax(smoothed[above])] - pedestal
+    total = counts.sum()
+    in_pedestal = counts[np.abs(x - pedestal) <= 3 * pedestal_sigma].sum()
+    mean_pe = float(np.clip(-np.log(max(in_pedestal, 1) / total), 0.05, 5.0))
+    return total, mean_pe, pedestal, pedestal_sigma, spe_guess, 0.4 * spe_guess
+
+def fit_spe(histogram: ChargeHistogram, n_pe: int = 3, spe_guess: Optional[float] = None) -> SPEFit:
+    """Fit pedestal plus 1..n_pe photoelectron peaks to a charge histogram.
+
+    Args:
+        histogram: Filled charge histogram
+        n_pe: Highest photoelectron peak in the model (default: 3)
+        spe_guess: Starting SPE charge in coulombs, if the automatic guess
+            (highest bin beyond the pedestal) is unreliable
+
+    Returns:
+        SPEFit: Fitted pedestal, SPE charge and width, and mean PE per pulse
+    """
+    from scipy.optimize import curve_fit
+
+    if histogram.entries == 0:
+        raise ValueError("Cannot fit an empty histogram")
+    # Fit in units of bins so all parameters are of order one
+    width = histogram.bin_width
+    x = histogram.centers / width
+    counts = histogram.counts.astype(np.float64)
+    guess = _initial_guess(x, counts, None if spe_guess is None else spe_guess / width)
+
+    def model(x, norm, mean_pe, pedestal, pedestal_sigma, spe_charge, spe_sigma):
+        return spe_model(x, norm, mean_pe, pedestal, pedestal_sigma, spe_charge, spe_sigma, n_pe)
+
+    sigma = np.sqrt(np.maximum(counts, 1.0))
+    lower = [0, 1e-3, -np.inf, 1e-3, 1e-3, 1e-3]
+    upper = [np.inf, 20, np.inf, np.inf, np.inf, np.inf]
+    params, _ = curve_fit(model, x, counts, p0=guess, sigma=sigma, bounds=(lower, upper), maxfev=20000)
+    residual = (counts - model(x, *params)) / sigma
+    ndf = max(len(x) - len(params), 1)
+
+    norm, mean_pe, pedestal, pedestal_sigma, spe_charge, spe_sigma = params
+    return SPEFit(
+        pedestal=float(pedestal * width),
+        pedestal_sigma=float(pedestal_sigma * width),
+        spe_charge=float(spe_charge * width),
+        spe_sigma=float(spe_sigma * width),
+        mean_pe=float(mean_pe),
+        entries=histogram.entries,
+        chi2_ndf=float(np.sum(residual ** 2) / ndf),
+    )
+
+def histogram_store(
+    store,
+    bin_width: float,
+    limits: Optional[Tuple[float, float]] = None,
+    block_size: int = 65536,
+    **feature_options
+) -> ChargeHistogram:
+    """Stream the pulse charges of a waveform store into a histogram.
+
+    Args:
+        store: WaveformStore (or its directory) of one gain setting
+        bin_width: Bin width in coulombs
+        limits: Optional (low, high) charge range of the histogram
+        block_size: Pulses read from the memory map at a time
+        **feature_options: Passed to extract_features (e.g. charge_window)
+
+    Returns:
+        ChargeHistogram: Charge spectrum of all pulses in the store
+    """
+    from .store import WaveformStore
+    if isinstance(store, str):
+        store = WaveformStore(store)
+    histogram = ChargeHistogram(bin_width, limits)
+    for lo in range(0, len(store), block_size):
+        hi = min(lo + block_size, len(store))
+        table = extract_features(
+            store.amplitude[lo:hi], store.sample_interval[lo:hi], store.t0[lo:hi], **feature_options
+        )
+        histogram.fill(table.charge)
+    return histogram
+
+def calibrate_gains(
+    histograms: Dict[Any, ChargeHistogram],
+    n_pe: int = 3,
+    spe_guess: Optional[float] = None
+) -> Dict[Any, SPEFit]:
+    """Fit the charge spectrum of every gain setting.
+
+    Args:
+        histograms: Charge histogram per setting (e.g. C3_GainHV value)
+        n_pe: Highest photoelectron peak in the model
+        spe_guess: Optional starting SPE charge in coulombs
+
+    Returns:
+        Dict mapping each setting to its SPEFit
+    """
+    return {setting: fit_spe(h, n_pe, spe_guess) for setting, h in histograms.items()}
+
+def main():
+    """Main function to calibrate PMT gain from waveform stores."""
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Fit SPE charge spectra to measure PMT gain")
+    parser.add_argument("stores", nargs="+", help="Waveform store directories, one per gain setting")
+    parser.add_argument("--gains", nargs="+", help="GainHV setting of each store (default: store names)")
+    parser.add_argument("--bin-width", type=float, default=0.01, help="Histogram bin width in pC (default: 0.01)")
+    parser.add_argument("--limits", nargs=2, type=float, default=[-5.0, 100.0], metavar=("LOW", "HIGH"),
+                       help="Histogram charge range in pC (default: -5 100)")
+    parser.add_argument("--spe-guess", type=float, help="Starting SPE charge in pC")
+    parser.add_argument("--output", help="JSON file for the fit results")
+    args = parser.parse_args()
+
+    try:
+        gains = args.gains or args.stores
+        if len(gains) != len(args.stores):
+            raise ValueError("--gains needs one value per store")
+        limits = (args.limits[0] * 1e-12, args.limits[1] * 1e-12)
+        histograms = {
+            gain: histogram_store(store, args.bin_width * 1e-12, limits) for gain, store in zip(gains, args.stores)
+        }
+        spe_guess = None if args.spe_guess is None else args.spe_guess * 1e-12
+        fits = calibrate_gains(histograms, spe_guess=spe_guess)
+
+        table = Table(title="SPE Gain Calibration")
+        for column in ("Setting", "Pulses", "SPE charge (pC)", "Gain", "Resolution", "Mean PE", "chi2/ndf"):
+            table.add_column(column)
+        for gain, fit in fits.items():
+            table.add_row(
+                str(gain), str(fit.entries), f"{fit.spe_charge * 1e12:.4f}", f"{fit.gain:.3e}",
+                f"{fit.resolution:.1%}", f"{fit.mean_pe:.3f}", f"{fit.chi2_ndf:.2f}",
+            )
+        console.print(table)
+
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({str(gain): fit.to_dict() for gain, fit in fits.items()}, f, indent=2)
+            console.print(f"[green]Wrote {args.output}")
+    except Exception as e:
+        console.print(f"[red]Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+"""Memory-mapped waveform store for directories of single-pulse CSVs.
+
+A store is a directory holding:
+
+* ``amplitude.f32``: all records packed as one contiguous float32
+  N_pulses x record_length array, appended in file order
+* ``index.jsonl``: one JSON line of metadata per record (source file,
+  timestamp, timebase, vertical scale, first sample time)
+
+Packing is incremental: files already listed in the index are skipped, so
+rerunning the converter only appends new pulses.
+"""
+
+import glob
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, List
+import numpy as np
+from rich.console import Console
+from .waveform import read_waveform
+
+console = Console()
+
+DATA_FILE = "amplitude.f32"
+INDEX_FILE = "index.jsonl"
+DEFAULT_PATTERN = "tek*ALL.csv"
+
+def _read_index(store_path: str) -> List[Dict[str, Any]]:
+    index_file = os.path.join(store_path, INDEX_FILE)
+    if not os.path.exists(index_file):
+        return []
+    with open(index_file, "r") as f:
+        lines = f.read().split("\n")
+    # Text after the last newline is a line cut off by an interrupted pack
+    return [json.loads(line) for line in lines[:-1] if line.strip()]
+
+def _truncate_partial_line(index_file: str) -> None:
+    with open(index_file, "r+b") as f:
+        content = f.read()
+        if content and not content.endswith(b"\n"):
+            f.truncate(content.rfind(b"\n") + 1)
+
+class WaveformStore:
+    """Read-only view of a packed waveform store."""
+
+    def __init__(self, store_path: str):
+        """Open a store created by pack_directory.
+
+        Args:
+            store_path: Directory of the store
+        """
+        if not os.path.isdir(store_path):
+            raise FileNotFoundError(f"Waveform store not found: {store_path}")
+        self.store_path = store_path
+        self.metadata = _read_index(store_path)
+        self.record_length = self.metadata[0]["record_length"] if self.metadata else 0
+        self._amplitude = None
+
+    def __len__(self) -> int:
+        return len(self.metadata)
+
+    @property
+    def amplitude(self) -> np.ndarray:
+        """N_pulses x record_length float32 array, memory-mapped read-only."""
+        if self._amplitude is None:
+            if not self.metadata:
+                self._amplitude = np.empty((0, 0), dtype=np.float32)
+            else:
+                self._amplitude = np.memmap(
+                    os.path.join(self.store_path, DATA_FILE),
+                    dtype=np.float32,
+                    mode="r",
+                    shape=(len(self.metadata), self.record_length),
+                )
+        return self._amplitude
+
+    @property
+    def sources(self) -> List[str]:
+        """Source file name of each record."""
+        return [m["source"] for m in self.metadata]
+
+    @property
+    def sample_interval(self) -> np.ndarray:
+        """Sample interval of each record in seconds."""
+        return np.array([m["sample_interval"] for m in self.metadata])
+
+    @property
+    def t0(self) -> np.ndarray:
+        """Time of the first sample of each record in seconds."""
+        return np.array([m["t0"] for m in self.metadata])
+
+    def time_axis(self, index: int = 0) -> np.ndarray:
+        """Return the time axis of one record.
+
+        Args:
+            index: Record index
+
+        Returns:
+            np.ndarray: Sample times in seconds
+        """
+        meta = self.metadata[index]
+        return meta["t0"] + np.arange(self.record_length) * meta["sample_interval"]
+
+def pack_directory(
+    directory: str,
+    store_path: str,
+    pattern: str = DEFAULT_PATTERN
+) -> int:
+    """Append waveform CSVs from a directory to a store.
+
+    Files whose name is already in the store index are skipped. Records
+    whose length differs from the store's record length are skipped with
+    a warning.
+
+    Args:
+        directory: Directory containing the CSV exports
+        store_path: Store directory (created if missing)
+        pattern: Glob pattern for the CSV files (default: tek*ALL.csv)
+
+    Returns:
+        int: Number of records appended
+    """
+    os.makedirs(store_path, exist_ok=True)
+    metadata = _read_index(store_path)
+    seen = {m["source"] for m in metadata}
+    record_length = metadata[0]["record_length"] if metadata else None
+
+    # Drop samples and a partial index line left behind by an interrupted run
+    index_file = os.path.join(store_path, INDEX_FILE)
+    if os.path.exists(index_file):
+        _truncate_partial_line(index_file)
+    data_file = os.path.join(store_path, DATA_FILE)
+    if os.path.exists(data_file):
+        expected = len(metadata) * (record_length or 0) * np.dtype(np.float32).itemsize
+        if os.path.getsize(data_file) > expected:
+            with open(data_file, "r+b") as f:
+                f.truncate(expected)
+
+    files = sorted(glob.glob(os.path.join(directory, pattern)))
+    new_files = [f for f in files if os.path.basename(f) not in seen]
+
+    appended = 0
+    with open(data_file, "ab") as data, open(index_file, "a") as index:
+        for path in new_files:
+            header, time, amplitude = read_waveform(path)
+            if record_length is None:
+                record_length = len(amplitude)
+            if len(amplitude) != record_length:
+                console.print(
+                    f"[yellow]Skipping {path}: {len(amplitude)} points, store holds {record_length}"
+                )
+                continue
+            # Samples must reach the data file before the index line that references them
+            data.write(amplitude.tobytes())
+            data.flush()
+            index.write(json.dumps({
+                "source": os.path.basename(path),
+                "timestamp": datetime.fromtimestamp(os.path.getmtime(path)).isoformat(),
+                "record_length": record_length,
+                "sample_interval": header.sample_interval,
+                "t0": float(time[0]),
+                "vertical_scale": header.vertical_scale,
+                "vertical_offset": header.vertical_offset,
+            }) + "\n")
+            appended += 1
+
+    console.print(f"[green]Appended {appended} records to {store_path} ({len(metadata) + appended} total)")
+    return appended
+
+def main():
+    """Main function to run the converter."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Pack waveform CSVs into a memory-mapped store")
+    parser.add_argument("directory", help="Directory containing the waveform CSV files")
+    parser.add_argument("store", help="Output store directory")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN, help=f"File glob (default: {DEFAULT_PATTERN})")
+    args = parser.parse_args()
+
+    try:
+        pack_directory(args.directory, args.store, args.pattern)
+    except Exception as e:
+        console.print(f"[red]Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
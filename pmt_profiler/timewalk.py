@@ -0,0 +1,216 @@
+"""Time-walk calibration and correction.
+
+Leading-edge and fixed-threshold pickoffs fire later for small pulses than
+for large ones. A WalkCalibration fits the mean crossing time as a function
+of pulse amplitude and subtracts it from new pulses. Calibrations are saved
+as JSON so one fit can be reused for every run at the same PMT and gain.
+"""
+
+import json
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+TRANSFORMS = {
+    "inverse_sqrt": lambda a: 1.0 / np.sqrt(a),
+    "inverse": lambda a: 1.0 / a,
+    "linear": lambda a: a,
+}
+
+@dataclass
+class BinnedStats:
+    """Crossing-time statistics per amplitude bin."""
+
+    edges: np.ndarray
+    counts: np.ndarray
+    mean_amplitude: np.ndarray
+    mean: np.ndarray
+    rms: np.ndarray
+
+    @property
+    def centers(self) -> np.ndarray:
+        """Center of each amplitude bin."""
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+def amplitude_bins(amplitudes: np.ndarray, bin_width: float) -> np.ndarray:
+    """Bin edges on multiples of bin_width that cover all amplitudes.
+
+    Args:
+        amplitudes: Pulse amplitudes
+        bin_width: Width of each bin, in amplitude units
+
+    Returns:
+        np.ndarray: Bin edges
+    """
+    lo = np.floor(np.nanmin(amplitudes) / bin_width) * bin_width
+    hi = np.ceil(np.nanmax(amplitudes) / bin_width) * bin_width
+    return np.arange(lo, hi + bin_width, bin_width)
+
+def binned_stats(
+    amplitudes: np.ndarray,
+    times: np.ndarray,
+    bin_width: Optional[float] = None,
+    edges: Optional[np.ndarray] = None
+) -> BinnedStats:
+    """Mean and RMS of crossing times per amplitude bin.
+
+    All bins are reduced together with np.bincount. Pulses with a NaN time
+    or amplitude are ignored; bins with fewer than two pulses get NaN RMS.
+
+    Args:
+        amplitudes: Length-N pulse amplitudes
+        times: Length-N crossing times
+        bin_width: Width of each bin (used if edges is not given)
+        edges: Explicit bin edges
+
+    Returns:
+        BinnedStats: Per-bin counts, mean amplitude, mean time and RMS spread
+    """
+    amplitudes = np.asarray(amplitudes, dtype=np.float64)
+    times = np.asarray(times, dtype=np.float64)
+    valid = ~(np.isnan(amplitudes) | np.isnan(times))
+    amplitudes, times = amplitudes[valid], times[valid]
+    if edges is None:
+        if bin_width is None:
+            raise ValueError("Either bin_width or edges is required")
+        edges = amplitude_bins(amplitudes, bin_width)
+    edges = np.asarray(edges, dtype=np.float64)
+    n_bins = len(edges) - 1
+
+    index = np.digitize(amplitudes, edges) - 1
+    inside = (index >= 0) & (index < n_bins)
+    index, amplitudes, times = index[inside], amplitudes[inside], times[inside]
+
+    counts = np.bincount(index, minlength=n_bins)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_amplitude = np.bincount(index, weights=amplitudes, minlength=n_bins) / counts
+        mean = np.bincount(index, weights=times, minlength=n_bins) / counts
+        squares = np.bincount(index, weights=(times - mean[index]) ** 2, minlength=n_bins)
+        rms = np.where(counts > 1, np.sqrt(squares / counts), np.nan)
+    return BinnedStats(edges=edges, counts=counts, mean_amplitude=mean_amplitude, mean=mean, rms=rms)
+
+@dataclass
+class WalkCalibration:
+    """Polynomial walk model t(A) = poly(transform(|A|))."""
+
+    transform: str
+    coefficients: List[float]
+    reference_amplitude: float
+    amplitude_range: Tuple[float, float]
+
+    def walk(self, amplitudes: np.ndarray) -> np.ndarray:
+        """Walk relative to the reference amplitude, in seconds.
+
+        Amplitudes outside the calibrated range (the span of the fitted
+        bins) are clamped to it.
+
+        Args:
+            amplitudes: Pulse amplitudes (sign is ignored)
+
+        Returns:
+            np.ndarray: Walk to subtract from each crossing time
+        """
+        x = np.clip(np.abs(np.asarray(amplitudes, dtype=np.float64)), *self.amplitude_range)
+        f = TRANSFORMS[self.transform]
+        return np.polyval(self.coefficients, f(x)) - np.polyval(self.coefficients, f(self.reference_amplitude))
+
+    def apply(self, amplitudes: np.ndarray, times: np.ndarray) -> np.ndarray:
+        """Walk-corrected crossing times.
+
+        Args:
+            amplitudes: Pulse amplitudes
+            times: Crossing times in seconds, same shape as amplitudes
+
+        Returns:
+            np.ndarray: Corrected times
+        """
+        return np.asarray(times, dtype=np.float64) - self.walk(amplitudes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the calibration as a JSON-serializable dictionary."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "WalkCalibration":
+        """Create a calibration from the output of to_dict."""
+        return cls(
+            transform=data["transform"],
+            coefficients=list(data["coefficients"]),
+            reference_amplitude=float(data["reference_amplitude"]),
+            amplitude_range=tuple(data["amplitude_range"]),
+        )
+
+    def save(self, filename: str) -> None:
+        """Save the calibration as JSON.
+
+        Args:
+            filename: Output path
+        """
+        with open(filename, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, filename: str) -> "WalkCalibration":
+        """Load a calibration saved with save.
+
+        Args:
+            filename: Path of the JSON file
+
+        Returns:
+            WalkCalibration: The stored calibration
+        """
+        with open(filename, "r") as f:
+            return cls.from_dict(json.load(f))
+
+def fit_walk(
+    amplitudes: np.ndarray,
+    times: np.ndarray,
+    bin_width: float,
+    degree: int = 2,
+    transform: str = "inverse_sqrt",
+    min_count: int = 2
+) -> WalkCalibration:
+    """Fit a time-walk calibration from binned crossing times.
+
+    Mean crossing times per amplitude bin are fitted against the bin mean of
+    ``transform(|A|)`` with a polynomial, weighted by the square root of the
+    bin counts.
+
+    Args:
+        amplitudes: Length-N pulse amplitudes
+        times: Length-N crossing times in seconds
+        bin_width: Amplitude bin width, in amplitude units
+        degree: Polynomial degree (default: 2)
+        transform: One of "inverse_sqrt", "inverse", "linear"
+        min_count: Minimum pulses for a bin to enter the fit
+
+    Returns:
+        WalkCalibration: Fitted model
+    """
+    if transform not in TRANSFORMS:
+        raise ValueError(f"Unknown transform '{transform}', expected one of {sorted(TRANSFORMS)}")
+    f = TRANSFORMS[transform]
+    magnitude = np.abs(np.asarray(amplitudes, dtype=np.float64))
+    times = np.asarray(times, dtype=np.float64)
+    stats = binned_stats(magnitude, times, bin_width=bin_width)
+    used = (stats.counts >= min_count) & (stats.edges[1:] > 0)
+    if used.sum() <= degree:
+        raise ValueError(f"Need more than {degree} populated amplitude bins to fit the walk")
+
+    # Average the transformed amplitude per bin rather than transforming the
+    # bin center, so steep low-amplitude bins are not biased
+    with np.errstate(divide="ignore"):
+        transformed = np.where(np.isnan(times) | (magnitude <= 0), np.nan, f(magnitude))
+    x = binned_stats(magnitude, transformed, edges=stats.edges).mean[used]
+    coefficients = np.polyfit(x, stats.mean[used], degree, w=np.sqrt(stats.counts[used]))
+    lo = stats.edges[:-1][used].min()
+    hi = stats.edges[1:][used].max()
+    if lo <= 0:
+        lo = stats.mean_amplitude[used].min()
+    valid = magnitude[~np.isnan(times)]
+    return WalkCalibration(
+        transform=transform,
+        coefficients=[float(c) for c in coefficients],
+        reference_amplitude=float(np.clip(np.nanmedian(valid), lo, hi)),
+        amplitude_range=(float(lo), float(hi)),
+    )
@@ -1,5 +1,6 @@
 """TimeTagger control functions for PMT Profiler analysis."""
 
+import importlib.util
 import time
 from typing import List, Optional
 from rich.console import Console
@@ -7,13 +8,22 @@ from rich.progress import Progress
 
 console = Console()
 
-try:
-    import TimeTagger as TT
-    from TimeTagger import Countrate, Counter
-    TIMETAGGER_AVAILABLE = True
-except ImportError:
-    TIMETAGGER_AVAILABLE = False
-    console.print("[yellow]TimeTagger module not found. TimeTagger functionality will be disabled.")
+# Only check that the driver is installed; it is imported on first use
+TIMETAGGER_AVAILABLE = importlib.util.find_spec("TimeTagger") is not None
+
+def __getattr__(name: str):
+    if name in ("TT", "Counter", "Countrate"):
+        TT = _timetagger()
+        return TT if name == "TT" else getattr(TT, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _timetagger():
+    """Import the TimeTagger driver module."""
+    try:
+        import TimeTagger
+    except ImportError as e:
+        raise RuntimeError(f"TimeTagger module could not be loaded: {e}") from e
+    return TimeTagger
 
 class TimeTaggerManager:
     """Manager class for TimeTagger operations."""
@@ -23,7 +33,7 @@ class TimeTaggerManager:
         if not TIMETAGGER_AVAILABLE:
             raise RuntimeError("TimeTagger module is not available")
             
-        self.tagger = TT.createTimeTagger()
+        self.tagger = _timetagger().createTimeTagger()
         self.reset()
         
     def reset(self) -> None:
@@ -70,7 +80,7 @@ class TimeTaggerManager:
         binwidth = timing_resolution_sec * 1E12  # Convert to picoseconds
         n_values = int(collection_time_sec / timing_resolution_sec)
         
-        counter = Counter(self.tagger, channels, binwidth, n_values)
+        counter = _timetagger().Counter(self.tagger, channels, binwidth, n_values)
         counter.startFor(capture_duration=binwidth * n_values)
         
         # Create progress bar using Rich
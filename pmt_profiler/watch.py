@@ -0,0 +1,363 @@
+#!/usr/bin/env python
+"""Watch a directory and update jitter statistics as pulse files arrive.
+
+Each new file is parsed once and folded into running statistics: crossing
+time mean and variance per threshold, and per peak-amplitude bin at the
+walk threshold. Batches are merged with Welford/Chan updates, which stay
+accurate for sub-nanosecond spreads on microsecond time offsets and never
+revisit earlier files.
+"""
+
+import glob
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Set
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from .crossing import first_crossing_times
+from .filters import preprocess
+from .waveform import read_waveform
+
+console = Console()
+
+def _merge(count, mean, m2, batch_count, batch_mean, batch_m2):
+    # Chan et al. pairwise update of (count, mean, sum of squared deviations)
+    total = count + batch_count
+    with np.errstate(invalid="ignore", divide="ignore"):
+        delta = batch_mean - mean
+        merged_mean = np.where(batch_count > 0, mean + delta * batch_count / total, mean)
+        merged_m2 = np.where(batch_count > 0, m2 + batch_m2 + delta ** 2 * count * batch_count / total, m2)
+    merged_mean = np.where(count > 0, merged_mean, np.where(batch_count > 0, batch_mean, 0.0))
+    merged_m2 = np.where(count > 0, merged_m2, np.where(batch_count > 0, batch_m2, 0.0))
+    return total, merged_mean, merged_m2
+
+class OnlineStats:
+    """Running mean and variance of each column of a stream of N x T batches."""
+
+    def __init__(self, n_columns: int):
+        """Initialize empty statistics.
+
+        Args:
+            n_columns: Number of columns (e.g. thresholds)
+        """
+        self.count = np.zeros(n_columns, dtype=np.int64)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+
+    def update(self, values: np.ndarray) -> None:
+        """Fold a batch of rows into the statistics.
+
+        Args:
+            values: N x T array; NaNs (no crossing) are ignored
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(self.count))
+        valid = ~np.isnan(values)
+        batch_count = valid.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            batch_mean = np.where(valid, values, 0.0).sum(axis=0) / batch_count
+        batch_m2 = np.where(valid, (values - batch_mean) ** 2, 0.0).sum(axis=0)
+        self.count, self.mean, self.m2 = _merge(
+            self.count, self.mean, self.m2, batch_count, batch_mean, batch_m2
+        )
+
+    @property
+    def std(self) -> np.ndarray:
+        """Population standard deviation per column, NaN with fewer than 2 values."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 1, np.sqrt(self.m2 / self.count), np.nan)
+
+class BinnedOnlineStats:
+    """Running crossing-time statistics per fixed-width amplitude bin.
+
+    Bin k covers ``[k * bin_width, (k + 1) * bin_width)``, like the bins of
+    binned_stats; the range grows as new amplitudes arrive.
+    """
+
+    def __init__(self, bin_width: float):
+        """Initialize empty statistics.
+
+        Args:
+            bin_width: Amplitude bin width
+        """
+        self.bin_width = float(bin_width)
+        self.first_bin = 0
+        self.count = np.zeros(0, dtype=np.int64)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)
+
+    def _extend(self, lo: int, hi: int) -> None:
+        if len(self.count) == 0:
+            self.first_bin = lo
+            size = hi - lo + 1
+            self.count, self.mean, self.m2 = np.zeros(size, dtype=np.int64), np.zeros(size), np.zeros(size)
+            return
+        last = self.first_bin + len(self.count) - 1
+        if lo < self.first_bin or hi > last:
+            first = min(lo, self.first_bin)
+            size = max(hi, last) - first + 1
+            start = self.first_bin - first
+            grown = []
+            for array in (self.count, self.mean, self.m2):
+                padded = np.zeros(size, dtype=array.dtype)
+                padded[start:start + len(array)] = array
+                grown.append(padded)
+            self.first_bin = first
+            self.count, self.mean, self.m2 = grown
+
+    def update(self, amplitudes: np.ndarray, times: np.ndarray) -> None:
+        """Fold a batch of pulses into the statistics.
+
+        Args:
+            amplitudes: Length-N pulse amplitudes
+            times: Length-N crossing times; NaNs are ignored
+        """
+        amplitudes = np.asarray(amplitudes, dtype=np.float64).ravel()
+        times = np.asarray(times, dtype=np.float64).ravel()
+        valid = ~(np.isnan(amplitudes) | np.isnan(times))
+        if not valid.any():
+            return
+        index = np.floor(amplitudes[valid] / self.bin_width).astype(np.int64)
+        times = times[valid]
+        self._extend(int(index.min()), int(index.max()))
+        index -= self.first_bin
+
+        n_bins = len(self.count)
+        batch_count = np.bincount(index, minlength=n_bins)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            batch_mean = np.bincount(index, weights=times, minlength=n_bins) / batch_count
+        batch_m2 = np.bincount(index, weights=(times - batch_mean[index]) ** 2, minlength=n_bins)
+        self.count, self.mean, self.m2 = _merge(
+            self.count, self.mean, self.m2, batch_count, batch_mean, batch_m2
+        )
+
+    @property
+    def centers(self) -> np.ndarray:
+        """Center of each amplitude bin."""
+        return (self.first_bin + np.arange(len(self.count)) + 0.5) * self.bin_width
+
+    @property
+    def rms(self) -> np.ndarray:
+        """Population RMS spread per bin, NaN with fewer than 2 pulses."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 1, np.sqrt(self.m2 / self.count), np.nan)
+
+class FolderWatcher:
+    """Incremental crossing-time statistics over a growing directory."""
+
+    def __init__(
+        self,
+        directory: str,
+        pattern: str = "*.csv",
+        thresholds: Optional[Sequence[float]] = None,
+        walk_fraction: float = 0.5,
+        bin_width: float = 0.02,
+        baseline_samples: int = 100,
+        settle_time: float = 1.0
+    ):
+        """Initialize the watcher; no files are read until scan.
+
+        Args:
+            directory: Directory receiving waveform CSVs
+            pattern: Glob pattern for the CSV files (default: *.csv)
+            thresholds: Relative crossing thresholds
+                (default: 50 steps from 10% to 100% of the peak)
+            walk_fraction: Relative threshold of the per-amplitude statistics
+            bin_width: Peak-amplitude bin width in volts
+            baseline_samples: Leading samples used for baseline subtraction
+            settle_time: Seconds a file must be unmodified before it is read,
+                so files still being written by the scope are skipped
+        """
+        self.directory = directory
+        self.pattern = pattern
+        self.thresholds = np.asarray(
+            np.linspace(0.1, 1.0, 50) if thresholds is None else thresholds, dtype=np.float64
+        )
+        self.walk_fraction = walk_fraction
+        self.baseline_samples = baseline_samples
+        self.settle_time = settle_time
+        self.crossing = OnlineStats(len(self.thresholds))
+        self.walk = BinnedOnlineStats(bin_width)
+        self.processed: Set[str] = set()
+        # Modification time of each file that failed to parse
+        self.failed: Dict[str, float] = {}
+        self.pulses = 0
+
+    def new_files(self) -> List[str]:
+        """Settled files matching the pattern that have not been processed."""
+        now = time.time()
+        files = []
+        for path in sorted(glob.glob(os.path.join(self.directory, self.pattern))):
+            if path in self.processed:
+                continue
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if now - mtime < self.settle_time or self.failed.get(path) == mtime:
+                continue
+            files.append(path)
+        return files
+
+    def process(self, files: Sequence[str]) -> int:
+        """Parse files and fold their pulses into the statistics.
+
+        Files that fail to parse are left unprocessed and retried once they
+        are modified again.
+
+        Args:
+            files: Waveform CSV paths
+
+        Returns:
+            int: Number of pulses added
+        """
+        pulses, intervals, starts, done = [], [], [], []
+        for path in files:
+            try:
+                header, times, amplitude = read_waveform(path)
+            except Exception as e:
+                console.print(f"[yellow]Skipping {path} until it changes: {e}")
+                try:
+                    self.failed[path] = os.path.getmtime(path)
+                except OSError:
+                    pass
+                continue
+            self.failed.pop(path, None)
+            if pulses and len(amplitude) != len(pulses[0]):
+                # Different record lengths cannot share one batch array
+                self._fold(pulses, intervals, starts)
+                pulses, intervals, starts = [], [], []
+            pulses.append(amplitude)
+            intervals.append(header.sample_interval)
+            starts.append(times[0])
+            done.append(path)
+        self._fold(pulses, intervals, starts)
+        self.processed.update(done)
+        self.pulses += len(done)
+        return len(done)
+
+    def _fold(self, pulses: List[np.ndarray], intervals: List[float], starts: List[float]) -> None:
+        if not pulses:
+            return
+        cleaned = preprocess(np.stack(pulses), baseline_samples=self.baseline_samples)
+        dt, t0 = np.array(intervals), np.array(starts)
+        fractions = np.append(self.thresholds, self.walk_fraction)
+        times = first_crossing_times(cleaned, fractions, dt, t0)
+        self.crossing.update(times[:, :-1])
+        self.walk.update(cleaned.min(axis=1), times[:, -1])
+
+    def scan(self) -> int:
+        """Process every settled new file.
+
+        Returns:
+            int: Number of pulses added
+        """
+        return self.process(self.new_files())
+
+    @property
+    def jitter(self) -> np.ndarray:
+        """Current RMS jitter per threshold in seconds."""
+        return self.crossing.std
+
+    def relative_uncertainty(self) -> float:
+        """Relative standard error of the best (lowest) jitter estimate.
+
+        For Gaussian timing the standard error of a standard deviation from n
+        pulses is about ``sigma / sqrt(2 (n - 1))``.
+
+        Returns:
+            float: Relative uncertainty, inf before two pulses have crossed
+        """
+        jitter = self.jitter
+        if np.all(np.isnan(jitter)):
+            return float("inf")
+        best = int(np.nanargmin(jitter))
+        return float(1.0 / np.sqrt(2.0 * (self.crossing.count[best] - 1)))
+
+def status_table(watcher: FolderWatcher, rows: int = 5) -> Table:
+    """Summary of the current jitter estimates.
+
+    Args:
+        watcher: Running watcher
+        rows: Number of thresholds shown, spread over the threshold range
+
+    Returns:
+        Table: Rich table for printing
+    """
+    table = Table(title=f"{watcher.pulses} pulses from {watcher.directory}")
+    table.add_column("Threshold")
+    table.add_column("Crossed")
+    table.add_column("RMS jitter (ns)")
+    shown = np.unique(np.linspace(0, len(watcher.thresholds) - 1, rows).astype(int))
+    for i in shown:
+        table.add_row(
+            f"{watcher.thresholds[i]:.0%}",
+            str(watcher.crossing.count[i]),
+            f"{watcher.jitter[i] * 1e9:.4f}",
+        )
+    return table
+
+def watch(
+    watcher: FolderWatcher,
+    interval: float = 2.0,
+    precision: Optional[float] = None,
+    max_pulses: Optional[int] = None,
+    on_update: Optional[Callable[[FolderWatcher], None]] = None,
+    sleep: Callable[[float], None] = time.sleep
+) -> FolderWatcher:
+    """Poll a directory until the jitter has converged or Ctrl-C is pressed.
+
+    Args:
+        watcher: Watcher to update
+        interval: Seconds between directory scans
+        precision: Stop once the relative uncertainty of the best jitter is
+            below this value (e.g. 0.05 for 5%)
+        max_pulses: Stop after this many pulses
+        on_update: Called after every scan that added pulses
+        sleep: Sleep function, replaceable in tests
+
+    Returns:
+        FolderWatcher: The watcher with the final statistics
+    """
+    try:
+        while True:
+            if watcher.scan() > 0 and on_update is not None:
+                on_update(watcher)
+            if precision is not None and watcher.relative_uncertainty() < precision:
+                console.print(f"[green]Jitter converged to {precision:.0%} relative uncertainty")
+                break
+            if max_pulses is not None and watcher.pulses >= max_pulses:
+                break
+            sleep(interval)
+    except KeyboardInterrupt:
+        console.print("[yellow]Stopped watching")
+    return watcher
+
+def main():
+    """Main function to watch a directory of incoming pulses."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Update jitter statistics as new waveform CSVs arrive")
+    parser.add_argument("directory", help="Directory receiving the waveform CSV files")
+    parser.add_argument("--pattern", default="tek*ALL.csv", help="File glob (default: tek*ALL.csv)")
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between scans (default: 2)")
+    parser.add_argument("--precision", type=float, help="Stop at this relative jitter uncertainty, e.g. 0.05")
+    parser.add_argument("--max-pulses", type=int, help="Stop after this many pulses")
+    parser.add_argument("--bin-width", type=float, default=20.0, help="Peak amplitude bin width in mV (default: 20)")
+    args = parser.parse_args()
+
+    try:
+        watcher = FolderWatcher(args.directory, args.pattern, bin_width=args.bin_width * 1e-3)
+        watch(
+            watcher,
+            interval=args.interval,
+            precision=args.precision,
+            max_pulses=args.max_pulses,
+            on_update=lambda w: console.print(status_table(w)),
+        )
+    except Exception as e:
+        console.print(f"[red]Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
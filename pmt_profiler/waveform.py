@@ -0,0 +1,236 @@
+"""Fast loading of Tektronix MDO32 waveform CSV exports.
+
+The MDO32 writes two CSV layouts:
+
+* ``columns``: the ``tek*ALL.csv`` files, a ``Key,Value`` metadata block
+  followed by a ``TIME,CH1`` table.
+* ``side_by_side``: the ``DATa:EXPort`` layout (see ``test_osc_output.csv``),
+  where metadata sits in the first two columns and time/amplitude in
+  columns four and five of the same rows.
+
+Both are parsed straight into float32 NumPy arrays; no DataFrame is built.
+"""
+
+from dataclasses import dataclass, asdict
+from itertools import islice
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+import numpy as np
+
+LAYOUT_COLUMNS = "columns"
+LAYOUT_SIDE_BY_SIDE = "side_by_side"
+
+# Metadata keys as written by the scope, mapped to WaveformHeader fields
+_HEADER_KEYS = {
+    "Model": "model",
+    "Source": "source",
+    "Record Length": "record_length",
+    "Sample Interval": "sample_interval",
+    "Trigger Point": "trigger_point",
+    "Horizontal Scale": "horizontal_scale",
+    "Horizontal Delay": "horizontal_delay",
+    "Vertical Units": "vertical_units",
+    "Vertical Scale": "vertical_scale",
+    "Vertical Offset": "vertical_offset",
+    "Vertical Position": "vertical_position",
+    "Yzero": "yzero",
+    "Note": "note",
+}
+
+@dataclass
+class WaveformHeader:
+    """Metadata block of an MDO32 waveform export."""
+
+    layout: str
+    record_length: int
+    sample_interval: float
+    model: Optional[str] = None
+    source: Optional[str] = None
+    trigger_point: Optional[float] = None
+    horizontal_scale: Optional[float] = None
+    horizontal_delay: Optional[float] = None
+    vertical_units: Optional[str] = None
+    vertical_scale: Optional[float] = None
+    vertical_offset: Optional[float] = None
+    vertical_position: Optional[float] = None
+    yzero: Optional[float] = None
+    note: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the header as a plain dictionary."""
+        return asdict(self)
+
+class WaveformChunk(NamedTuple):
+    """A window of a long waveform record.
+
+    ``start`` is the record index of the first sample. The chunk owns its
+    first ``owned`` samples; the remainder is overlap repeated at the start
+    of the next chunk. Attributing each event to the chunk that owns its
+    first sample counts it exactly once, and any event no longer than the
+    overlap is then wholly inside that chunk.
+    """
+
+    start: int
+    time: np.ndarray
+    amplitude: np.ndarray
+    owned: int
+
+def _is_side_by_side(first_line: str) -> bool:
+    fields = first_line.split(",")
+    return fields[0] == "Record Length" and len(fields) >= 5
+
+def sniff_layout(lines: List[str]) -> str:
+    """Detect which MDO32 CSV layout a file uses.
+
+    Args:
+        lines: Lines of the file (only the first few dozen are inspected)
+
+    Returns:
+        str: LAYOUT_COLUMNS or LAYOUT_SIDE_BY_SIDE
+    """
+    if lines and _is_side_by_side(lines[0]):
+        return LAYOUT_SIDE_BY_SIDE
+    for line in lines[:64]:
+        if line.startswith("TIME,"):
+            return LAYOUT_COLUMNS
+    raise ValueError("Unrecognized waveform CSV layout")
+
+def _coerce(field: str, value: str) -> Any:
+    if field == "record_length":
+        return int(float(value))
+    if field in ("model", "source", "vertical_units", "note"):
+        return value.strip()
+    return float(value)
+
+def _build_header(layout: str, pairs: List[Tuple[str, str]]) -> WaveformHeader:
+    values = {}
+    for key, value in pairs:
+        field = _HEADER_KEYS.get(key.strip())
+        if field is not None and value.strip():
+            values[field] = _coerce(field, value)
+    if "record_length" not in values or "sample_interval" not in values:
+        raise ValueError("Waveform header is missing Record Length or Sample Interval")
+    return WaveformHeader(layout=layout, **values)
+
+def _header_pairs(layout: str, lines: List[str]) -> List[Tuple[str, str]]:
+    if layout == LAYOUT_SIDE_BY_SIDE:
+        fields = (line.split(",") for line in lines)
+        return [(f[0], f[1]) for f in fields if len(f) > 1 and f[0]]
+    return [tuple(line.split(",", 2)[:2]) for line in lines if "," in line]
+
+def _find_table(lines: List[str]) -> int:
+    for i, line in enumerate(lines):
+        if line.startswith("TIME,"):
+            return i
+    raise ValueError("Waveform table header 'TIME,...' not found")
+
+def parse_waveform_lines(lines: List[str]) -> Tuple[WaveformHeader, np.ndarray, np.ndarray]:
+    """Parse the lines of an MDO32 CSV export.
+
+    Args:
+        lines: Lines of the file without line terminators
+
+    Returns:
+        Tuple of (header, time, amplitude) with float32 arrays
+    """
+    layout = sniff_layout(lines)
+    if layout == LAYOUT_COLUMNS:
+        table = _find_table(lines)
+        header = _build_header(layout, _header_pairs(layout, lines[:table]))
+        data = np.loadtxt(lines[table + 1:], delimiter=",", dtype=np.float32, ndmin=2)
+    else:
+        header = _build_header(layout, _header_pairs(layout, lines))
+        data = np.loadtxt(lines, delimiter=",", usecols=(3, 4), dtype=np.float32, ndmin=2)
+    return header, data[:, 0], data[:, 1]
+
+def read_waveform(path: str) -> Tuple[WaveformHeader, np.ndarray, np.ndarray]:
+    """Read an MDO32 waveform CSV into NumPy arrays.
+
+    Args:
+        path: Path to a ``tek*ALL.csv`` or ``DATa:EXPort`` CSV file
+
+    Returns:
+        Tuple of (header, time, amplitude); time in seconds and amplitude
+        in vertical units (V), both float32
+    """
+    with open(path, "r", newline=None) as f:
+        lines = f.read().splitlines()
+    return parse_waveform_lines(lines)
+
+def read_header(path: str) -> WaveformHeader:
+    """Read only the metadata block of an MDO32 waveform CSV.
+
+    Args:
+        path: Path to the CSV file
+
+    Returns:
+        WaveformHeader: Parsed metadata
+    """
+    lines = []
+    with open(path, "r", newline=None) as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if line.startswith("TIME,") or len(lines) >= 64:
+                break
+            lines.append(line)
+    layout = sniff_layout(lines + ["TIME,"])
+    return _build_header(layout, _header_pairs(layout, lines))
+
+def iter_waveform_chunks(
+    path: str,
+    chunk_size: int = 1_000_000,
+    overlap: int = 1000
+) -> Iterator[WaveformChunk]:
+    """Stream a long MDO32 waveform CSV in fixed-size overlapping chunks.
+
+    Only about ``chunk_size`` samples are held in memory at a time, so
+    records of millions of points can be analyzed in bounded memory.
+    Consecutive chunks share ``overlap`` samples; choose it at least as long
+    as the widest pulse of interest.
+
+    Args:
+        path: Path to the CSV file
+        chunk_size: Samples per chunk (default: 1,000,000)
+        overlap: Samples shared by consecutive chunks (default: 1000)
+
+    Yields:
+        WaveformChunk: Consecutive windows of the record
+    """
+    if not 0 <= overlap < chunk_size:
+        raise ValueError("overlap must be at least 0 and smaller than chunk_size")
+    step = chunk_size - overlap
+
+    with open(path, "r", newline=None) as f:
+        head = []
+        for line in f:
+            line = line.rstrip("\r\n")
+            head.append(line)
+            if line.startswith("TIME,") or len(head) >= 64:
+                break
+            if len(head) == 1 and _is_side_by_side(line):
+                break
+        layout = sniff_layout(head)
+        usecols = (3, 4) if layout == LAYOUT_SIDE_BY_SIDE else None
+
+        def read(lines: List[str]) -> np.ndarray:
+            lines = [line for line in lines if line.strip()]
+            if not lines:
+                return np.empty((0, 2), dtype=np.float32)
+            return np.loadtxt(lines, delimiter=",", usecols=usecols, dtype=np.float32, ndmin=2)
+
+        # Side-by-side exports carry samples on the metadata lines too
+        data = read(head) if layout == LAYOUT_SIDE_BY_SIDE else read([])
+        data = np.concatenate([data, read(list(islice(f, chunk_size - len(data))))])
+        start = 0
+        while True:
+            more = read(list(islice(f, step)))
+            last = len(more) == 0
+            yield WaveformChunk(
+                start=start,
+                time=data[:, 0],
+                amplitude=data[:, 1],
+                owned=len(data) if last else step,
+            )
+            if last:
+                break
+            data = np.concatenate([data[step:], more])
+            start += step
@@ -3,6 +3,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 import glob
 from scipy import stats
+from pmt_profiler.persistence import plot_pulses
 
 files = glob.glob("PMT CSV Files/*.csv")
 fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5))
@@ -16,16 +17,21 @@ norm_trigger_timing = []
 norm_peak_amplitudes = []
 fifty_percent_points = []
 
+# Traces are collected and drawn once per panel after the loop
+trace_times = []
+traces = []
+norm_traces = []
 
 for file in files:
     df = pd.read_csv(file, header=21)
     time = pd.to_numeric(df.iloc[:, 0], errors='coerce')
     amplitude = pd.to_numeric(df.iloc[:, 1], errors='coerce') * 1000  # Convert V to mV
     norm_amplitude=-amplitude/amplitude.min()    #normalization
-    ax2.plot(time, norm_amplitude, alpha=0.7, linewidth=0.5)
+    norm_traces.append(norm_amplitude.to_numpy())
     norm_peak_amplitudes.append(norm_amplitude.min())  # Most negative peak
 
-    ax1.plot(time, amplitude, alpha=0.7, linewidth=0.5)
+    trace_times.append(time.to_numpy())
+    traces.append(amplitude.to_numpy())
 
     # Find trigger crossing 
     trigger_value = -30.0  # mV
@@ -43,6 +49,10 @@ for file in files:
             fifty_percent_time = time.iloc[crossing_idx]
             fifty_percent_points.append(fifty_percent_time)
            
+# Lines for small sets, a persistence (density) image for large ones
+plot_pulses(ax1, np.stack(trace_times), np.stack(traces))
+plot_pulses(ax2, np.stack(trace_times), np.stack(norm_traces))
+
 # Convert to arrays
 trigger_timing = np.array(trigger_timing)
 peak_amplitudes = np.array(peak_amplitudes)
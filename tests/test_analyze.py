@@ -0,0 +1,104 @@
+"""Tests for the combined analysis runner."""
+
+import json
+import shutil
+from pathlib import Path
+import numpy as np
+import pytest
+from unittest.mock import patch
+from pmt_profiler.analyze import analyze, load_dataset, run_analyses, write_results
+from pmt_profiler.cache import ResultCache
+from pmt_profiler.crossing import first_crossing_times
+from pmt_profiler.filters import preprocess
+from pmt_profiler.store import pack_directory
+
+CSV_DIR = Path(__file__).resolve().parent.parent / "PMT CSV Files"
+
+@pytest.fixture(scope="module")
+def dataset():
+    """All example pulses."""
+    return load_dataset(str(CSV_DIR))
+
+def test_load_csv_and_store(tmp_path, dataset):
+    """Test that CSV directories and packed stores load the same pulses."""
+    assert dataset.amplitude.shape == (50, 1000)
+    assert dataset.sources == sorted(p.name for p in CSV_DIR.glob("*.csv"))
+
+    directory = tmp_path / "pulses"
+    directory.mkdir()
+    for path in sorted(CSV_DIR.glob("tek*ALL.csv"))[:3]:
+        shutil.copy(path, directory)
+    pack_directory(str(directory), str(tmp_path / "store"))
+    stored = load_dataset(str(tmp_path / "store"))
+    assert stored.sources == dataset.sources[:3]
+    assert np.array_equal(stored.amplitude, dataset.amplitude[:3])
+
+    with pytest.raises(FileNotFoundError):
+        load_dataset(str(tmp_path / "empty"))
+
+def test_run_analyses(dataset):
+    """Test that shared results match the individual engines."""
+    results = run_analyses(dataset, ["jitter", "walk"], thresholds=np.array([0.2, 0.5]))
+    assert set(results) == {"jitter", "walk"}
+    cleaned = preprocess(dataset.amplitude)
+    times = first_crossing_times(cleaned, [0.2, 0.5], dataset.sample_interval, dataset.t0)
+    assert np.allclose(results["jitter"]["jitter"], np.nanstd(times, axis=0))
+    assert results["walk"]["counts"].sum() == 50
+
+    with pytest.raises(ValueError):
+        run_analyses(dataset, ["spectrum"])
+
+def test_analyze_writes_all_outputs(tmp_path):
+    """Test that one call writes every table and plot."""
+    written = analyze(str(CSV_DIR), str(tmp_path / "out"), thresholds=np.linspace(0.1, 1.0, 10))
+    names = sorted(Path(p).name for p in written)
+    assert names == sorted([
+        "crossing_times.csv", "jitter.csv", "jitter.png", "walk.csv", "walk.png", "overlay.png", "summary.json",
+    ])
+    assert all(Path(p).stat().st_size > 0 for p in written)
+    summary = json.loads((tmp_path / "out" / "summary.json").read_text())
+    assert summary["pulses"] == 50
+    assert 0.1 <= summary["best_threshold"] <= 1.0
+    lines = (tmp_path / "out" / "crossing_times.csv").read_text().splitlines()
+    assert len(lines) == 51
+
+def test_analyze_single_pulse(tmp_path):
+    """Test that a dataset without a finite jitter still writes a summary."""
+    directory = tmp_path / "pulses"
+    directory.mkdir()
+    shutil.copy(sorted(CSV_DIR.glob("tek*ALL.csv"))[0], directory)
+    analyze(str(directory), str(tmp_path / "out"), ["jitter"])
+    summary = json.loads((tmp_path / "out" / "summary.json").read_text())
+    assert summary["pulses"] == 1
+    assert summary["best_threshold"] is None and summary["best_jitter_ns"] is None
+
+def test_analyze_uses_cache(tmp_path):
+    """Test that a rerun with the same inputs skips parsing."""
+    directory = tmp_path / "pulses"
+    directory.mkdir()
+    for path in sorted(CSV_DIR.glob("tek*ALL.csv"))[:5]:
+        shutil.copy(path, directory)
+    cache = ResultCache(str(tmp_path / "cache"))
+    analyze(str(directory), str(tmp_path / "first"), ["jitter"], cache=cache)
+
+    with patch("pmt_profiler.analyze.load_dataset") as load:
+        analyze(str(directory), str(tmp_path / "second"), ["jitter"], cache=cache)
+        load.assert_not_called()
+    first = (tmp_path / "first" / "jitter.csv").read_text()
+    assert (tmp_path / "second" / "jitter.csv").read_text() == first
+
+    # Changing a source file invalidates the cached result
+    path = sorted(directory.iterdir())[0]
+    path.write_text(path.read_text().replace("-0.", "-1."))
+    with patch("pmt_profiler.analyze.load_dataset", wraps=load_dataset) as load:
+        analyze(str(directory), str(tmp_path / "third"), ["jitter"], cache=cache)
+        load.assert_called_once()
+
+def test_overlay_switches_to_persistence(tmp_path, dataset):
+    """Test that large overlays are kept as density histograms."""
+    lines = run_analyses(dataset, ["overlay"])["overlay"]
+    assert lines["amplitude_mV"].shape == (50, 1000)
+    density = run_analyses(dataset, ["overlay"], max_traces=10)["overlay"]
+    assert density["amplitude_mV"].traces == 50
+    written = write_results({"overlay": density}, dataset.sources, str(tmp_path))
+    assert Path(written[0]).name == "overlay.png"
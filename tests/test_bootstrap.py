@@ -0,0 +1,57 @@
+"""Tests for bootstrap jitter confidence intervals."""
+
+from unittest.mock import patch
+import numpy as np
+import pytest
+from pmt_profiler.bootstrap import bootstrap_binned_jitter, bootstrap_jitter
+
+def _times(n=2000, jitter=50e-12, seed=0):
+    """Crossing times for two thresholds with known jitter."""
+    rng = np.random.default_rng(seed)
+    times = 40e-9 + rng.normal(0, jitter, (n, 2))
+    times[::10, 1] = np.nan
+    return times
+
+def test_interval_contains_estimate():
+    """Test that the interval brackets the jitter and the true value."""
+    result = bootstrap_jitter(_times(), n_resamples=500, seed=1)
+    assert result.jitter.shape == (2,)
+    assert np.all(result.lower < result.jitter) and np.all(result.jitter < result.upper)
+    assert np.all(result.lower < 50e-12) and np.all(50e-12 < result.upper)
+    # Roughly sigma / sqrt(2N) on each side for Gaussian data
+    assert np.all(result.upper - result.lower < 8e-12)
+
+def test_seed_reproducible_across_batches_and_workers():
+    """Test that the seed fixes the result regardless of parallelism."""
+    times = _times(n=300)
+    serial = bootstrap_jitter(times, n_resamples=200, seed=7, batch_size=50)
+    parallel = bootstrap_jitter(times, n_resamples=200, seed=7, batch_size=50, workers=2)
+    assert np.array_equal(serial.lower, parallel.lower)
+    assert np.array_equal(serial.upper, parallel.upper)
+    other = bootstrap_jitter(times, n_resamples=200, seed=8, batch_size=50)
+    assert not np.array_equal(serial.lower, other.lower)
+
+def test_falls_back_to_serial():
+    """Test serial fallback when the process pool cannot start."""
+    times = _times(n=100)
+    with patch("pmt_profiler.bootstrap.ProcessPoolExecutor", side_effect=OSError("no fork")):
+        result = bootstrap_jitter(times, n_resamples=100, seed=0, batch_size=25, workers=4)
+    assert np.array_equal(result.lower, bootstrap_jitter(times, 100, seed=0, batch_size=25).lower)
+
+def test_sparse_column_has_no_interval():
+    """Test that a column with fewer than two crossings gets NaN bounds."""
+    times = np.array([[1.0, np.nan], [2.0, 5.0], [3.0, np.nan]])
+    result = bootstrap_jitter(times, n_resamples=50, seed=0)
+    assert not np.isnan(result.lower[0])
+    assert np.isnan(result.lower[1]) and np.isnan(result.upper[1])
+
+def test_binned_intervals():
+    """Test per-amplitude-bin intervals."""
+    rng = np.random.default_rng(2)
+    amplitudes = rng.uniform(-100, -20, 4000)
+    times = rng.normal(0, 1e-9 * 20 / np.abs(amplitudes))
+    centers, result = bootstrap_binned_jitter(amplitudes, times, bin_width=20, n_resamples=300, seed=3)
+    assert np.allclose(centers, [-90, -70, -50, -30])
+    assert np.all(result.lower < result.jitter) and np.all(result.jitter < result.upper)
+    assert result.jitter[0] < result.jitter[-1]
+    assert result.jitter[-1] == pytest.approx(np.std(times[amplitudes > -40]))
@@ -0,0 +1,84 @@
+"""Tests for the content-addressed result cache."""
+
+import os
+import numpy as np
+import pytest
+from pmt_profiler.cache import ResultCache, hash_file
+
+@pytest.fixture
+def inputs(tmp_path):
+    """Two small input files."""
+    paths = []
+    for name, text in (("a.csv", "1,2\n"), ("b.csv", "3,4\n")):
+        path = tmp_path / name
+        path.write_text(text)
+        paths.append(str(path))
+    return paths
+
+def test_key_depends_on_content_and_params(tmp_path, inputs):
+    """Test that keys change with file content and parameters only."""
+    cache = ResultCache(str(tmp_path / "cache"))
+    key = cache.key(inputs, {"thresholds": np.array([0.1, 0.5]), "bin_width": 0.02})
+    assert key == cache.key(inputs, {"bin_width": 0.02, "thresholds": [0.1, 0.5]})
+    assert key != cache.key(inputs, {"bin_width": 0.03, "thresholds": [0.1, 0.5]})
+    assert key != cache.key(inputs[::-1], {"bin_width": 0.02, "thresholds": [0.1, 0.5]})
+    assert key != cache.key(inputs, {"bin_width": 0.02, "thresholds": [0.1, 0.5]}, namespace="walk")
+
+    # Touching a file without changing it keeps the key; editing it does not
+    os.utime(inputs[0], ns=(0, 0))
+    assert key == cache.key(inputs, {"thresholds": [0.1, 0.5], "bin_width": 0.02})
+    with open(inputs[0], "w") as f:
+        f.write("1,9\n")
+    assert key != cache.key(inputs, {"thresholds": [0.1, 0.5], "bin_width": 0.02})
+
+def test_file_hashes_are_remembered(tmp_path, inputs):
+    """Test that known files are not rehashed while unchanged."""
+    ResultCache(str(tmp_path / "cache")).key(inputs, {})
+    reopened = ResultCache(str(tmp_path / "cache"))
+    reopened._file_hashes()[os.path.abspath(inputs[1])]["sha256"] = "stale"
+    assert reopened.file_hash(inputs[1]) == "stale"
+    assert reopened.file_hash(inputs[0]) == hash_file(inputs[0])
+
+def test_get_or_compute(tmp_path, inputs):
+    """Test that results are computed once and then served from disk."""
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"jitter": np.arange(3.0)}
+
+    cache = ResultCache(str(tmp_path / "cache"))
+    first = cache.get_or_compute(inputs, {"n": 1}, compute)
+    second = ResultCache(str(tmp_path / "cache")).get_or_compute(inputs, {"n": 1}, compute)
+    assert len(calls) == 1
+    assert np.array_equal(first["jitter"], second["jitter"])
+    assert cache.get("missing") is None
+
+def test_bad_entries_are_dropped(tmp_path, inputs):
+    """Test that unreadable entries count as misses and are deleted."""
+    cache = ResultCache(str(tmp_path / "cache"))
+    truncated, stale = cache.key(inputs, {"n": 1}), cache.key(inputs, {"n": 2})
+    with open(cache._entry(truncated), "wb") as f:
+        f.write(b"\x80\x05")
+    # A pickle of a class from a module that no longer exists
+    with open(cache._entry(stale), "wb") as f:
+        f.write(b"cremoved_module\nOld\n.")
+    for key in (truncated, stale):
+        assert cache.get(key) is None
+        assert not os.path.exists(cache._entry(key))
+
+def test_lru_eviction(tmp_path, inputs):
+    """Test that the least recently used entries are evicted first."""
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=25000)
+    keys = [cache.key(inputs, {"n": n}) for n in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, np.zeros(1000))
+        os.utime(cache._entry(key), ns=(age * 10**9, age * 10**9))
+    cache.get(keys[0])
+    cache.put(cache.key(inputs, {"n": 3}), np.zeros(1000))
+
+    assert cache.size() <= 25000
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    cache.clear()
+    assert cache.entries() == {}
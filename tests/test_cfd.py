@@ -0,0 +1,68 @@
+"""Tests for the constant-fraction discriminator."""
+
+import numpy as np
+import pytest
+from pmt_profiler.cfd import cfd_sweep, cfd_times, delay_signal
+from pmt_profiler.crossing import rms_jitter
+
+DT = 4e-10
+
+def _pulses(amplitudes, arrivals, length=200):
+    """Negative Gaussian pulses with given amplitudes and arrival times."""
+    t = np.arange(length) * DT
+    amplitudes = np.asarray(amplitudes)[:, None]
+    arrivals = np.asarray(arrivals)[:, None]
+    return -amplitudes * np.exp(-0.5 * ((t - arrivals) / 2e-9) ** 2)
+
+def test_cfd_is_amplitude_independent():
+    """Test that pulses of different heights give the same CFD time."""
+    pulses = _pulses([0.01, 0.05, 0.3], [40e-9] * 3)
+    times = cfd_times(pulses, fraction=0.3, delay=2e-9, sample_interval=DT)
+    assert np.ptp(times) < 1e-13
+    assert 30e-9 < times[0] < 40e-9
+
+def test_cfd_follows_arrival_time():
+    """Test that shifting a pulse shifts its CFD time by the same amount."""
+    pulses = _pulses([0.1, 0.1], [40e-9, 41.3e-9])
+    times = cfd_times(pulses, fraction=0.5, delay=1.5e-9, sample_interval=DT, t0=[0.0, 1e-6])
+    assert times[1] - times[0] == pytest.approx(1e-6 + 1.3e-9, abs=10e-12)
+
+def test_cfd_ignores_baseline_noise():
+    """Test that noise ahead of the pulse does not trigger the CFD."""
+    rng = np.random.default_rng(0)
+    pulses = _pulses([0.1] * 50, [40e-9] * 50) + rng.normal(0, 0.002, (50, 200))
+    times = cfd_times(pulses, fraction=0.3, delay=2e-9, sample_interval=DT)
+    assert not np.isnan(times).any()
+    assert np.ptp(times) < 2e-9
+
+def test_cfd_without_pulse():
+    """Test that a flat record has no CFD time."""
+    assert np.isnan(cfd_times(np.zeros((1, 50)), 0.3, 2e-9, DT)).all()
+
+def test_sweep_matches_single_settings():
+    """Test that the grid sweep agrees with individual CFD runs."""
+    rng = np.random.default_rng(1)
+    pulses = _pulses(rng.uniform(0.02, 0.2, 20), rng.normal(40e-9, 0.2e-9, 20))
+    fractions = [0.2, 0.4]
+    delays = [2e-9, 2.6e-9, 3e-9]
+    grid = cfd_sweep(pulses, fractions, delays, DT, block_size=6)
+    assert grid.shape == (20, 2, 3)
+    for f, fraction in enumerate(fractions):
+        for d, delay in enumerate(delays):
+            single = cfd_times(pulses, fraction, delay, DT)
+            assert not np.isnan(single).any()
+            assert np.allclose(grid[:, f, d], single)
+    assert rms_jitter(grid).shape == (2, 3)
+
+def test_delay_signal_fractional():
+    """Test integer and fractional delays."""
+    signal = np.arange(6.0)[None, :]
+    assert np.array_equal(delay_signal(signal, 2), [[0, 0, 0, 1, 2, 3]])
+    assert np.allclose(delay_signal(signal, 1.5), [[0, 0, 0.5, 1.5, 2.5, 3.5]])
+    with pytest.raises(ValueError):
+        delay_signal(signal, -1)
+
+def test_mixed_sample_intervals_rejected():
+    """Test that the CFD delay needs one sample interval."""
+    with pytest.raises(ValueError, match="same sample interval"):
+        cfd_times(np.zeros((2, 10)), 0.3, 1e-9, [4e-10, 8e-10])
@@ -4,6 +4,7 @@ import pytest
 from unittest.mock import patch, MagicMock
 from io import StringIO
 import sys
+from pathlib import Path
 from pmt_profiler.cli import main
 from pmt_profiler.core import MockMicroManager
 
@@ -219,4 +220,15 @@ def test_cli_invalid_gain(mock_micro_manager):
             with pytest.raises(SystemExit):
                 main()
         output = fake_err.getvalue()
-        assert "error: argument --gain: invalid int value: 'invalid'" in output 
\ No newline at end of file
+        assert "error: argument --gain: invalid int value: 'invalid'" in output 
+
+def test_cli_analyze(tmp_path):
+    """Test the analyze subcommand without touching hardware."""
+    csv_dir = str(Path(__file__).resolve().parent.parent / "PMT CSV Files")
+    argv = ['pmt_profiler.cli', 'analyze', csv_dir, '--analyses', 'jitter', 'walk', '--output', str(tmp_path)]
+    with patch('pmt_profiler.core.MicroManager') as mock_micro_manager, patch('sys.argv', argv):
+        main()
+    mock_micro_manager.assert_not_called()
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "jitter.csv", "jitter.png", "summary.json", "walk.csv", "walk.png"
+    ]
@@ -0,0 +1,71 @@
+"""Tests for the vectorized crossing engine."""
+
+from pathlib import Path
+import numpy as np
+import pytest
+from pmt_profiler.crossing import crossing_indices, first_crossing_times, rms_jitter
+from pmt_profiler.store import WaveformStore, pack_directory
+
+CSV_DIR = Path(__file__).resolve().parent.parent / "PMT CSV Files"
+
+def _reference_index(row, level):
+    """Loop implementation of the first upward crossing."""
+    for j in range(1, len(row)):
+        if row[j] >= level:
+            if all(row[:j] < level):
+                return j - 1 + (level - row[j - 1]) / (row[j] - row[j - 1])
+            return np.nan
+    return np.nan
+
+def test_crossing_indices_matches_loop():
+    """Test the vectorized search against a plain loop."""
+    rng = np.random.default_rng(0)
+    signal = rng.normal(size=(20, 50)).cumsum(axis=1)
+    levels = rng.uniform(-2, 6, size=(20, 7))
+    result = crossing_indices(signal, levels)
+    expected = np.array([[_reference_index(r, l) for l in ls] for r, ls in zip(signal, levels)])
+    assert np.allclose(result, expected, equal_nan=True)
+
+def test_subsample_interpolation():
+    """Test that a linear edge yields exact sub-sample times."""
+    ramp = -np.clip(np.arange(10.0) - 2.0, 0, 5)  # 0 ... 0, -1 ... -5
+    times = first_crossing_times(ramp[None, :], [0.1, 0.5], sample_interval=2e-10, t0=1e-9)
+    # 10% of a 5-unit peak is reached 0.5 samples after index 2
+    assert times[0, 0] == pytest.approx(1e-9 + 2.5 * 2e-10)
+    assert times[0, 1] == pytest.approx(1e-9 + 4.5 * 2e-10)
+
+def test_absolute_thresholds_and_misses():
+    """Test leading-edge levels and pulses that never cross."""
+    pulses = np.zeros((2, 8))
+    pulses[0, 4:] = -0.05
+    times = first_crossing_times(pulses, [-0.03, -0.1], sample_interval=1.0, relative=False)
+    assert times[0, 0] == pytest.approx(3.6)
+    assert np.isnan(times[0, 1])
+    assert np.isnan(times[1]).all()
+
+def test_blocks_match_single_pass():
+    """Test that block processing does not change the result."""
+    rng = np.random.default_rng(1)
+    pulses = -np.abs(rng.normal(size=(30, 40))).cumsum(axis=1)
+    t0 = rng.uniform(size=30)
+    thresholds = np.linspace(0.1, 1.0, 10)
+    full = first_crossing_times(pulses, thresholds, 1e-9, t0=t0)
+    blocked = first_crossing_times(pulses, thresholds, 1e-9, t0=t0, block_size=7)
+    assert np.array_equal(full, blocked, equal_nan=True)
+
+def test_real_pulses_from_store(tmp_path):
+    """Test crossings on recorded pulses agree with the sample grid."""
+    pack_directory(str(CSV_DIR), str(tmp_path / "store"))
+    store = WaveformStore(str(tmp_path / "store"))
+    times = first_crossing_times(store.amplitude, [0.5], store.sample_interval, store.t0)
+    assert not np.isnan(times).any()
+    for i in range(len(store)):
+        time = store.time_axis(i)
+        amplitude = store.amplitude[i]
+        idx = np.flatnonzero(amplitude <= amplitude.min() * 0.5)[0]
+        assert time[idx - 1] <= times[i, 0] <= time[idx]
+
+def test_rms_jitter():
+    """Test jitter ignores misses and needs two crossings."""
+    times = np.array([[1.0, np.nan], [3.0, 2.0], [np.nan, np.nan]])
+    assert np.allclose(rms_jitter(times), [1.0, np.nan], equal_nan=True)
@@ -0,0 +1,65 @@
+"""Tests for single-pass pulse feature extraction."""
+
+import numpy as np
+import pytest
+from pmt_profiler.features import FeatureTable, extract_features
+
+DT = 1e-10
+SIGMA = 2e-9
+
+def _gaussian_pulses(amplitudes, baseline=0.0, center=60e-9, length=1000):
+    """Negative Gaussian pulses on a constant baseline."""
+    t = np.arange(length) * DT
+    amplitudes = np.asarray(amplitudes)[:, None]
+    return baseline - amplitudes * np.exp(-0.5 * ((t - center) / SIGMA) ** 2)
+
+def test_gaussian_features():
+    """Test every feature against the analytic Gaussian values."""
+    pulses = _gaussian_pulses([0.05, 0.2], baseline=0.01)
+    table = extract_features(pulses, DT, t0=1e-6, charge_window=(20e-9, 20e-9))
+
+    assert np.allclose(table.baseline, 0.01)
+    assert np.allclose(table.peak_amplitude, [-0.05, -0.2])
+    assert np.allclose(table.peak_time, 1e-6 + 60e-9)
+    rise = SIGMA * (np.sqrt(2 * np.log(10)) - np.sqrt(2 * np.log(10 / 9)))
+    assert np.allclose(table.rise_time, rise, rtol=1e-3)
+    assert np.allclose(table.fwhm, 2 * np.sqrt(2 * np.log(2)) * SIGMA, rtol=1e-3)
+    assert np.allclose(table.half_max_time, 1e-6 + 60e-9 - np.sqrt(2 * np.log(2)) * SIGMA, atol=1e-12)
+    area = np.array([0.05, 0.2]) * SIGMA * np.sqrt(2 * np.pi)
+    assert np.allclose(table.charge, area / 50.0, rtol=1e-3)
+
+def test_leading_edge_threshold():
+    """Test the absolute leading-edge time and pulses below it."""
+    table = extract_features(_gaussian_pulses([0.02, 0.06]), DT)
+    assert np.isnan(table.leading_edge_time[0])
+    # -30 mV is half of a 60 mV pulse
+    assert table.leading_edge_time[1] == pytest.approx(table.half_max_time[1], abs=1e-12)
+
+def test_noise_ahead_of_peak_is_ignored():
+    """Test that a spike before the pulse does not move the 50% time."""
+    pulses = _gaussian_pulses([0.1, 0.1])
+    pulses[1, 200] = -0.08
+    table = extract_features(pulses, DT)
+    assert table.half_max_time[1] == pytest.approx(table.half_max_time[0])
+
+def test_blocks_match_single_pass():
+    """Test that block processing does not change the table."""
+    rng = np.random.default_rng(0)
+    pulses = _gaussian_pulses(rng.uniform(0.02, 0.3, 25)) + rng.normal(0, 0.002, (25, 1000))
+    full = extract_features(pulses, DT)
+    blocked = extract_features(pulses, DT, block_size=4)
+    for name in FeatureTable.columns():
+        assert np.array_equal(getattr(full, name), getattr(blocked, name), equal_nan=True)
+
+def test_table_save_load_and_select(tmp_path):
+    """Test persisting, slicing and joining feature tables."""
+    table = extract_features(_gaussian_pulses([0.05, 0.1, 0.2]), DT)
+    path = tmp_path / "features.npz"
+    table.save(str(path))
+    loaded = FeatureTable.load(str(path))
+    assert np.array_equal(loaded.charge, table.charge)
+
+    assert len(table[table.peak_amplitude < -0.07]) == 2
+    joined = FeatureTable.concatenate([table, table[:1]])
+    assert len(joined) == 4
+    assert list(table.to_dataframe().columns) == list(FeatureTable.columns())
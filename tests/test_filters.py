@@ -0,0 +1,78 @@
+"""Tests for baseline subtraction and FFT filtering."""
+
+import numpy as np
+import pytest
+from pmt_profiler.crossing import first_crossing_times, rms_jitter
+from pmt_profiler.filters import (
+    _fft_length,
+    estimate_baseline,
+    matched_filter,
+    moving_average,
+    preprocess,
+    pulse_template,
+)
+
+DT = 4e-10
+
+def _pulses(n, noise, seed=0, offset=0.02):
+    """Negative Gaussian pulses with white noise and a baseline offset."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(500) * DT
+    clean = -0.5 * np.exp(-0.5 * ((t - 100e-9) / 1.5e-9) ** 2)
+    return offset + clean + rng.normal(scale=noise, size=(n, 500)), clean
+
+def test_fft_length():
+    """Test that FFT lengths are fast sizes no shorter than requested."""
+    for n in (1, 7, 100, 1023, 1025, 5000):
+        size = _fft_length(n)
+        assert size >= n
+        while size % 2 == 0:
+            size //= 2
+        while size % 3 == 0:
+            size //= 3
+        assert size == 1
+    assert _fft_length(1025) < 2048
+
+def test_baseline():
+    """Test baseline estimation and subtraction."""
+    pulses, _ = _pulses(4, 0.001)
+    assert np.allclose(estimate_baseline(pulses), 0.02, atol=1e-3)
+    assert np.allclose(estimate_baseline(pulses, method="median"), 0.02, atol=1e-3)
+    assert np.allclose(preprocess(pulses)[:, :100].mean(axis=1), 0.0)
+    with pytest.raises(ValueError):
+        estimate_baseline(pulses, method="mode")
+
+def test_kernel_filter_matches_convolution():
+    """Test FFT filtering against np.convolve in 'same' mode."""
+    rng = np.random.default_rng(1)
+    signal = rng.normal(size=(5, 200))
+    for kernel in (moving_average(5), moving_average(4), matched_filter(rng.normal(size=9))):
+        expected = np.array([np.convolve(row, kernel.kernel, mode="same") for row in signal])
+        assert np.allclose(kernel.apply(signal, block_size=2), expected)
+
+def test_kernel_spectrum_cached():
+    """Test that the kernel spectrum is reused across blocks and calls."""
+    kernel = moving_average(8)
+    kernel.apply(np.zeros((10, 300)), block_size=3)
+    spectrum = kernel.spectrum(_fft_length(307))
+    kernel.apply(np.ones((2, 300)))
+    assert len(kernel._spectra) == 1
+    assert kernel.spectrum(_fft_length(307)) is spectrum
+
+def test_filtering_reduces_jitter():
+    """Test that smoothing and matched filtering lower low-SNR jitter."""
+    pulses, clean = _pulses(400, 0.05)
+    raw = first_crossing_times(preprocess(pulses), [0.5], DT)
+    smoothed = first_crossing_times(preprocess(pulses, kernel=moving_average(5)), [0.5], DT)
+    template = pulse_template(pulses, width=32, pre_peak=16)
+    assert np.argmin(template) == 16
+    matched = first_crossing_times(preprocess(pulses, kernel=matched_filter(template)), [0.5], DT)
+    assert rms_jitter(smoothed)[0] < rms_jitter(raw)[0]
+    assert rms_jitter(matched)[0] < rms_jitter(raw)[0]
+
+def test_invalid_kernels():
+    """Test rejection of empty kernels."""
+    with pytest.raises(ValueError):
+        moving_average(0)
+    with pytest.raises(ValueError):
+        matched_filter(np.zeros(4))
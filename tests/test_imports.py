@@ -0,0 +1,43 @@
+"""Tests for lazy imports at CLI startup."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Instrument drivers and analysis libraries that must not load at startup
+HEAVY_MODULES = ["tm_devices", "TimeTagger", "pymmcore_plus", "numpy", "scipy", "pandas", "matplotlib"]
+
+def _import_in_subprocess(statement):
+    """Run an import in a fresh interpreter; return the heavy modules it loaded."""
+    code = (
+        "import json, sys\n"
+        f"{statement}\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+@pytest.mark.parametrize("statement", [
+    "import pmt_profiler",
+    "import pmt_profiler.cli",
+    "import pmt_profiler.mdo32",
+    "import pmt_profiler.tt",
+])
+def test_no_heavy_imports_at_startup(statement):
+    """Test that importing the package and CLI loads no instrument stack."""
+    assert _import_in_subprocess(statement) == []
+
+def test_lazy_package_attributes():
+    """Test that package-level scope functions resolve on first access."""
+    import pmt_profiler
+    from pmt_profiler import mdo32
+    assert pmt_profiler.connect_to_oscilloscope is mdo32.connect_to_oscilloscope
+    assert "export_waveform" in dir(pmt_profiler)
+    with pytest.raises(AttributeError):
+        pmt_profiler.missing_attribute
@@ -0,0 +1,53 @@
+"""Tests for parallel batch ingestion."""
+
+import csv
+from pathlib import Path
+from unittest.mock import patch
+import pytest
+from pmt_profiler.ingest import ingest_directory, ingest_files, write_records
+
+CSV_DIR = Path(__file__).resolve().parent.parent / "PMT CSV Files"
+
+@pytest.fixture
+def files():
+    """A handful of pulse CSVs in file name order."""
+    return [str(p) for p in sorted(CSV_DIR.glob("tek*ALL.csv"))[:8]]
+
+def test_parallel_matches_serial(files):
+    """Test that the pool returns the same records in file order."""
+    serial = ingest_files(files, workers=1)
+    parallel = ingest_files(files, workers=2)
+    assert serial.workers == 1
+    assert parallel.workers == 2
+    assert parallel.records == serial.records
+    assert parallel.files == files
+    assert all(r["peak_amplitude"] < 0 for r in serial.records)
+    assert serial.files_per_second > 0
+
+def test_bad_file_is_reported(files, tmp_path):
+    """Test that a file that cannot be parsed does not stop the batch."""
+    bad = tmp_path / "bad.csv"
+    bad.write_text("not a waveform\n")
+    result = ingest_files([files[0], str(bad), files[1]], workers=1)
+    assert result.records[1] is None
+    assert result.records[0] is not None and result.records[2] is not None
+    assert [path for path, _ in result.errors] == [str(bad)]
+
+def test_falls_back_to_serial(files):
+    """Test serial fallback when the process pool cannot start."""
+    with patch("pmt_profiler.ingest.ProcessPoolExecutor", side_effect=OSError("no fork")):
+        result = ingest_files(files, workers=4)
+    assert result.workers == 1
+    assert len(result.records) == len(files)
+
+def test_ingest_directory_and_write(tmp_path):
+    """Test ingesting a directory and writing the feature table."""
+    result = ingest_directory(str(CSV_DIR), "tek005*ALL.csv", workers=1)
+    assert [Path(f).name for f in result.files] == [f"tek00{n}ALL.csv" for n in range(53, 60)]
+
+    output = tmp_path / "features.csv"
+    write_records(result, str(output))
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]["source"] == "tek0053ALL.csv"
+    assert float(rows[0]["peak_amplitude"]) == pytest.approx(result.records[0]["peak_amplitude"])
@@ -1,14 +1,38 @@
 """Tests for the MDO32 oscilloscope module."""
 
+import json
 import os
+import numpy as np
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
+from pmt_profiler.crossing import first_crossing_times
+from pmt_profiler.features import extract_features
 from pmt_profiler.mdo32 import (
+    Measurement,
+    ScopeSession,
+    WaveformPreamble,
     connect_to_oscilloscope,
     load_settings,
     capture_waveform,
-    export_waveform
+    export_waveform,
+    capture_channels,
+    capture_frames,
+    close_sessions,
+    configure_measurements,
+    parse_block,
+    load_record,
+    measure_statistics,
+    open_session,
+    parse_timestamps,
+    read_curve,
+    save_channels,
+    save_curve,
+    start_stop_intervals,
+    stream_record,
+    transfer_waveform,
+    wait_for_acquisition
 )
+from pmt_profiler.mock_scope import MockMDO32
 
 @pytest.fixture
 def mock_scope():
@@ -17,12 +41,13 @@ def mock_scope():
     scope.model = "MDO32"
     scope.resource_name = "TCPIP0::192.168.1.100::inst0::INSTR"
     scope.commands = MagicMock()
+    scope.query.return_value = "20000"
     return scope
 
 @pytest.fixture
 def mock_device_manager():
     """Create a mock device manager."""
-    with patch("pmt_profiler.mdo32.DeviceManager") as mock_dm:
+    with patch("pmt_profiler.mdo32._device_manager") as mock_dm:
         mock_dm_instance = MagicMock()
         mock_dm.return_value = mock_dm_instance
         mock_dm_instance.add_mdo3k.return_value = MagicMock()
@@ -64,14 +89,60 @@ def test_load_settings_file_not_found(mock_scope):
 
 def test_capture_waveform(mock_scope):
     """Test capturing a waveform."""
-    # Mock the acquisition state query to simulate completion
-    mock_scope.commands.acquire.state.query.side_effect = ["RUN", "STOP"]
+    # *OPC? returns once the acquisition has completed
+    mock_scope.query.return_value = "1"
     
-    capture_waveform(mock_scope, channel=1)
+    completion = capture_waveform(mock_scope, channel=1)
     
-    mock_scope.commands.acquire.state.write.assert_called_once_with("RUN")
-    mock_scope.commands.acquire.stopafter.write.assert_called_once_with("SEQUENCE")
-    mock_scope.commands.acquire.numacq.write.assert_called_once_with(1)
+    assert completion.method == "opc" and completion.queries == 1
+    mock_scope.query.assert_called_once_with("*OPC?")
+    assert mock_scope.write.call_args_list == [
+        call("HORizontal:FASTframe:STATE OFF"),
+        call("ACQuire:STOPAfter SEQuence"),
+        call("ACQuire:STATE RUN"),
+    ]
+
+def test_capture_waveform_polling(mock_scope):
+    """Test capturing a waveform with adaptive polling."""
+    mock_scope.query.side_effect = ["1", "1", "0"]
+    
+    completion = capture_waveform(mock_scope, channel=1, method="poll")
+    
+    assert completion.method == "poll" and completion.queries == 3
+    mock_scope.query.assert_called_with("ACQuire:STATE?")
+
+def test_wait_for_acquisition_opc():
+    """Test that *OPC? returns right after the simulated acquisition ends."""
+    scope = MockMDO32(seed=6)
+    scope.arm_time = 0.2
+    scope.write("ACQuire:STOPAfter SEQuence;ACQuire:STATE RUN")
+    completion = wait_for_acquisition(scope, timeout=5.0)
+    assert 0.2 <= completion.elapsed < 0.35
+    # The VISA timeout is restored after the blocking query
+    assert scope.visa_resource.timeout == 5000
+
+def test_wait_for_acquisition_polling_backoff():
+    """Test that polling backs off instead of querying every millisecond."""
+    scope = MockMDO32(seed=7)
+    scope.arm_time = 0.3
+    scope.write("ACQuire:STOPAfter SEQuence;ACQuire:STATE RUN")
+    completion = wait_for_acquisition(scope, timeout=5.0, method="poll", max_interval=0.05)
+    assert 0.3 <= completion.elapsed < 0.45
+    assert completion.queries < 15
+
+@pytest.mark.parametrize("method", ["opc", "poll"])
+def test_wait_for_acquisition_timeout(method):
+    """Test that a stuck acquisition raises TimeoutError."""
+    scope = MockMDO32(seed=8)
+    scope.arm_time = 10.0
+    scope.write("ACQuire:STOPAfter SEQuence;ACQuire:STATE RUN")
+    with pytest.raises(TimeoutError):
+        wait_for_acquisition(scope, timeout=0.1, method=method)
+
+def test_wait_for_acquisition_unknown_method(mock_scope):
+    """Test that unknown completion methods are rejected."""
+    with pytest.raises(ValueError, match="completion method"):
+        wait_for_acquisition(mock_scope, method="srq")
 
 def test_export_waveform(mock_scope):
     """Test exporting a waveform."""
@@ -80,12 +151,15 @@ def test_export_waveform(mock_scope):
     result = export_waveform(mock_scope, channel=1, filename=filename)
     
     assert result == filename
-    mock_scope.commands.data.source.write.assert_called_once_with("CH1")
-    mock_scope.commands.data.start.write.assert_called_once_with(1)
-    mock_scope.commands.data.stop.write.assert_called_once_with(1000)
-    mock_scope.commands.data.encdg.write.assert_called_once_with("ASCII")
-    mock_scope.commands.data.filename.write.assert_called_once_with(f'"{filename}"')
-    mock_scope.commands.data.export.write.assert_called_once()
+    mock_scope.query.assert_called_once_with("HORizontal:RECOrdlength?")
+    assert mock_scope.write.call_args_list == [
+        call("DATa:SOUrce CH1"),
+        call("DATa:STARt 1"),
+        call("DATa:STOP 20000"),
+        call("DATa:ENCdg ASCIi"),
+        call(f'DATa:FILEName "{filename}"'),
+        call("DATa:EXPort"),
+    ]
 
 def test_export_waveform_default_filename(mock_scope):
     """Test exporting a waveform with default filename."""
@@ -93,4 +167,351 @@ def test_export_waveform_default_filename(mock_scope):
         mock_datetime.now.return_value.strftime.return_value = "20240101_120000"
         result = export_waveform(mock_scope, channel=1)
         
-        assert result == "waveform_ch1_20240101_120000.csv" 
\ No newline at end of file
+        assert result == "waveform_ch1_20240101_120000.csv" 
+def test_preamble_from_response_with_headers():
+    """Test parsing a preamble sent with command headers."""
+    response = (
+        ':WFMOUTPRE:BYT_NR 2;BIT_NR 16;ENCDG BIN;BN_FMT RI;BYT_OR LSB;'
+        'WFID "Ch1, DC coupling; 50mV/div";NR_PT 500;PT_FMT Y;XUNIT "s";'
+        'XINCR 4.0E-10;XZERO -1.0E-7;PT_OFF 0;YUNIT "V";YMULT 7.8125E-6;YOFF 1.0E+2;YZERO 0.0E+0'
+    )
+    preamble = WaveformPreamble.from_response(response)
+    assert preamble.byte_width == 2
+    assert preamble.waveform_id == "Ch1, DC coupling; 50mV/div"
+    assert preamble.dtype == np.dtype("<i2")
+    assert preamble.y_offset == 100.0
+    assert preamble.time_axis(3) == pytest.approx([-1e-7, -1e-7 + 4e-10, -1e-7 + 8e-10])
+
+def test_preamble_incomplete():
+    """Test that a preamble without scaling factors is rejected."""
+    with pytest.raises(ValueError, match="Incomplete"):
+        WaveformPreamble.from_response("1;8;BIN")
+
+def test_parse_block():
+    """Test decoding IEEE 488.2 binary blocks."""
+    payload = np.array([-2, 300, 7], dtype=">i2").tobytes()
+    data = b"#16" + payload + b"\n"
+    assert parse_block(data, ">i2").tolist() == [-2, 300, 7]
+    with pytest.raises(ValueError, match="Truncated"):
+        parse_block(b"#18" + payload, ">i2")
+    with pytest.raises(ValueError, match="definite-length"):
+        parse_block(b"-2,300,7", ">i2")
+
+@pytest.mark.parametrize("width", [1, 2])
+def test_transfer_waveform_binary(width):
+    """Test binary transfer and scaling against the simulated scope."""
+    scope = MockMDO32(seed=1, record_length=2000)
+    scope.write("CH1:POSition 1.5")
+    scope.write("ACQuire:STOPAfter SEQuence;ACQuire:STATE RUN")
+
+    preamble, times, amplitude = transfer_waveform(scope, channel=1, width=width)
+
+    assert preamble.byte_width == width
+    assert preamble.n_points == len(amplitude) == len(times) == 2000
+    assert amplitude.dtype == np.float32
+    # Quantization error is at most half a code
+    assert np.max(np.abs(amplitude - scope.records[1][0])) <= preamble.y_multiplier / 2 + 1e-6
+    assert times == pytest.approx((np.arange(2000) - 400) * 4e-10)
+    assert "DATa:ENCdg RIBinary" in scope.log
+
+def test_transfer_waveform_smaller_than_ascii():
+    """Test that 8-bit binary transfers are less than half the size of ASCII."""
+    scope = MockMDO32(seed=2, record_length=10000)
+    scope.write("ACQuire:STATE RUN")
+    transfer_waveform(scope, width=1)
+    binary_bytes = scope.bytes_sent
+    scope.write("DATa:ENCdg ASCIi")
+    ascii_bytes = len(scope.query("CURVe?"))
+    assert ascii_bytes > 2 * binary_bytes
+
+def test_read_curve_rejects_ascii():
+    """Test that reading a curve in ASCII encoding fails clearly."""
+    scope = MockMDO32(seed=3)
+    scope.write("DATa:ENCdg ASCIi")
+    with pytest.raises(ValueError, match="ASCII"):
+        read_curve(scope)
+
+def test_save_curve(tmp_path):
+    """Test that saved curves keep the preamble."""
+    scope = MockMDO32(seed=4)
+    scope.write("ACQuire:STATE RUN")
+    preamble, times, amplitude = transfer_waveform(scope, width=2)
+    filename = save_curve(str(tmp_path / "curve.npz"), preamble, times, amplitude)
+    with np.load(filename) as data:
+        assert np.array_equal(data["amplitude"], amplitude)
+        assert json.loads(str(data["preamble"]))["y_multiplier"] == preamble.y_multiplier
+
+def test_parse_timestamps():
+    """Test that FastFrame timestamps keep sub-nanosecond differences."""
+    start, relative = parse_timestamps(
+        '"17 Oct 2026 23:59:59.999999999500","18 Oct 2026 00:00:00.000000001000"'
+    )
+    assert start.day == 17 and start.second == 59
+    assert relative == pytest.approx([0.0, 1.5e-9], abs=1e-13)
+
+def test_capture_frames():
+    """Test that FastFrame returns all frames in one transfer."""
+    scope = MockMDO32(seed=5, record_length=500)
+    scope.write("CH1:SCAle 0.2")
+
+    frames = capture_frames(scope, n_frames=200, width=2)
+
+    assert frames.amplitude.shape == (200, 500)
+    assert len(frames) == 200 and frames.time.shape == (500,)
+    assert np.allclose(frames.amplitude, scope.records[1], atol=frames.preamble.y_multiplier)
+    assert frames.timestamps == pytest.approx(scope.trigger_times, abs=1e-12)
+    assert np.all(np.diff(frames.timestamps) > 0)
+    assert scope.acquisitions == 1
+    assert frames.completion.method == "opc"
+    assert sum(entry.upper().startswith("CURV") for entry in scope.log) == 1
+
+@pytest.mark.parametrize("width", [1, 2])
+def test_stream_record(tmp_path, width):
+    """Test that long records are streamed in windows and map back exactly."""
+    scope = MockMDO32(seed=9, record_length=25000)
+    scope.write("CH1:SCAle 0.2;ACQuire:STATE RUN")
+    filename = str(tmp_path / "record.bin")
+
+    result = stream_record(scope, filename, width=width, chunk_points=10000, progress=False)
+
+    assert result.points == 25000 and result.bytes == 25000 * width
+    assert os.path.getsize(filename) == result.bytes
+    assert sum(entry.upper().startswith("CURV") for entry in scope.log) == 3
+    preamble, codes = load_record(filename)
+    assert preamble.n_points == 25000 and len(codes) == 25000
+    _, _, whole = transfer_waveform(scope, width=width)
+    assert np.array_equal(preamble.scale(codes), whole)
+    assert preamble.time_axis()[-1] == pytest.approx((25000 - 1 - 5000) * 4e-10)
+
+def test_single_record_after_fastframe(tmp_path):
+    """Test that captures after a FastFrame capture get one record again."""
+    session = ScopeSession(scope=MockMDO32(seed=20, record_length=500))
+    capture_frames(session, n_frames=10)
+
+    capture_waveform(session)
+    preamble, time, amplitude = transfer_waveform(session)
+    assert preamble.n_points == len(time) == len(amplitude) == 500
+
+    capture_frames(session, n_frames=10)
+    result = stream_record(session, str(tmp_path / "record.bin"), progress=False)
+    assert result.points == 500
+    assert len(load_record(str(tmp_path / "record.bin"))[1]) == 500
+
+def test_stream_record_empty(tmp_path, mock_scope):
+    """Test that an empty record is rejected before anything is written."""
+    mock_scope.query.return_value = "0"
+    with pytest.raises(ValueError, match="empty record"):
+        stream_record(mock_scope, str(tmp_path / "record.bin"), progress=False)
+    assert not (tmp_path / "record.bin").exists()
+
+def test_capture_channels_single_acquisition(tmp_path):
+    """Test that PMT and sync come from one acquisition on one timebase."""
+    scope = MockMDO32(seed=10, record_length=1000)
+    scope.write("CH1:SCAle 0.2;CH2:POSition -3")
+
+    capture = capture_channels(scope, [1, 2], width=2)
+
+    assert scope.acquisitions == 1
+    assert capture.amplitude.shape == (2, 1000)
+    assert capture.preambles[1].y_offset != capture.preambles[2].y_offset
+    assert np.allclose(capture.channel(2), scope.records[2][0], atol=capture.preambles[2].y_multiplier)
+    assert capture.time == pytest.approx(capture.preambles[2].time_axis())
+    with np.load(save_channels(str(tmp_path / "both.npz"), capture)) as data:
+        assert data["channels"].tolist() == [1, 2]
+
+def test_capture_channels_fastframe_start_stop():
+    """Test start-stop delays from FastFrame captures of two channels."""
+    scope = MockMDO32(seed=11, record_length=500)
+    scope.write("CH1:SCAle 0.2")
+
+    capture = capture_channels(scope, [2, 1], n_frames=100, width=2)
+
+    assert capture.amplitude.shape == (2, 100, 500)
+    assert len(capture.timestamps) == 100
+    delays = start_stop_intervals(capture, start_channel=2, stop_channel=1)
+    # Sync edge at -5 ns, PMT half maximum about 1 ns before its peak at 0
+    assert np.nanmedian(delays) == pytest.approx(4e-9, abs=0.5e-9)
+    assert np.nanstd(delays) < 0.3e-9
+
+def test_capture_channels_short_fastframe_block():
+    """Test that a truncated FastFrame block fails with a clear message."""
+    scope = MockMDO32(seed=21, record_length=500)
+    with patch("pmt_profiler.mdo32.parse_block", side_effect=lambda block, dtype: parse_block(block, dtype)[:-1]):
+        with pytest.raises(ValueError, match="do not split into frames"):
+            capture_channels(scope, [1, 2], n_frames=10)
+    # Whole frames missing leave fewer frames than timestamps
+    with patch("pmt_profiler.mdo32.parse_block", side_effect=lambda block, dtype: parse_block(block, dtype)[:-500]):
+        with pytest.raises(ValueError, match="10 timestamps for 9 frames"):
+            capture_channels(scope, [1, 2], n_frames=10)
+
+def test_capture_channels_rejects_duplicates(mock_scope):
+    """Test that repeated channels are rejected."""
+    with pytest.raises(ValueError, match="distinct"):
+        capture_channels(mock_scope, [1, 1])
+
+def test_session_skips_redundant_writes_and_caches_queries():
+    """Test that a session skips repeated settings and caches static queries."""
+    scope = MockMDO32(seed=12, record_length=2000)
+    session = ScopeSession(scope=scope)
+
+    first = capture_frames(session, n_frames=20, width=2)
+    capture_frames(session, n_frames=20, width=2)
+    sent = len(scope.log)
+    third = capture_frames(session, n_frames=20, width=2)
+
+    assert scope.acquisitions == 3
+    assert not np.array_equal(first.amplitude, third.amplitude)
+    # Only the acquisition, its completion and the data queries are sent again
+    assert scope.log[sent:] == [
+        "ACQuire:STATE RUN", "*OPC?", "CURVe?", "HORizontal:FASTframe:TIMEStamp:ALL:CH1? 1,20"
+    ]
+    assert session.skipped_writes > 0 and session.cache_hits >= 2
+    assert session.identity.startswith("TEKTRONIX,MDO32")
+
+def test_session_invalidates_on_changed_setting():
+    """Test that changing a setting refreshes the cached preamble."""
+    scope = MockMDO32(seed=13)
+    session = ScopeSession(scope=scope)
+    session.write("ACQuire:STATE RUN")
+    before, _, _ = transfer_waveform(session, width=1)
+    session.write("CH1:SCAle 0.5")
+    after, _, _ = transfer_waveform(session, width=1)
+    assert after.y_multiplier == pytest.approx(10 * before.y_multiplier)
+    session.write("ACQ:STATE RUN")
+    session.write("ACQ:STATE RUN")
+    assert scope.acquisitions == 3
+
+def test_session_matches_header_spellings():
+    """Test that long, short and mixed spellings name the same setting."""
+    scope = MockMDO32(seed=19)
+    session = ScopeSession(scope=scope)
+    session.write("DAT:STOP 500")
+    session.write("DATa:STOP 100")
+    session.write("DAT:STOP 500")
+    session.write("DATA:STOP 100")
+    session.write("DAT:STOP 500")
+    assert scope.settings["DATa:STOP"] == "500" and session.skipped_writes == 0
+    session.write("DATa:STOP 500")
+    assert session.skipped_writes == 1
+
+    session.query("WFMOutpre?")
+    session.query("WFMO?")
+    session.query("wfmoutpre?")
+    assert session.cache_hits == 2
+
+def test_session_skips_unchanged_settings_file(mock_scope, tmp_path):
+    """Test that recalling the same setup file twice recalls it once."""
+    settings_file = tmp_path / "pmt.set"
+    settings_file.write_text("setup A")
+    session = ScopeSession(scope=mock_scope)
+
+    assert session.load_settings(str(settings_file)) is True
+    assert session.load_settings(str(settings_file)) is False
+    settings_file.write_text("setup B")
+    assert session.load_settings(str(settings_file)) is True
+    assert session.load_settings(str(settings_file), force=True) is True
+    assert mock_scope.commands.recall.setup.write.call_count == 3
+
+def test_session_recalls_after_reset(tmp_path):
+    """Test that a setup is recalled again once the scope has changed."""
+    settings_file = tmp_path / "pmt.set"
+    settings_file.write_text("setup A")
+    scope = MockMDO32(seed=18)
+    scope.commands = MagicMock()
+    session = ScopeSession(scope=scope)
+
+    assert session.load_settings(str(settings_file)) is True
+    session.write("*RST")
+    assert session.load_settings(str(settings_file)) is True
+    session.write("CH1:SCAle 0.5")
+    assert session.load_settings(str(settings_file)) is True
+    assert session.load_settings(str(settings_file)) is False
+    assert scope.commands.recall.setup.write.call_count == 3
+
+def test_open_session_reuses_connection(mock_device_manager):
+    """Test that sessions are shared per address and connect once."""
+    session = open_session("192.168.1.100")
+    try:
+        assert open_session("192.168.1.100") is session
+        assert not session.connected
+        session.scope
+        session.scope
+        mock_device_manager.return_value.add_mdo3k.assert_called_once_with("192.168.1.100")
+    finally:
+        close_sessions()
+    assert open_session("192.168.1.100") is not session
+    close_sessions()
+
+def test_measurement_parse():
+    """Test parsing measurement specifications."""
+    assert Measurement.parse("fall:1") == Measurement("FALL", 1)
+    assert Measurement.parse("DELay:2:1") == Measurement("DELay", 2, 1)
+    with pytest.raises(ValueError, match="Unknown measurement"):
+        Measurement.parse("JITTER:1")
+    with pytest.raises(ValueError, match="reference"):
+        configure_measurements(MockMDO32(), [Measurement("DELay", 2)])
+
+def test_measure_statistics_matches_host():
+    """Test that scope-side statistics agree with host-side features of the same pulses."""
+    scope = MockMDO32(seed=14, record_length=1000)
+    scope.write("CH1:SCAle 0.2")
+    measurements = [Measurement("AMPlitude", 1), Measurement("FALL", 1), Measurement("DELay", 2, 1)]
+    pmt, sync = [], []
+
+    def transfer(index):
+        # Spot-check transfers of the same pulses the scope measured
+        pmt.append(transfer_waveform(scope, 1, width=2)[2])
+        sync.append(transfer_waveform(scope, 2, width=2)[2])
+
+    stats = measure_statistics(scope, measurements, 200, on_acquisition=transfer)
+
+    pmt, sync = np.array(pmt), np.array(sync)
+    features = extract_features(pmt, 4e-10, t0=-80e-9)
+    sync_times = first_crossing_times(sync, [0.5], 4e-10, t0=-80e-9, polarity=1)[:, 0]
+    host = {
+        "AMPlitude": -features.peak_amplitude,
+        "FALL": features.rise_time,
+        "DELay": features.half_max_time - sync_times,
+    }
+    for s in stats:
+        values = host[s.measurement.type]
+        assert s.population == 200
+        # Base levels differ slightly (scope median vs. host pre-trigger mean)
+        assert s.mean == pytest.approx(values.mean(), rel=0.01)
+        assert s.std == pytest.approx(values.std(), rel=0.05)
+        assert s.minimum == pytest.approx(values.min(), rel=0.03)
+        assert s.maximum == pytest.approx(values.max(), rel=0.03)
+
+def test_measure_statistics_traffic():
+    """Test that stats mode replaces waveform transfers with a few queries."""
+    scope = MockMDO32(seed=15, record_length=10000)
+    measure_statistics(scope, [Measurement("AMPlitude", 1), Measurement("FALL", 1)], 50)
+    assert not any(entry.upper().startswith("CURV") for entry in scope.log)
+    # Statistics are read once: five queries per measurement
+    assert sum(entry.startswith("MEASUrement:MEAS") and entry.endswith("?") for entry in scope.log) == 10
+    assert scope.bytes_sent < 1000
+
+def test_session_resends_action_commands():
+    """Test that statistics are reset on every stats run through one session."""
+    session = ScopeSession(scope=MockMDO32(seed=16))
+    measurements = [Measurement("AMPlitude", 1)]
+    assert measure_statistics(session, measurements, 5)[0].population == 5
+    assert measure_statistics(session, measurements, 5)[0].population == 5
+    assert session.scope.log.count("MEASUrement:STATIstics RESET") == 2
+
+def test_session_command_tree():
+    """Test that command-tree writes and queries go through the session."""
+    from tm_devices.commands import MDO3KCommands
+    scope = MockMDO32(seed=17)
+    scope.command_verification_enabled = False
+    scope.commands = MDO3KCommands(scope)
+    session = ScopeSession(scope=scope)
+    session.write("DATa:STOP 500")
+    capture_waveform(session)
+    assert session.commands.horizontal.recordlength.query() == session.commands.horizontal.recordlength.query()
+    assert session.cache_hits == 1
+    session.commands.data.stop.write(500)
+    assert session.skipped_writes == 1
+    session.commands.data.stop.write(100)
+    session.write("DATa:STOP 500")
+    assert scope.log.count("DATa:STOP 500") == 2 and "DATa:STOP 100" in scope.log
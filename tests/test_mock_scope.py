@@ -0,0 +1,44 @@
+"""Tests for the simulated MDO32 oscilloscope."""
+
+import pytest
+from pmt_profiler.mock_scope import MockMDO32
+
+def test_short_and_long_forms():
+    """Test that commands match in long, short and mixed case forms."""
+    scope = MockMDO32()
+    scope.write("HORizontal:RECOrdlength 5000")
+    assert scope.query("HOR:RECO?") == "5000"
+    scope.write(":data:stop 20")
+    assert scope.query("DATA:STOP?") == "20"
+    with pytest.raises(ValueError, match="Unsupported"):
+        scope.write("DAT:NOPE 1")
+
+def test_sequence_acquisition():
+    """Test that a single-sequence acquisition stops and records every channel."""
+    scope = MockMDO32(seed=0, record_length=800)
+    scope.write("ACQuire:STOPAfter SEQuence")
+    scope.write("ACQuire:STATE RUN")
+    assert scope.query("*OPC?") == "1"
+    assert scope.query("ACQuire:STATE?") == "0"
+    assert scope.acquisitions == 1
+    assert scope.records[1].shape == (1, 800)
+    # PMT pulses are negative, the sync edge is positive
+    assert scope.records[1].min() < -0.015
+    assert scope.records[2].max() > 0.9
+
+def test_curve_window_and_saturation():
+    """Test that CURVe? honours DATa:STARt/STOP and clips to the code range."""
+    scope = MockMDO32(seed=0)
+    scope.write("CH1:SCAle 0.001;ACQuire:STATE RUN;DATa:STARt 101;DATa:STOP 300")
+    block = scope.query_raw_binary("CURVe?")
+    assert block[:5] == b"#3200"
+    assert min(int.from_bytes(bytes([b]), "big", signed=True) for b in block[5:-1]) == -128
+
+def test_fastframe_window():
+    """Test that CURVe? returns the selected FastFrame frames back to back."""
+    scope = MockMDO32(seed=0, record_length=100)
+    scope.write("HORizontal:FASTframe:STATE ON;HOR:FAST:COUN 10;ACQuire:STATE RUN")
+    assert scope.records[1].shape == (10, 100)
+    scope.write("DATa:FRAMESTARt 3;DATa:FRAMESTOP 6")
+    assert scope.query_raw_binary("CURVe?")[:5] == b"#3400"
+    assert scope.query("HORizontal:FASTframe:TIMEStamp:ALL:CH1? 3,4").count('"') == 8
@@ -0,0 +1,72 @@
+"""Tests for the persistence density renderer."""
+
+import numpy as np
+import pytest
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.image import AxesImage
+from pmt_profiler.persistence import PersistenceHistogram, persistence_histogram, plot_pulses
+
+def test_counts_match_histogram2d():
+    """Test binning against np.histogram2d, per-pulse times included."""
+    rng = np.random.default_rng(0)
+    time = np.arange(200) * 1e-9
+    amplitude = rng.normal(size=(50, 200))
+    histogram = PersistenceHistogram((0, 2e-7), (-3, 3), bins=(40, 30))
+    histogram.add(time, amplitude, block_size=7)
+    expected, _, _ = np.histogram2d(
+        np.broadcast_to(time, amplitude.shape).ravel(), amplitude.ravel(), bins=(40, 30), range=((0, 2e-7), (-3, 3))
+    )
+    inside = (time < 2e-7)[None, :] & (np.abs(amplitude) < 3)
+    assert np.array_equal(histogram.counts, expected)
+    assert histogram.counts.sum() == inside.sum()
+    assert histogram.traces == 50
+
+    shifted = PersistenceHistogram((0, 2e-7), (-3, 3), bins=(40, 30))
+    shifted.add(np.broadcast_to(time, amplitude.shape), amplitude.astype(np.float32))
+    assert np.array_equal(shifted.counts, histogram.counts)
+
+def test_incremental_merge_and_nan():
+    """Test that batches and merged histograms add up and NaNs are dropped."""
+    rng = np.random.default_rng(1)
+    time = np.arange(100.0)
+    amplitude = rng.normal(size=(30, 100))
+    amplitude[0, :10] = np.nan
+    whole = PersistenceHistogram((0, 99), (-4, 4), bins=(50, 20))
+    whole.add(time, amplitude)
+    first = PersistenceHistogram((0, 99), (-4, 4), bins=(50, 20))
+    second = PersistenceHistogram((0, 99), (-4, 4), bins=(50, 20))
+    first.add(time, amplitude[:12])
+    second.add(time, amplitude[12:])
+    first.merge(second)
+    assert np.array_equal(first.counts, whole.counts)
+    assert whole.counts.sum() == np.sum(np.abs(amplitude) < 4)
+
+    with pytest.raises(ValueError):
+        first.merge(PersistenceHistogram((0, 99), (-4, 4), bins=(50, 21)))
+
+def test_oversample_fills_edges():
+    """Test that interpolated points fill the bins a fast step crosses."""
+    time = np.arange(4.0)
+    step = np.array([[0.0, 0.0, 1.0, 1.0]])
+    sparse = PersistenceHistogram((0, 3), (0, 1), bins=(3, 4))
+    sparse.add(time, step)
+    dense = PersistenceHistogram((0, 3), (0, 1), bins=(3, 4), oversample=4)
+    dense.add(time, step)
+    assert np.count_nonzero(sparse.counts[1]) == 1
+    assert np.count_nonzero(dense.counts[1]) == 4
+
+def test_plot_pulses_switches_renderer():
+    """Test lines for small sets and one image for large ones."""
+    rng = np.random.default_rng(2)
+    time = np.arange(100) * 4e-10
+    pulses = -np.exp(-0.5 * ((time - 2e-8) / 1e-9) ** 2) + rng.normal(scale=0.01, size=(300, 100))
+    ax = Figure().subplots()
+    assert isinstance(plot_pulses(ax, time, pulses[:20]), LineCollection)
+    assert len(ax.collections) == 1 and not ax.lines
+
+    ax = Figure().subplots()
+    image = plot_pulses(ax, time, pulses, line_limit=100, bins=(50, 40))
+    assert isinstance(image, AxesImage)
+    assert image.get_array().shape == (40, 50)
+    assert persistence_histogram(time, pulses).counts.sum() == pulses.size
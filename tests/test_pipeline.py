@@ -0,0 +1,56 @@
+"""Tests for the pipelined acquisition loop."""
+
+import os
+import time
+import numpy as np
+import pytest
+from pmt_profiler.mock_scope import MockMDO32
+from pmt_profiler.pipeline import NpzSink, run_pipeline
+
+def test_run_pipeline_saves_every_frame(tmp_path):
+    """Test that every acquired frame reaches the sink in order."""
+    scope = MockMDO32(seed=0, record_length=200)
+    sink = NpzSink(str(tmp_path))
+    updates = []
+
+    stats = run_pipeline(scope, n_acquisitions=4, n_frames=50, sink=sink, on_update=lambda s: updates.append(s.acquisitions))
+
+    assert stats.acquisitions == 4 and stats.pulses == 200
+    assert updates == [1, 2, 3, 4]
+    assert [os.path.basename(f) for f in sink.written] == [f"frames_{i:05d}.npz" for i in range(4)]
+    with np.load(sink.written[-1]) as data:
+        assert data["amplitude"].shape == (50, 200)
+        assert len(data["timestamps"]) == 50
+
+def test_run_pipeline_overlaps_saving_with_acquisition():
+    """Test that saving runs while the scope acquires the next set."""
+    scope = MockMDO32(seed=1, record_length=100)
+    scope.arm_time = 0.05
+
+    stats = run_pipeline(scope, n_acquisitions=6, n_frames=10, sink=lambda index, frames: time.sleep(0.05))
+
+    # In sequence, acquiring and saving would take at least 0.6 s
+    assert stats.acquire_time >= 0.3 and stats.persist_time >= 0.3
+    assert stats.elapsed < 0.5
+    assert stats.pulses_per_second > 100
+
+def test_run_pipeline_backpressure():
+    """Test that a slow sink never has more transfers waiting than the queue holds."""
+    scope = MockMDO32(seed=2, record_length=100)
+
+    stats = run_pipeline(scope, n_acquisitions=8, n_frames=5, sink=lambda index, frames: time.sleep(0.02), queue_size=2)
+
+    assert stats.pulses == 40
+    assert 1 <= stats.max_queue_depth <= 2
+    assert 0 < stats.mean_queue_depth <= 2
+
+def test_run_pipeline_sink_error():
+    """Test that an error while saving stops the run and is raised."""
+    scope = MockMDO32(seed=3, record_length=100)
+
+    def sink(index, frames):
+        raise OSError("disk full")
+
+    with pytest.raises(OSError, match="disk full"):
+        run_pipeline(scope, n_acquisitions=20, n_frames=5, sink=sink, queue_size=1)
+    assert scope.acquisitions < 20
@@ -0,0 +1,95 @@
+"""Tests for SPE charge spectra and gain calibration."""
+
+import shutil
+from pathlib import Path
+import numpy as np
+import pytest
+from pmt_profiler.spe import ELEMENTARY_CHARGE, ChargeHistogram, calibrate_gains, fit_spe, histogram_store
+from pmt_profiler.store import pack_directory
+
+CSV_DIR = Path(__file__).resolve().parent.parent / "PMT CSV Files"
+PC = 1e-12
+
+def _spe_charges(n, mean_pe=0.8, spe=1.0 * PC, spe_sigma=0.35 * PC, pedestal_sigma=0.05 * PC, seed=0):
+    """Simulated charges of pulses with Poisson photoelectron counts."""
+    rng = np.random.default_rng(seed)
+    n_pe = rng.poisson(mean_pe, size=n)
+    sigma = np.sqrt(pedestal_sigma ** 2 + n_pe * spe_sigma ** 2)
+    return rng.normal(n_pe * spe, sigma)
+
+def test_histogram_grows_and_merges():
+    """Test incremental filling, range growth and merging."""
+    charges = _spe_charges(10000)
+    whole = ChargeHistogram(0.02 * PC)
+    whole.fill(charges)
+    parts = [ChargeHistogram(0.02 * PC) for _ in range(3)]
+    for part, batch in zip(parts, np.array_split(np.sort(charges)[::-1], 3)):
+        part.fill(batch)
+    parts[0].merge(parts[1])
+    parts[0].merge(parts[2])
+    assert parts[0].first_bin == whole.first_bin
+    assert np.array_equal(parts[0].counts, whole.counts)
+    assert whole.entries == 10000
+    assert np.array_equal(whole.counts, np.histogram(charges, whole.edges)[0])
+
+    with pytest.raises(ValueError):
+        whole.merge(ChargeHistogram(0.01 * PC))
+
+def test_histogram_limits_and_save(tmp_path):
+    """Test under/overflow counting and the npz round trip."""
+    histogram = ChargeHistogram(0.1 * PC, limits=(-1 * PC, 5 * PC))
+    histogram.fill(np.array([-2, 0.5, 1.5, 100, np.nan]) * PC)
+    assert (histogram.underflow, histogram.overflow, histogram.entries) == (1, 1, 2)
+
+    # Without limits, one far outlier cannot allocate billions of bins
+    unlimited = ChargeHistogram(0.01 * PC)
+    with pytest.raises(ValueError, match="limits"):
+        unlimited.fill(np.array([0.5, 1e6]) * PC)
+    unlimited.fill(np.array([0.5]) * PC)
+    with pytest.raises(ValueError, match="limits"):
+        unlimited.fill(np.array([-1e6]) * PC)
+    assert unlimited.entries == 1
+
+    histogram.save(str(tmp_path / "spe.npz"))
+    loaded = ChargeHistogram.load(str(tmp_path / "spe.npz"))
+    assert loaded.limits == histogram.limits
+    assert np.array_equal(loaded.edges, histogram.edges)
+    assert np.array_equal(loaded.counts, histogram.counts)
+
+def test_fit_recovers_gain():
+    """Test that the fit recovers simulated SPE charge, width and rate."""
+    histogram = ChargeHistogram(0.02 * PC)
+    for batch in range(10):
+        histogram.fill(_spe_charges(20000, seed=batch))
+    fit = fit_spe(histogram)
+    assert fit.spe_charge == pytest.approx(1.0 * PC, rel=0.03)
+    assert fit.resolution == pytest.approx(0.35, rel=0.1)
+    assert fit.mean_pe == pytest.approx(0.8, rel=0.05)
+    assert abs(fit.pedestal) < 0.01 * PC
+    assert fit.gain == pytest.approx(fit.spe_charge / ELEMENTARY_CHARGE)
+    assert fit.chi2_ndf < 5
+    assert fit.to_dict()["entries"] == 200000
+
+def test_calibrate_gains():
+    """Test per-setting fits of several gain values."""
+    histograms = {}
+    for gain, spe in ((60, 0.6 * PC), (70, 1.5 * PC)):
+        histograms[gain] = ChargeHistogram(0.02 * PC)
+        histograms[gain].fill(_spe_charges(50000, spe=spe, spe_sigma=0.35 * spe))
+    fits = calibrate_gains(histograms)
+    assert fits[60].spe_charge == pytest.approx(0.6 * PC, rel=0.05)
+    assert fits[70].spe_charge == pytest.approx(1.5 * PC, rel=0.05)
+
+    with pytest.raises(ValueError):
+        fit_spe(ChargeHistogram(0.02 * PC))
+
+def test_histogram_store(tmp_path):
+    """Test streaming the charges of a packed store into a histogram."""
+    directory = tmp_path / "pulses"
+    directory.mkdir()
+    for path in sorted(CSV_DIR.glob("tek*ALL.csv"))[:4]:
+        shutil.copy(path, directory)
+    pack_directory(str(directory), str(tmp_path / "store"))
+    histogram = histogram_store(str(tmp_path / "store"), 0.1 * PC, block_size=3)
+    assert histogram.entries == 4
+    assert histogram.centers.min() > 0
@@ -0,0 +1,75 @@
+"""Tests for the memory-mapped waveform store."""
+
+import shutil
+from pathlib import Path
+import numpy as np
+import pytest
+from pmt_profiler.store import DATA_FILE, INDEX_FILE, WaveformStore, pack_directory
+from pmt_profiler.waveform import read_waveform
+
+CSV_DIR = Path(__file__).resolve().parent.parent / "PMT CSV Files"
+
+@pytest.fixture
+def pulse_dir(tmp_path):
+    """Copy a few pulse CSVs into a scratch directory."""
+    directory = tmp_path / "pulses"
+    directory.mkdir()
+    for path in sorted(CSV_DIR.glob("tek*ALL.csv"))[:3]:
+        shutil.copy(path, directory)
+    return directory
+
+def test_pack_and_load(pulse_dir, tmp_path):
+    """Test packing a directory and memory-mapping it back."""
+    store_path = tmp_path / "store"
+    assert pack_directory(str(pulse_dir), str(store_path)) == 3
+
+    store = WaveformStore(str(store_path))
+    assert len(store) == 3
+    assert store.amplitude.shape == (3, 1000)
+    assert isinstance(store.amplitude, np.memmap)
+    assert store.sources == sorted(p.name for p in pulse_dir.iterdir())
+
+    header, time, amplitude = read_waveform(str(pulse_dir / store.sources[1]))
+    assert np.array_equal(store.amplitude[1], amplitude)
+    assert store.sample_interval[1] == pytest.approx(header.sample_interval)
+    assert np.allclose(store.time_axis(1), time, atol=1e-12)
+
+def test_pack_is_incremental(pulse_dir, tmp_path):
+    """Test that a rerun only appends files not yet in the store."""
+    store_path = tmp_path / "store"
+    pack_directory(str(pulse_dir), str(store_path))
+    assert pack_directory(str(pulse_dir), str(store_path)) == 0
+
+    shutil.copy(sorted(CSV_DIR.glob("tek*ALL.csv"))[5], pulse_dir)
+    assert pack_directory(str(pulse_dir), str(store_path)) == 1
+    assert WaveformStore(str(store_path)).amplitude.shape == (4, 1000)
+
+def test_pack_skips_mismatched_length(pulse_dir, tmp_path):
+    """Test that records of a different length are skipped."""
+    lines = (pulse_dir / "tek0053ALL.csv").read_text().splitlines()
+    (pulse_dir / "tek9999ALL.csv").write_text("\n".join(lines[:-10]) + "\n")
+    store_path = tmp_path / "store"
+    assert pack_directory(str(pulse_dir), str(store_path)) == 3
+    assert "tek9999ALL.csv" not in WaveformStore(str(store_path)).sources
+
+def test_pack_recovers_from_interrupted_run(pulse_dir, tmp_path):
+    """Test that samples and index lines of an interrupted pack are discarded."""
+    store_path = tmp_path / "store"
+    pack_directory(str(pulse_dir), str(store_path))
+    packed = len(WaveformStore(str(store_path)))
+    with open(store_path / DATA_FILE, "ab") as f:
+        f.write(b"\0" * 123)
+    with open(store_path / INDEX_FILE, "a") as f:
+        f.write('{"source": "tek0099ALL.csv", "time')
+    assert len(WaveformStore(str(store_path))) == packed
+
+    shutil.copy(sorted(CSV_DIR.glob("tek*ALL.csv"))[5], pulse_dir)
+    pack_directory(str(pulse_dir), str(store_path))
+    store = WaveformStore(str(store_path))
+    _, _, amplitude = read_waveform(str(pulse_dir / store.sources[-1]))
+    assert np.array_equal(store.amplitude[-1], amplitude)
+
+def test_missing_store(tmp_path):
+    """Test opening a store that does not exist."""
+    with pytest.raises(FileNotFoundError):
+        WaveformStore(str(tmp_path / "missing"))
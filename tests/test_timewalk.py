@@ -0,0 +1,69 @@
+"""Tests for time-walk calibration."""
+
+import numpy as np
+import pytest
+from pmt_profiler.timewalk import WalkCalibration, binned_stats, fit_walk
+
+def _walk_pulses(n=20000, seed=0):
+    """Amplitudes and crossing times with 1/sqrt(A) walk plus jitter."""
+    rng = np.random.default_rng(seed)
+    amplitudes = -rng.uniform(0.02, 0.3, n)
+    times = 40e-9 + 0.3e-9 / np.sqrt(np.abs(amplitudes)) + rng.normal(0, 20e-12, n)
+    return amplitudes, times
+
+def test_binned_stats_matches_loop():
+    """Test bincount reductions against a per-bin loop."""
+    rng = np.random.default_rng(1)
+    amplitudes = rng.uniform(-200, -20, 500)
+    times = rng.normal(size=500)
+    times[3] = np.nan
+    stats = binned_stats(amplitudes, times, bin_width=20)
+
+    assert stats.edges[0] == -200 and stats.edges[-1] == -20
+    assert stats.counts.sum() == 499
+    index = np.digitize(amplitudes, stats.edges) - 1
+    for i in range(len(stats.counts)):
+        in_bin = (index == i) & ~np.isnan(times)
+        assert stats.counts[i] == in_bin.sum()
+        assert stats.mean[i] == pytest.approx(np.mean(times[in_bin]))
+        assert stats.rms[i] == pytest.approx(np.std(times[in_bin]))
+
+def test_binned_stats_needs_bins():
+    """Test that bins must be specified."""
+    with pytest.raises(ValueError):
+        binned_stats([1.0], [1.0])
+
+def test_fit_removes_walk():
+    """Test that the fitted correction removes the amplitude dependence."""
+    amplitudes, times = _walk_pulses()
+    calibration = fit_walk(amplitudes, times, bin_width=0.01)
+    corrected = calibration.apply(amplitudes, times)
+
+    assert np.std(times) > 100e-12
+    assert np.std(corrected) == pytest.approx(20e-12, rel=0.1)
+    stats = binned_stats(amplitudes, corrected, bin_width=0.01)
+    assert np.nanmax(stats.mean) - np.nanmin(stats.mean) < 10e-12
+
+def test_correction_applies_to_new_batch():
+    """Test that a calibration corrects pulses it was not fitted on."""
+    calibration = fit_walk(*_walk_pulses(seed=2), bin_width=0.01)
+    amplitudes, times = _walk_pulses(n=5000, seed=3)
+    assert np.std(calibration.apply(amplitudes, times)) < 25e-12
+
+def test_save_and_load(tmp_path):
+    """Test that a calibration survives a JSON round trip."""
+    amplitudes, times = _walk_pulses(n=2000)
+    calibration = fit_walk(amplitudes, times, bin_width=0.02, degree=3, transform="inverse")
+    path = tmp_path / "walk.json"
+    calibration.save(str(path))
+    loaded = WalkCalibration.load(str(path))
+    assert loaded == calibration
+    assert np.array_equal(loaded.apply(amplitudes, times), calibration.apply(amplitudes, times))
+
+def test_fit_rejects_bad_input():
+    """Test invalid transforms and too few bins."""
+    amplitudes, times = _walk_pulses(n=100)
+    with pytest.raises(ValueError, match="transform"):
+        fit_walk(amplitudes, times, bin_width=0.01, transform="log")
+    with pytest.raises(ValueError, match="populated"):
+        fit_walk(amplitudes, times, bin_width=1.0)
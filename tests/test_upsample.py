@@ -0,0 +1,56 @@
+"""Tests for band-limited edge upsampling."""
+
+import numpy as np
+import pytest
+from pmt_profiler.crossing import first_crossing_times
+from pmt_profiler.upsample import fft_upsample, upsample_edges
+
+DT = 4e-10
+SIGMA = 0.8e-9
+
+def _pulses(arrivals, length=400):
+    """Smooth negative Gaussian pulses sampled at DT."""
+    t = np.arange(length) * DT
+    return -np.exp(-0.5 * ((t - np.asarray(arrivals)[:, None]) / SIGMA) ** 2)
+
+def test_upsample_keeps_original_samples():
+    """Test that every factor-th output sample is an input sample."""
+    rng = np.random.default_rng(0)
+    windows = rng.normal(size=(3, 16))
+    fine = fft_upsample(windows, 4)
+    assert fine.shape == (3, 61)
+    assert np.allclose(fine[:, ::4], windows)
+    assert np.array_equal(fft_upsample(windows, 1), windows)
+    with pytest.raises(ValueError):
+        fft_upsample(windows, 0)
+
+def test_upsample_reconstructs_band_limited_signal():
+    """Test interpolation of a smooth pulse against its analytic values."""
+    coarse = _pulses([60e-9], length=300)
+    fine = fft_upsample(coarse[:, 130:170], 8)
+    t = 130 * DT + np.arange(fine.shape[1]) * DT / 8
+    exact = -np.exp(-0.5 * ((t - 60e-9) / SIGMA) ** 2)
+    assert np.max(np.abs(fine - exact)) < 0.01
+
+def test_edge_windows_and_timing():
+    """Test window placement and that upsampling sharpens crossing times."""
+    arrivals = 60e-9 + np.linspace(0, DT, 7)
+    pulses = _pulses(arrivals)
+    edges = upsample_edges(pulses, DT, t0=1e-6, factor=8, window=24)
+
+    assert edges.amplitude.shape == (7, 23 * 8 + 1)
+    assert np.allclose(edges.sample_interval, DT / 8)
+    peak = np.argmin(pulses, axis=1)
+    assert np.allclose(edges.t0, 1e-6 + (peak - 18) * DT)
+
+    expected = 1e-6 + arrivals - np.sqrt(2 * np.log(2)) * SIGMA
+    coarse = first_crossing_times(pulses, [0.5], DT, t0=1e-6)[:, 0]
+    refined = first_crossing_times(edges.amplitude, [0.5], edges.sample_interval, edges.t0)[:, 0]
+    assert np.max(np.abs(refined - expected)) < np.max(np.abs(coarse - expected)) / 4
+
+def test_window_clipped_to_record():
+    """Test that a pulse at the record start keeps its window inside."""
+    pulses = _pulses([0.0, 150e-9], length=400)
+    edges = upsample_edges(pulses, DT, factor=2, window=16)
+    assert edges.t0[0] == 0.0
+    assert np.allclose(edges.amplitude[0, ::2], pulses[0, :16])
@@ -0,0 +1,105 @@
+"""Tests for watch-folder incremental statistics."""
+
+import os
+import shutil
+from pathlib import Path
+import numpy as np
+import pytest
+from pmt_profiler.analyze import load_dataset, run_analyses
+from pmt_profiler.timewalk import binned_stats
+from pmt_profiler.watch import BinnedOnlineStats, FolderWatcher, OnlineStats, watch
+
+CSV_DIR = Path(__file__).resolve().parent.parent / "PMT CSV Files"
+
+def test_online_stats_match_batch():
+    """Test that batched Welford updates equal a single pass, NaNs included."""
+    rng = np.random.default_rng(0)
+    values = 5e-6 + rng.normal(scale=1e-10, size=(1000, 3))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[:, 2] = np.nan
+    stats = OnlineStats(3)
+    for batch in np.array_split(values, 7):
+        stats.update(batch)
+    assert np.array_equal(stats.count, np.sum(~np.isnan(values), axis=0))
+    assert np.allclose(stats.mean[:2], np.nanmean(values[:, :2], axis=0), rtol=1e-12)
+    assert np.allclose(stats.std[:2], np.nanstd(values[:, :2], axis=0), rtol=1e-9)
+    assert np.isnan(stats.std[2])
+
+def test_binned_online_stats_match_binned_stats():
+    """Test incremental per-bin statistics against binned_stats."""
+    rng = np.random.default_rng(1)
+    amplitudes = rng.uniform(-0.3, -0.02, 2000)
+    times = 1e-7 + 1e-9 * np.sqrt(-amplitudes) + rng.normal(scale=2e-10, size=2000)
+    stats = BinnedOnlineStats(0.02)
+    for a, t in zip(np.array_split(amplitudes, 5), np.array_split(times, 5)):
+        stats.update(a, t)
+    reference = binned_stats(amplitudes, times, edges=np.append(stats.centers - 0.01, stats.centers[-1] + 0.01))
+    assert np.array_equal(stats.count, reference.counts)
+    assert np.allclose(stats.rms, reference.rms, equal_nan=True)
+
+@pytest.fixture
+def incoming(tmp_path):
+    """Empty directory that pulse files are copied into."""
+    directory = tmp_path / "incoming"
+    directory.mkdir()
+    return directory
+
+def _deliver(files, directory):
+    for path in files:
+        target = directory / path.name
+        shutil.copy(path, target)
+        os.utime(target, (0, 0))
+
+def test_watcher_processes_each_file_once(incoming):
+    """Test that scans pick up only new files and match a batch analysis."""
+    files = sorted(CSV_DIR.glob("tek*ALL.csv"))
+    watcher = FolderWatcher(str(incoming), "tek*ALL.csv", thresholds=[0.2, 0.5])
+    _deliver(files[:20], incoming)
+    assert watcher.scan() == 20
+    assert watcher.scan() == 0
+    _deliver(files[20:], incoming)
+    assert watcher.scan() == len(files) - 20
+
+    batch = run_analyses(load_dataset(str(CSV_DIR), "tek*ALL.csv"), ["jitter"], thresholds=np.array([0.2, 0.5]))
+    assert np.allclose(watcher.jitter, batch["jitter"]["jitter"], rtol=1e-9)
+    assert watcher.walk.count.sum() == len(files)
+
+def test_watcher_skips_unsettled_files(incoming):
+    """Test that files still being written are left for a later scan."""
+    shutil.copy(sorted(CSV_DIR.glob("tek*ALL.csv"))[0], incoming)
+    watcher = FolderWatcher(str(incoming), settle_time=60.0)
+    assert watcher.scan() == 0
+    (incoming / "broken.csv").write_text("not a waveform")
+    os.utime(incoming / "broken.csv", (0, 0))
+    watcher.settle_time = 0.0
+    assert watcher.scan() == 1
+    assert str(incoming / "broken.csv") not in watcher.processed
+
+def test_watcher_retries_failed_files_when_changed(incoming):
+    """Test that a file that fails to parse is only retried after it changes."""
+    broken = incoming / "late.csv"
+    broken.write_text("not a waveform")
+    os.utime(broken, (0, 0))
+    watcher = FolderWatcher(str(incoming), settle_time=0.0)
+    assert watcher.scan() == 0
+    assert watcher.new_files() == []
+    shutil.copy(sorted(CSV_DIR.glob("tek*ALL.csv"))[0], broken)
+    os.utime(broken, (1, 1))
+    assert watcher.scan() == 1
+    assert watcher.failed == {}
+
+def test_watch_stops_when_converged(incoming):
+    """Test that watching stops once the jitter is precise enough."""
+    files = sorted(CSV_DIR.glob("tek*ALL.csv"))
+    batches = [files[:10], files[10:30], files[30:]]
+    updates = []
+
+    def deliver_next(_):
+        if batches:
+            _deliver(batches.pop(0), incoming)
+
+    watcher = FolderWatcher(str(incoming), thresholds=[0.5], settle_time=0.0)
+    watch(watcher, interval=0, precision=0.12, on_update=updates.append, sleep=deliver_next)
+    assert watcher.relative_uncertainty() < 0.12
+    assert watcher.pulses == 50
+    assert len(updates) == 3
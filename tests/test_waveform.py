@@ -0,0 +1,105 @@
+"""Tests for the waveform CSV reader."""
+
+from pathlib import Path
+import numpy as np
+import pytest
+from pmt_profiler.waveform import (
+    LAYOUT_COLUMNS,
+    LAYOUT_SIDE_BY_SIDE,
+    iter_waveform_chunks,
+    read_header,
+    read_waveform,
+    sniff_layout,
+)
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+TEK_CSV = REPO_ROOT / "PMT CSV Files" / "tek0053ALL.csv"
+EXPORT_CSV = REPO_ROOT / "pmt_profiler" / "test_osc_output.csv"
+
+def test_read_columns_layout():
+    """Test reading a tek*ALL.csv file."""
+    header, time, amplitude = read_waveform(str(TEK_CSV))
+    assert header.layout == LAYOUT_COLUMNS
+    assert header.model == "MDO32"
+    assert header.record_length == 1000
+    assert header.sample_interval == pytest.approx(4e-10)
+    assert header.vertical_scale == pytest.approx(0.05)
+    assert time.dtype == np.float32 and amplitude.dtype == np.float32
+    assert len(time) == len(amplitude) == header.record_length
+    assert time[0] == pytest.approx(-1.996e-07)
+    assert amplitude[1] == pytest.approx(-0.004)
+
+def test_read_side_by_side_layout():
+    """Test reading a DATa:EXPort file with metadata beside the samples."""
+    header, time, amplitude = read_waveform(str(EXPORT_CSV))
+    assert header.layout == LAYOUT_SIDE_BY_SIDE
+    assert header.record_length == 1000
+    assert header.trigger_point == pytest.approx(500.0, abs=1e-3)
+    assert header.yzero == pytest.approx(1.8751717)
+    assert header.source == "CH1"
+    assert len(time) == 1000
+    assert np.allclose(np.diff(time), header.sample_interval, rtol=1e-3)
+    assert amplitude[0] == pytest.approx(-143.7500032e-6)
+
+def test_read_header_matches_full_read():
+    """Test that reading only the header gives the same metadata."""
+    for path in (TEK_CSV, EXPORT_CSV):
+        assert read_header(str(path)) == read_waveform(str(path))[0]
+
+def test_sniff_layout_unknown():
+    """Test that an unrecognized file is rejected."""
+    with pytest.raises(ValueError, match="Unrecognized"):
+        sniff_layout(["a,b", "1,2"])
+
+def test_missing_record_length(tmp_path):
+    """Test that a header without Record Length is rejected."""
+    path = tmp_path / "bad.csv"
+    path.write_text("Model,MDO32\nSample Interval,4e-10\nTIME,CH1\n0,1\n")
+    with pytest.raises(ValueError, match="Record Length"):
+        read_waveform(str(path))
+
+def _write_long_record(path, n_points, pulse_starts, width=40):
+    """Write a columns-layout CSV with square negative pulses."""
+    amplitude = np.zeros(n_points)
+    for start in pulse_starts:
+        amplitude[start:start + width] = -0.05
+    time = np.arange(n_points) * 4e-10
+    lines = ["Model,MDO32", "Sample Interval,4e-10", f"Record Length,{n_points}", "TIME,CH1"]
+    lines += [f"{t:.6e},{a}" for t, a in zip(time, amplitude)]
+    path.write_text("\n".join(lines) + "\n")
+    return amplitude.astype(np.float32)
+
+def test_iter_chunks_covers_record(tmp_path):
+    """Test that owned regions of the chunks tile the whole record."""
+    path = tmp_path / "long.csv"
+    amplitude = _write_long_record(path, 10_250, [100, 990, 5000])
+    chunks = list(iter_waveform_chunks(str(path), chunk_size=1000, overlap=100))
+
+    assert all(len(c.amplitude) <= 1000 for c in chunks)
+    assert [c.start for c in chunks] == list(range(0, 10_250, 900))
+    owned = np.concatenate([c.amplitude[:c.owned] for c in chunks])
+    assert np.array_equal(owned, amplitude)
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert np.array_equal(prev.amplitude[prev.owned:], nxt.amplitude[:100])
+
+def test_iter_chunks_keeps_straddling_pulse(tmp_path):
+    """Test that a pulse across a chunk boundary is whole in its owning chunk."""
+    path = tmp_path / "long.csv"
+    _write_long_record(path, 3000, [980])
+    for chunk in iter_waveform_chunks(str(path), chunk_size=1000, overlap=100):
+        below = np.flatnonzero(chunk.amplitude < 0)
+        if len(below) and below[0] < chunk.owned:
+            assert chunk.start + below[0] == 980
+            assert len(below) == 40
+
+def test_iter_chunks_side_by_side():
+    """Test streaming the side-by-side export layout."""
+    _, _, amplitude = read_waveform(str(EXPORT_CSV))
+    chunks = list(iter_waveform_chunks(str(EXPORT_CSV), chunk_size=300, overlap=50))
+    owned = np.concatenate([c.amplitude[:c.owned] for c in chunks])
+    assert np.array_equal(owned, amplitude)
+
+def test_iter_chunks_invalid_overlap():
+    """Test that the overlap must be smaller than the chunk."""
+    with pytest.raises(ValueError, match="overlap"):
+        next(iter_waveform_chunks(str(TEK_CSV), chunk_size=100, overlap=100))